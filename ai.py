@@ -3,15 +3,33 @@
 # COMPUTER PLAYER LOGIC
 # ===============================
 
+import json
+import logging
+import os
 import random
-from draw import redraw
+import threading
+import time
+from collections import namedtuple
+from frames import animate_move
+from profiling import profile_call, profile_mode
+from journal import record_position
+from main_helpers import show_game_over, show_draw
+from navigation import new_move
+from see import see, hanging_value
 from helper import (
     is_white,
     is_black,
     is_legal_move,
     make_move,
+    unmake_move,
     king_in_check,
-    is_checkmate
+    is_checkmate,
+    is_repetition,
+    draw_reason,
+    make_null_move,
+    unmake_null_move,
+    generate_moves,
+    generate_legal_moves
 )
 
 
@@ -41,28 +59,670 @@ def get_all_legal_moves(game, color):
     return moves
 
 
-def evaluate_board(game):
+# -----------------------------
+# EVALUATION WEIGHTS
+# -----------------------------
+# Material plus a piece-square bonus per piece type, in centipawns from
+# white's point of view. The defaults are the plain material values; a
+# tuned table (tune.py) is loaded from eval_weights.json, or from the file
+# named by $CHESS_EVAL_WEIGHTS, when the program starts.
+
+DEFAULT_MATERIAL = {"P": 100, "N": 300, "B": 300, "R": 500, "Q": 900, "K": 0}
+EVAL_WEIGHTS_FILE = os.environ.get(
+    "CHESS_EVAL_WEIGHTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_weights.json")
+)
+
+# piece -> 64 values (a8 = 0 ... h1 = 63), black entries already negated
+EVAL_TABLE = {}
+
+
+def build_eval_table(material, pst=None):
     """
-    Simple material-based evaluation
+    material: {"P": 100, ...}; pst: {"P": [64 values], ...} laid out from
+    white's side (a8 first). Black uses the vertically mirrored square.
     """
-    values = {
-        "P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0,
-        "p": -1, "n": -3, "b": -3, "r": -5, "q": -9, "k": 0
-    }
+    table = {}
+    for piece, value in material.items():
+        bonus = (pst or {}).get(piece) or [0] * 64
+        table[piece] = [value + bonus[sq] for sq in range(64)]
+        table[piece.lower()] = [-(value + bonus[(7 - sq // 8) * 8 + sq % 8]) for sq in range(64)]
+    return table
+
+
+def load_eval_weights(path=None):
+    """Install the weights from path (default EVAL_WEIGHTS_FILE) if it exists."""
+    path = path or EVAL_WEIGHTS_FILE
+    material, pst = DEFAULT_MATERIAL, None
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            weights = json.load(f)
+        material = dict(DEFAULT_MATERIAL, **weights.get("material", {}))
+        pst = weights.get("pst")
+    EVAL_TABLE.clear()
+    EVAL_TABLE.update(build_eval_table(material, pst))
+    return path if pst is not None else None
 
+
+load_eval_weights()
+
+
+def evaluate_board(game):
+    """
+    Material and piece-square evaluation in centipawns (positive = good
+    for white), using the weights in EVAL_TABLE.
+    """
+    table = EVAL_TABLE
     score = 0
+    square = 0
     for row in game.board:
         for piece in row:
-            score += values.get(piece, 0)
+            if piece != ".":
+                score += table[piece][square]
+            square += 1
 
     return score
 
 
+# ===============================
+# ALPHA-BETA SEARCH
+# ===============================
+# Iterative deepening negamax with a transposition table, a capture-only
+# quiescence search and MVV-LVA move ordering; captures that lose material
+# by static exchange evaluation (see.py) are ordered after the quiet moves
+# and skipped in quiescence. Used by the batch tools (EPD runner etc.),
+# which need node/time limits and repeatable node counts.
+#
+# Selective search, each part switchable per search() call:
+#   null-move pruning: give the opponent a free move at reduced depth; if
+#       the position still fails high, cut. Not in check, not right after
+#       another null move, and never with only king and pawns (zugzwang).
+#   late-move reductions: quiet moves late in the ordering are searched
+#       shallower with a null window, and again at full depth if they beat
+#       alpha.
+#   futility pruning: one and two plies from the horizon, quiet moves are
+#       skipped when the static eval plus a margin can't reach alpha.
+
+MATE_SCORE = 100000
+PIECE_VALUES = {"p": 1, "n": 3, "b": 3, "r": 5, "q": 9, "k": 0}
+
+# Transposition table bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3            # moves searched at full depth before reducing
+FUTILITY_MARGINS = (0, 200, 500)   # by remaining depth, centipawns
+
+SearchResult = namedtuple("SearchResult", "move score depth nodes elapsed stats", defaults=(None,))
+
+logger = logging.getLogger("chess.search")
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the node or time budget runs out."""
+
+
+class SearchStats:
+    """
+    Counters for one search, returned as SearchResult.stats by
+    search(..., stats=True). Call counts and phase times for movegen,
+    evaluation and attack tests are only collected when stats are on;
+    otherwise the search calls the plain functions.
+    """
+
+    __slots__ = (
+        "nodes", "qnodes", "movegen_calls", "eval_calls", "attack_tests",
+        "tt_probes", "tt_hits", "cutoffs", "null_cutoffs", "reductions",
+        "researches", "futility_prunes", "phase_time", "iterations",
+    )
+
+    def __init__(self):
+        self.nodes = 0
+        self.qnodes = 0
+        self.movegen_calls = 0
+        self.eval_calls = 0
+        self.attack_tests = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.cutoffs = 0
+        self.null_cutoffs = 0
+        self.reductions = 0
+        self.researches = 0
+        self.futility_prunes = 0
+        self.phase_time = {"movegen": 0.0, "eval": 0.0, "attack": 0.0}
+        self.iterations = []
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return (
+            f"SearchStats(nodes={self.nodes}, qnodes={self.qnodes}, "
+            f"movegen={self.movegen_calls}, eval={self.eval_calls}, "
+            f"attack={self.attack_tests}, tt={self.tt_hits}/{self.tt_probes}, "
+            f"cutoffs={self.cutoffs}, null={self.null_cutoffs}, "
+            f"lmr={self.reductions}/{self.researches}, futility={self.futility_prunes})"
+        )
+
+
+class TranspositionTable:
+    """
+    Fixed-size table indexed by the low bits of the Zobrist hash. Entries
+    are (key, depth, score, bound, move); a deeper entry for the same
+    position is never replaced by a shallower one.
+    """
+
+    def __init__(self, size_bits=18):
+        self.mask = (1 << size_bits) - 1
+        self.entries = [None] * (1 << size_bits)
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        old = self.entries[index]
+        if old is None or old[0] != key or depth >= old[1]:
+            self.entries[index] = (key, depth, score, bound, move)
+
+    def clear(self):
+        self.entries = [None] * (self.mask + 1)
+
+
+# Shared between searches, so a new search starts with a warm table
+transposition_table = TranspositionTable()
+
+
+def _instrumented(func, stats, counter, phase):
+    """Wrap func to count calls and time them into stats.phase_time[phase]."""
+    clock = time.perf_counter
+
+    def wrapper(*args):
+        started = clock()
+        result = func(*args)
+        stats.phase_time[phase] += clock() - started
+        setattr(stats, counter, getattr(stats, counter) + 1)
+        return result
+
+    return wrapper
+
+
+class SearchContext:
+    """Budget, counters and (possibly instrumented) engine functions of one search."""
+
+    def __init__(self, node_limit=None, time_limit=None, tt=None, stats=None, stop=None,
+                 null_move=True, lmr=True, futility=True):
+        self.node_limit = node_limit
+        self.deadline = time.monotonic() + time_limit if time_limit else None
+        self.stop = stop
+        self.tt = tt if tt is not None else transposition_table
+        self.stats = stats
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.null_move = null_move
+        self.lmr = lmr
+        self.futility = futility
+        self.null_cutoffs = 0
+        self.reductions = 0
+        self.researches = 0
+        self.futility_prunes = 0
+
+        if stats is None:
+            self.generate = generate_moves
+            self.evaluate = evaluate_board
+            self.in_check = king_in_check
+        else:
+            self.generate = _instrumented(generate_moves, stats, "movegen_calls", "movegen")
+            self.evaluate = _instrumented(evaluate_board, stats, "eval_calls", "eval")
+            self.in_check = _instrumented(king_in_check, stats, "attack_tests", "attack")
+
+    def count_node(self):
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted
+        if self.nodes & 255 == 0:
+            if self.stop is not None and self.stop.is_set():
+                raise SearchAborted
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise SearchAborted
+
+    def fill_stats(self):
+        stats = self.stats
+        stats.nodes = self.nodes
+        stats.qnodes = self.qnodes
+        stats.cutoffs = self.cutoffs
+        stats.tt_probes = self.tt_probes
+        stats.tt_hits = self.tt_hits
+        stats.null_cutoffs = self.null_cutoffs
+        stats.reductions = self.reductions
+        stats.researches = self.researches
+        stats.futility_prunes = self.futility_prunes
+
+
+def _other(color):
+    return "black" if color == "white" else "white"
+
+
+def _move_order_key(game, move):
+    """
+    MVV-LVA (most valuable victim first, least valuable attacker second)
+    for captures that don't lose material, then quiet moves (0), then
+    captures that SEE says lose material (-1).
+    """
+    sr, sc, tr, tc = move
+    target = game.board[tr][tc]
+    if target == ".":
+        return 0
+    victim = PIECE_VALUES[target.lower()]
+    attacker = PIECE_VALUES[game.board[sr][sc].lower()]
+    # Taking a piece worth at least the capturer can't lose material
+    if attacker > victim and see(game, move) < 0:
+        return -1
+    return 10 * victim - attacker + 10
+
+
+def _ordered_moves(game, color, ctx, first=None):
+    moves = ctx.generate(game, color)
+    moves.sort(key=lambda m: _move_order_key(game, m), reverse=True)
+    if first in moves:
+        moves.remove(first)
+        moves.insert(0, first)
+    return moves
+
+
+def _relative_eval(game, color, ctx):
+    score = ctx.evaluate(game)
+    return score if color == "white" else -score
+
+
+def _score_to_tt(score, ply):
+    """Mate scores are stored relative to the node, not the root."""
+    if score >= MATE_SCORE - 1000:
+        return score + ply
+    if score <= -MATE_SCORE + 1000:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    if score >= MATE_SCORE - 1000:
+        return score - ply
+    if score <= -MATE_SCORE + 1000:
+        return score + ply
+    return score
+
+
+def quiescence(game, color, alpha, beta, ctx):
+    ctx.count_node()
+    ctx.qnodes += 1
+
+    stand_pat = _relative_eval(game, color, ctx)
+    if stand_pat >= beta:
+        return stand_pat
+    alpha = max(alpha, stand_pat)
+
+    board = game.board
+    captures = [
+        (_move_order_key(game, move), move)
+        for move in ctx.generate(game, color)
+        if board[move[2]][move[3]] != "."
+    ]
+    captures.sort(reverse=True)
+
+    for key, move in captures:
+        if key < 0:
+            break  # the rest lose material in the exchange
+
+        make_move(game, *move)
+        if ctx.in_check(game, color):
+            unmake_move(game)
+            continue
+        try:
+            score = -quiescence(game, _other(color), -beta, -alpha, ctx)
+        finally:
+            unmake_move(game)
+
+        if score >= beta:
+            ctx.cutoffs += 1
+            return score
+        alpha = max(alpha, score)
+
+    return alpha
+
+
+def _is_quiet(game, move):
+    """Not a capture (en passant included) and not a promotion."""
+    sr, sc, tr, tc = move
+    if game.board[tr][tc] != ".":
+        return False
+    return game.board[sr][sc].lower() != "p" or (sc == tc and tr not in (0, 7))
+
+
+def _has_pieces(game, color):
+    """color has something besides king and pawns (null-move zugzwang guard)."""
+    pieces = "NBRQ" if color == "white" else "nbrq"
+    return any(p in pieces for row in game.board for p in row)
+
+
+def alpha_beta(game, color, depth, alpha, beta, ply, ctx, null_ok=True):
+    # A repeated position or an expired 50-move count is a draw: the whole
+    # subtree is skipped (repetition only scans back to the last capture or
+    # pawn move)
+    if game.halfmove_clock >= 100 or is_repetition(game):
+        return 0
+
+    if depth <= 0:
+        return quiescence(game, color, alpha, beta, ctx)
+
+    ctx.count_node()
+
+    key = game.hash_key
+    ctx.tt_probes += 1
+    entry = ctx.tt.probe(key)
+    tt_move = None
+    if entry is not None:
+        tt_move = entry[4]
+        if entry[1] >= depth:
+            score, bound = _score_from_tt(entry[2], ply), entry[3]
+            if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                ctx.tt_hits += 1
+                return score
+
+    in_check = ctx.in_check(game, color)
+    near_mate = abs(alpha) >= MATE_SCORE - 1000 or abs(beta) >= MATE_SCORE - 1000
+    static_eval = None
+    if not in_check and not near_mate and (ctx.null_move or ctx.futility):
+        static_eval = _relative_eval(game, color, ctx)
+
+    # Null move: if passing still fails high, a real move will too
+    if (ctx.null_move and null_ok and static_eval is not None and static_eval >= beta
+            and depth >= NULL_MOVE_MIN_DEPTH and _has_pieces(game, color)):
+        state = make_null_move(game)
+        try:
+            score = -alpha_beta(game, _other(color), depth - 1 - NULL_MOVE_REDUCTION,
+                                -beta, -beta + 1, ply + 1, ctx, null_ok=False)
+        finally:
+            unmake_null_move(game, state)
+        if score >= beta:
+            ctx.null_cutoffs += 1
+            return beta
+
+    futile = (ctx.futility and static_eval is not None and depth < len(FUTILITY_MARGINS)
+              and static_eval + FUTILITY_MARGINS[depth] <= alpha)
+
+    alpha_start = alpha
+    best = -MATE_SCORE
+    best_move = None
+    legal_found = False
+    searched = 0
+
+    for move in _ordered_moves(game, color, ctx, tt_move):
+        quiet = _is_quiet(game, move)
+        make_move(game, *move)
+        if ctx.in_check(game, color):
+            unmake_move(game)
+            continue
+        legal_found = True
+
+        # Quiet, non-checking moves are the candidates for pruning/reduction
+        late = (quiet and move != tt_move and not in_check
+                and (futile or (ctx.lmr and depth >= LMR_MIN_DEPTH and searched >= LMR_FULL_MOVES))
+                and not ctx.in_check(game, _other(color)))
+
+        if late and futile:
+            unmake_move(game)
+            ctx.futility_prunes += 1
+            best = max(best, static_eval + FUTILITY_MARGINS[depth])
+            continue
+
+        try:
+            if late:
+                # Late move: shallower null-window probe first
+                ctx.reductions += 1
+                reduction = 2 if depth >= 6 and searched >= 2 * LMR_FULL_MOVES else 1
+                score = -alpha_beta(game, _other(color), depth - 1 - reduction,
+                                    -alpha - 1, -alpha, ply + 1, ctx)
+                if score > alpha:
+                    ctx.researches += 1
+                    score = -alpha_beta(game, _other(color), depth - 1, -beta, -alpha, ply + 1, ctx)
+            else:
+                score = -alpha_beta(game, _other(color), depth - 1, -beta, -alpha, ply + 1, ctx)
+        finally:
+            unmake_move(game)
+        searched += 1
+
+        if score > best:
+            best = score
+            best_move = move
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            ctx.cutoffs += 1
+            break
+
+    if not legal_found:
+        # Checkmate (prefer the shortest) or stalemate
+        return -MATE_SCORE + ply if in_check else 0
+
+    if best >= beta:
+        bound = LOWER
+    elif best > alpha_start:
+        bound = EXACT
+    else:
+        bound = UPPER
+    ctx.tt.store(key, depth, _score_to_tt(best, ply), bound, best_move)
+
+    return best
+
+
+def search_root(game, color, depth, ctx, first=None):
+    best_move, best_score = None, -MATE_SCORE - 1
+    alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+
+    for move in _ordered_moves(game, color, ctx, first):
+        make_move(game, *move)
+        if ctx.in_check(game, color):
+            unmake_move(game)
+            continue
+        try:
+            score = -alpha_beta(game, _other(color), depth - 1, -beta, -alpha, 1, ctx)
+        finally:
+            unmake_move(game)
+
+        if score > best_score:
+            best_move, best_score = move, score
+        alpha = max(alpha, score)
+
+    if best_move is None:
+        # Checkmated or stalemated at the root
+        best_score = -MATE_SCORE if ctx.in_check(game, color) else 0
+    else:
+        ctx.tt.store(game.hash_key, depth, best_score, EXACT, best_move)
+
+    return best_move, best_score
+
+
+def search(game, color, max_depth=64, node_limit=None, time_limit=None,
+           tt=None, stats=False, log_iterations=False, stop=None, on_iteration=None,
+           null_move=True, lmr=True, futility=True, cache=None):
+    """
+    Iterative deepening search. Stops at max_depth, after node_limit nodes
+    or time_limit seconds and returns the result of the last completed
+    iteration as a SearchResult(move, score, depth, nodes, elapsed, stats).
+
+    tt: transposition table to use (default: the shared module table).
+    stats: collect a SearchStats (call counts, phase times, per-iteration
+        summaries) into result.stats.
+    log_iterations: log one line per completed depth to the
+        "chess.search" logger.
+    stop: threading.Event; the search ends soon after it is set (e.g.
+        by another thread).
+    on_iteration: called with the SearchResult of every completed depth.
+    null_move, lmr, futility: switch the selective-search parts on or off
+        (e.g. "ai:search:max_depth=5,lmr=0" in a tournament).
+    cache: eval_cache.EvalCache consulted first: an entry of max_depth or
+        deeper is returned without searching, a shallower one is where
+        iterative deepening continues from. New deeper results are stored.
+        Only used with all selective-search parts on.
+    """
+    started = time.monotonic()
+    ctx = SearchContext(node_limit, time_limit, tt, SearchStats() if stats else None, stop,
+                        null_move, lmr, futility)
+    result = SearchResult(None, 0, 0, 0, 0.0)
+
+    if cache is not None and not (null_move and lmr and futility):
+        cache = None
+    cached_depth = 0
+    if cache is not None:
+        entry = cache.probe(game.hash_key)
+        if entry is not None and entry.bound == EXACT and entry.move in generate_legal_moves(game, color):
+            cached_depth = entry.depth
+            result = SearchResult(entry.move, entry.score, entry.depth, 0, 0.0)
+            if entry.depth >= max_depth or abs(entry.score) >= MATE_SCORE - max_depth:
+                return result._replace(elapsed=time.monotonic() - started, stats=ctx.stats)
+            ctx.tt.store(game.hash_key, entry.depth, entry.score, EXACT, entry.move)
+
+    for depth in range(cached_depth + 1, max_depth + 1):
+        try:
+            move, score = search_root(game, color, depth, ctx, first=result.move)
+        except SearchAborted:
+            break
+
+        elapsed = time.monotonic() - started
+        result = SearchResult(move, score, depth, ctx.nodes, elapsed)
+
+        if stats:
+            ctx.stats.iterations.append({
+                "depth": depth, "score": score, "nodes": ctx.nodes, "elapsed": elapsed,
+            })
+        if log_iterations:
+            logger.info(
+                "depth %d score %d nodes %d (%d q) nps %.0f tt %d/%d cutoffs %d time %.3fs",
+                depth, score, ctx.nodes, ctx.qnodes, ctx.nodes / elapsed if elapsed else 0,
+                ctx.tt_hits, ctx.tt_probes, ctx.cutoffs, elapsed,
+            )
+        if on_iteration is not None:
+            on_iteration(result)
+
+        if move is None or abs(score) >= MATE_SCORE - max_depth:
+            break  # no legal moves, or a forced mate was found
+
+    if cache is not None and result.move is not None and result.depth > cached_depth:
+        cache.store(game.hash_key, result.depth, result.score, EXACT, result.move)
+    if stats:
+        ctx.fill_stats()
+    return result._replace(nodes=ctx.nodes, elapsed=time.monotonic() - started, stats=ctx.stats)
+
+
+# -----------------------------
+# MULTI-PV ANALYSIS
+# -----------------------------
+AnalysisInfo = namedtuple("AnalysisInfo", "depth lines nodes elapsed")
+
+
+def search_root_multipv(game, color, depth, ctx, count, order=()):
+    """
+    Exact scores for the best `count` root moves, as a list of (score,
+    move) sorted best first. Moves in `order` (last iteration's lines) are
+    searched first; the others only need to beat the count-th best line.
+    """
+    moves = _ordered_moves(game, color, ctx)
+    for move in reversed(order):
+        if move in moves:
+            moves.remove(move)
+            moves.insert(0, move)
+
+    lines = []
+    for move in moves:
+        make_move(game, *move)
+        if ctx.in_check(game, color):
+            unmake_move(game)
+            continue
+        alpha = lines[count - 1][0] if len(lines) >= count else -MATE_SCORE - 1
+        try:
+            score = -alpha_beta(game, _other(color), depth - 1, -MATE_SCORE - 1, -alpha, 1, ctx)
+        finally:
+            unmake_move(game)
+
+        if len(lines) < count or score > alpha:
+            lines.append((score, move))
+            lines.sort(key=lambda line: line[0], reverse=True)
+            del lines[count:]
+
+    if lines:
+        ctx.tt.store(game.hash_key, depth, lines[0][0], EXACT, lines[0][1])
+    return lines
+
+
+def principal_variation(game, move, length, tt=None):
+    """move followed by the best moves stored in the transposition table."""
+    tt = tt if tt is not None else transposition_table
+    pv = [move]
+    made = 0
+    color = game.current_turn
+    try:
+        while True:
+            make_move(game, *pv[-1])
+            made += 1
+            color = _other(color)
+            if len(pv) >= length or is_repetition(game):
+                break
+            entry = tt.probe(game.hash_key)
+            if entry is None or entry[4] is None or entry[4] not in generate_legal_moves(game, color):
+                break
+            pv.append(entry[4])
+    finally:
+        for _ in range(made):
+            unmake_move(game)
+    return pv
+
+
+def analyse(game, color, multipv=3, max_depth=64, tt=None, stop=None, on_iteration=None):
+    """
+    Iterative deepening over the top `multipv` root moves until max_depth
+    or until stop is set. After every depth on_iteration is called with
+    an AnalysisInfo(depth, lines, nodes, elapsed), where lines are
+    (score, pv) pairs with scores from color's point of view.
+    """
+    started = time.monotonic()
+    ctx = SearchContext(None, None, tt, None, stop)
+    order = []
+    info = AnalysisInfo(0, [], 0, 0.0)
+
+    for depth in range(1, max_depth + 1):
+        try:
+            lines = search_root_multipv(game, color, depth, ctx, multipv, order)
+        except SearchAborted:
+            break
+
+        order = [move for _, move in lines]
+        info = AnalysisInfo(
+            depth,
+            [(score, principal_variation(game, move, depth, ctx.tt)) for score, move in lines],
+            ctx.nodes,
+            time.monotonic() - started,
+        )
+        if on_iteration is not None:
+            on_iteration(info)
+        if not lines:
+            break  # no legal moves
+
+    return info
+
+
 def choose_best_move(game, color):
     """
     Very basic AI:
     - Try all legal moves
-    - Pick the one with best evaluation
+    - Pick the one with best evaluation, less what the moved piece
+      loses in the exchange on its new square (SEE)
     """
     best_score = None
     best_moves = []
@@ -72,81 +732,14 @@ def choose_best_move(game, color):
     for move in moves:
         sr, sc, tr, tc = move
 
-        # Save state
-        board_copy = [row.copy() for row in game.board]
-        ep_copy = game.en_passant_target
-        castling_state = (
-            game.white_king_moved,
-            game.black_king_moved,
-            game.white_rook_moved.copy(),
-            game.black_rook_moved.copy()
-        )
-
-        """
-        Executes a move from (sr, sc) to (tr, tc) on the game.board.
-        Handles normal moves, en passant, and castling.
-        """
-        piece = game.board[sr][sc]
-        target = game.board[tr][tc]
-
-        # Normal move
-        game.board[tr][tc] = piece
-        game.board[sr][sc] = "."
-
-        # Castling
-        if piece.lower() == "k" and abs(tc - sc) == 2:
-            row = sr
-            if tc == 6:  # King-side
-                game.board[row][5] = game.board[row][7]
-                game.board[row][7] = "."
-            elif tc == 2:  # Queen-side
-                game.board[row][3] = game.board[row][0]
-                game.board[row][0] = "."
-
-        # En passant
-        if piece.lower() == "p" and game.en_passant_target == (tr, tc) and target == ".":
-            if piece.isupper():
-                game.board[tr + 1][tc] = "."
-            else:
-                game.board[tr - 1][tc] = "."
-
-        # Update castling flags
-        if piece == "K":
-            game.white_king_moved = True
-        elif piece == "k":
-            game.black_king_moved = True
-
-        if piece == "R" and sr == 7 and sc == 0:
-            game.white_rook_moved["left"] = True
-        elif piece == "R" and sr == 7 and sc == 7:
-            game.white_rook_moved["right"] = True
-        elif piece == "r" and sr == 0 and sc == 0:
-            game.black_rook_moved["left"] = True
-        elif piece == "r" and sr == 0 and sc == 7:
-            game.black_rook_moved["right"] = True
-
-        # Update en passant target
-        game.en_passant_target = None
-        if piece.lower() == "p" and abs(tr - sr) == 2:
-            game.en_passant_target = ((tr + sr) // 2, tc)
-
-            
-
-            
+        make_move(game, sr, sc, tr, tc)
 
         score = evaluate_board(game)
         if color == "black":
             score = -score
+        score -= hanging_value(game.board, tr, tc)
 
-        # Restore state
-        game.board = [row.copy() for row in board_copy]
-        game.en_passant_target = ep_copy
-        (
-            game.white_king_moved,
-            game.black_king_moved,
-            game.white_rook_moved,
-            game.black_rook_moved
-        ) = castling_state
+        unmake_move(game)
 
         if best_score is None or score > best_score:
             best_score = score
@@ -160,20 +753,166 @@ def choose_best_move(game, color):
     return random.choice(best_moves)
 
 
+# ===============================
+# BACKGROUND SEARCH & PONDERING
+# ===============================
+# In PVC mode the computer searches in a background thread (the UI polls
+# for the result), and after its move it keeps searching the position
+# after the reply it expects from the player. If the player makes that
+# move (a ponder hit) the running search simply continues and only gets
+# what is left of its time budget; on a miss it is stopped and a new
+# search starts with the transposition table already warmed by it.
+
+COMPUTER_DEPTH = 5
+COMPUTER_TIME = 1.0   # seconds per move, pondering included
+POLL_MS = 15
+
+
+class BackgroundSearch:
+    """search() on a private copy of game, in a daemon thread."""
+
+    def __init__(self, game, color, **limits):
+        self.key = game.hash_key
+        self.color = color
+        self.stop_event = threading.Event()
+        self.result = None
+        self.started_at = time.monotonic()
+        self._timer = None
+        self._thread = threading.Thread(
+            target=self._run, args=(game.copy(), limits), name="chess-search", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, game, limits):
+        self.result = search(game, self.color, stop=self.stop_event, **limits)
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+    def stop(self):
+        """Ask the search to end; the last completed depth is kept."""
+        self.stop_event.set()
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def stop_after(self, seconds):
+        if seconds <= 0:
+            self.stop()
+            return
+        self._timer = threading.Timer(seconds, self.stop_event.set)
+        self._timer.daemon = True
+        self._timer.start()
+
+
+def stop_computer(game):
+    """Cancel the computer's search and pondering (undo, redo, restart)."""
+    for attr in ("engine_search", "ponder"):
+        background = getattr(game, attr)
+        if background is not None:
+            background.stop()
+            setattr(game, attr, None)
+
+
 def computer_move(game):
+    """
+    Start the computer's move. The search runs in the background and the
+    move is played from the Tk loop when it is ready.
+
+    Set CHESS_PROFILE=cprofile or CHESS_PROFILE=sample to search in the
+    main thread under a profiler instead (see profiling.py).
+    """
+    if profile_mode():
+        return profile_call(_play_computer_move, game)
+
+    color = game.current_turn
+    if is_checkmate(game, color):
+        return
+
+    ponder, game.ponder = game.ponder, None
+    if ponder is not None and ponder.key == game.hash_key and ponder.color == color:
+        # Ponder hit: keep searching, within what is left of the budget
+        ponder.stop_after(COMPUTER_TIME - ponder.elapsed())
+        thinking = ponder
+    else:
+        if ponder is not None:
+            ponder.stop()
+        thinking = BackgroundSearch(game, color, max_depth=COMPUTER_DEPTH, time_limit=COMPUTER_TIME)
+
+    game.engine_search = thinking
+    _wait_for_move(game, thinking)
+
+
+def _wait_for_move(game, thinking):
+    if game.engine_search is not thinking:
+        return  # cancelled
+    if thinking.running():
+        game.root.after(POLL_MS, lambda: _wait_for_move(game, thinking))
+        return
+
+    game.engine_search = None
+    if thinking.key != game.hash_key:
+        # The player picked a different promotion piece meanwhile
+        computer_move(game)
+        return
+
+    move = thinking.result.move if thinking.result else None
+    if move is None:
+        move = choose_best_move(game, game.current_turn)
+        if move is None:
+            return
+
+    if _apply_computer_move(game, move):
+        _start_pondering(game)
+
+
+def _start_pondering(game):
+    """Search the position after the player's expected reply."""
+    entry = transposition_table.probe(game.hash_key)
+    expected = entry[4] if entry is not None else None
+    if expected is None or expected not in generate_legal_moves(game, game.current_turn):
+        return
+
+    position = game.copy()
+    make_move(position, *expected)
+    position.current_turn = _other(game.current_turn)
+    game.ponder = BackgroundSearch(position, position.current_turn, max_depth=COMPUTER_DEPTH)
+
+
+def _play_computer_move(game):
     color = game.current_turn
 
     if is_checkmate(game, color):
         return
 
-    move = choose_best_move(game, color)
+    move = search(game, color, max_depth=COMPUTER_DEPTH, time_limit=COMPUTER_TIME).move
     if not move:
         return
 
+    _apply_computer_move(game, move)
+
+
+def _apply_computer_move(game, move):
+    color = game.current_turn
+
     sr, sc, tr, tc = move
     make_move(game, sr, sc, tr, tc)
 
     game.current_turn = "black" if color == "white" else "white"
     game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
-
-    redraw(game, 8, 80, 40, game.pieces)
+    new_move(game)
+    record_position(game)
+
+    animate_move(game, move)
+
+    # Same end-of-game checks as after the player's move; False if it's over
+    if is_checkmate(game, game.current_turn):
+        show_game_over(game, color)
+        return False
+    reason = draw_reason(game)
+    if reason:
+        show_draw(game, reason)
+        return False
+    return True
@@ -0,0 +1,138 @@
+# analysis.py
+# ===============================
+# ANALYSIS MODE (SIDE PANEL)
+# ===============================
+# Press "a" to analyse the position on the board: a background thread runs
+# a multi-PV search (ai.analyse) and publishes the best lines after every
+# completed depth; the Tk loop picks up the latest lines at a fixed rate,
+# so a fast run of shallow depths never floods the UI. When a move is made
+# or undone the search restarts on the new position, reusing the shared
+# transposition table (the new position is usually already in it).
+
+import threading
+
+from ai import analyse, MATE_SCORE
+from helper import make_move, unmake_move
+from san import move_to_san
+
+MULTIPV = 3
+UPDATE_MS = 250
+MAX_PV_MOVES = 8
+
+
+class AnalysisThread:
+    """ai.analyse() on a private copy of game, publishing SAN lines."""
+
+    def __init__(self, game):
+        self.key = game.hash_key
+        self.stop_event = threading.Event()
+        self.info = None   # latest AnalysisInfo, lines as (white score, SAN text)
+        self._thread = threading.Thread(
+            target=self._run, args=(game.copy(),), name="chess-analysis", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, game):
+        color = game.current_turn
+
+        def publish(info):
+            lines = [
+                (score if color == "white" else -score, _san_line(game, pv[:MAX_PV_MOVES]))
+                for score, pv in info.lines
+            ]
+            self.info = info._replace(lines=lines)
+
+        analyse(game, color, MULTIPV, stop=self.stop_event, on_iteration=publish)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def _san_line(game, pv):
+    """PV moves as SAN with move numbers, e.g. "12. e4 e5 13. Nf3"."""
+    turn, number = game.current_turn, game.move_number
+    parts = []
+    made = 0
+    try:
+        for move in pv:
+            if game.current_turn == "white":
+                parts.append(f"{number}.")
+            elif not parts:
+                parts.append(f"{number}...")
+            parts.append(move_to_san(game, move))
+            make_move(game, *move)
+            made += 1
+            if game.current_turn == "black":
+                number += 1
+            game.current_turn = "black" if game.current_turn == "white" else "white"
+    finally:
+        for _ in range(made):
+            unmake_move(game)
+        game.current_turn = turn
+    return " ".join(parts)
+
+
+def format_score(score):
+    """White's point of view: "+1.25", "-3.00", "#2" (white mates), "#-1"."""
+    if abs(score) >= MATE_SCORE - 1000:
+        moves = (MATE_SCORE - abs(score) + 1) // 2
+        return f"#{moves}" if score > 0 else f"#-{moves}"
+    return f"{score / 100:+.2f}"
+
+
+# -----------------------------
+# PANEL
+# -----------------------------
+def _show(game, text):
+    game.analysis_text.config(state="normal")
+    game.analysis_text.delete("1.0", "end")
+    game.analysis_text.insert("end", text)
+    game.analysis_text.config(state="disabled")
+
+
+def _render(game, info):
+    if info is None:
+        _show(game, "thinking...")
+        return
+    if not info.lines:
+        _show(game, "no legal moves")
+        return
+    rows = [f"depth {info.depth}  {info.nodes} nodes  {info.elapsed:.1f}s"]
+    rows += [f"{format_score(score):>6}  {line}" for score, line in info.lines]
+    _show(game, "\n".join(rows))
+
+
+def _refresh(game, thread, shown=None):
+    """Throttled UI update; also notices moves made outside events.py."""
+    if game.analysis is not thread:
+        return  # turned off or restarted
+
+    if thread.key != game.hash_key:
+        restart_analysis(game)
+        return
+
+    info = thread.info
+    if info is not shown:
+        _render(game, info)
+    game.root.after(UPDATE_MS, lambda: _refresh(game, thread, info))
+
+
+def restart_analysis(game):
+    """Analyse the current position (called after every move / undo)."""
+    if game.analysis is None:
+        return
+    game.analysis.stop()
+    game.analysis = AnalysisThread(game)
+    _render(game, None)
+    _refresh(game, game.analysis)
+
+
+def toggle_analysis(game):
+    if game.analysis is None:
+        game.analysis = AnalysisThread(game)
+        _render(game, None)
+        _refresh(game, game.analysis)
+    else:
+        game.analysis.stop()
+        game.analysis = None
+        _show(game, "")
@@ -0,0 +1,247 @@
+# analyze_games.py
+# ===============================
+# BATCH GAME ANALYSIS
+# ===============================
+# Streams games from PGN files, fans every position out to a pool of
+# engine processes with a fixed depth/node/time budget and appends one
+# annotated game per line to a JSON-lines file as soon as all of its
+# positions are done.
+#
+# The output file doubles as the checkpoint: on restart, games already in
+# it are skipped (a torn last line from a crash is ignored), so at most the
+# games that were in flight are re-analysed.
+#
+# A position whose budget ran out before depth 1 finished is written with
+# "score": null, and the moves next to it get no loss / blunder verdict.
+#
+# With --cache the workers share a persistent search cache (eval_cache.py):
+# positions searched in an earlier run, or in another game of this one,
+# are answered from it when the cached depth reaches --depth.
+#
+#   python analyze_games.py archive.pgn annotated.jsonl --nodes 20000 --workers 8
+#   python analyze_games.py archive.pgn annotated.jsonl --depth 5 --cache cache.sqlite
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ai import search
+from eval_cache import EvalCache
+from fen import get_fen
+from position import Position
+from pgn import read_games, replay_game
+from san import move_to_san
+
+BLUNDER_THRESHOLD = 200    # centipawns lost compared with the engine's best move
+SCORE_CAP = 5000           # mate scores are clamped to this for move losses
+
+_caches = {}               # per worker process: cache path -> EvalCache
+
+
+# -----------------------------
+# WORKER
+# -----------------------------
+def analyse_position(job):
+    """
+    Search one position; scores are from the side to move's point of view,
+    None if not even depth 1 was completed.
+    """
+    key, fen, depth, nodes, seconds, cache_path = job
+    started = time.perf_counter()
+
+    cache = None
+    if cache_path is not None:
+        cache = _caches.get(cache_path)
+        if cache is None:
+            cache = _caches[cache_path] = EvalCache(cache_path)
+
+    game = Position(fen)
+    result = search(game, game.current_turn, max_depth=depth, node_limit=nodes, time_limit=seconds,
+                    cache=cache)
+    best = move_to_san(game, result.move) if result.move else None
+
+    return key, {
+        "score": result.score if result.depth else None,
+        "best": best,
+        "depth": result.depth,
+        "nodes": result.nodes,
+    }, os.getpid(), time.perf_counter() - started
+
+
+# -----------------------------
+# PIPELINE
+# -----------------------------
+def _positions(pgn_game):
+    """FEN before every move, the move's SAN, and the final position."""
+    game = Position()
+    fens = [get_fen(game) for _ in replay_game(pgn_game, game)]
+    fens.append(get_fen(game))
+    return fens, list(pgn_game.moves)
+
+
+def _clamp(score):
+    return max(-SCORE_CAP, min(SCORE_CAP, score))
+
+
+def annotate(index, pgn_game, sans, evals):
+    """
+    Build the output record. The loss of a move is the best score before it
+    minus the score the mover is left with after it (None when either
+    position is unanalysed).
+    """
+    moves = []
+    for ply, san in enumerate(sans):
+        before, after = evals[ply], evals[ply + 1]
+        if before["score"] is None or after["score"] is None:
+            loss = None
+        else:
+            loss = _clamp(before["score"]) + _clamp(after["score"])
+        moves.append({
+            "ply": ply + 1,
+            "san": san,
+            "eval": before["score"],
+            "best": before["best"],
+            "loss": loss,
+            "blunder": loss is not None and loss >= BLUNDER_THRESHOLD,
+        })
+
+    return {
+        "index": index,
+        "headers": pgn_game.headers,
+        "result": pgn_game.result,
+        "moves": moves,
+        "final_eval": evals[-1]["score"],
+    }
+
+
+def load_checkpoint(path):
+    """Indices of games already written to the output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["index"])
+            except (ValueError, KeyError):
+                continue  # torn line from an interrupted write
+    return done
+
+
+def _write(out, record):
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+
+def run(pgn_paths, out_path, depth=64, nodes=None, seconds=None, workers=None,
+        max_in_flight=None, report_every=10.0, cache_path=None):
+    """
+    Analyse every game of pgn_paths into out_path. Returns a stats dict with
+    throughput and per-worker utilisation.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    done = load_checkpoint(out_path)
+    if cache_path is not None:
+        EvalCache(cache_path).close()   # create the schema once, before the workers race
+
+    games = {}          # index -> [pgn_game, sans, evals, remaining]
+    busy = {}           # worker pid -> seconds spent searching
+    positions = total_nodes = finished = skipped = 0
+    started = last_report = time.perf_counter()
+
+    def jobs():
+        nonlocal skipped
+        index = -1
+        for path in pgn_paths:
+            for pgn_game in read_games(path):
+                index += 1
+                if index in done:
+                    continue
+                try:
+                    fens, sans = _positions(pgn_game)
+                except ValueError:
+                    skipped += 1
+                    continue
+                games[index] = [pgn_game, sans, [None] * len(fens), len(fens)]
+                for ply, fen in enumerate(fens):
+                    yield (index, ply), fen, depth, nodes, seconds, cache_path
+
+    with open(out_path, "a", encoding="utf-8") as out, ProcessPoolExecutor(workers) as pool:
+        source = jobs()
+        pending = set()
+
+        while True:
+            # Keep a bounded number of positions in flight (bounded memory)
+            for job in source:
+                pending.add(pool.submit(analyse_position, job))
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                break
+
+            completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                (index, ply), info, pid, elapsed = future.result()
+                busy[pid] = busy.get(pid, 0.0) + elapsed
+                positions += 1
+                total_nodes += info["nodes"]
+
+                entry = games[index]
+                entry[2][ply] = info
+                entry[3] -= 1
+                if entry[3] == 0:
+                    _write(out, annotate(index, entry[0], entry[1], entry[2]))
+                    del games[index]
+                    finished += 1
+
+            now = time.perf_counter()
+            if report_every and now - last_report >= report_every:
+                last_report = now
+                wall = now - started
+                print(f"{finished} games, {positions} positions, "
+                      f"{positions / wall:.1f} positions/s, {total_nodes / wall:.0f} nodes/s")
+
+    wall = time.perf_counter() - started
+    return {
+        "games": finished,
+        "skipped": skipped,
+        "positions": positions,
+        "nodes": total_nodes,
+        "wall_seconds": wall,
+        "positions_per_second": positions / wall if wall else 0.0,
+        "utilisation": {pid: t / wall for pid, t in busy.items()} if wall else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate PGN games with engine evaluations")
+    parser.add_argument("pgn", nargs="+", help="input PGN files")
+    parser.add_argument("out", help="output JSON-lines file (also the checkpoint)")
+    parser.add_argument("--depth", type=int, help="maximum search depth (default: 64)")
+    parser.add_argument("--nodes", type=int, help="node budget per position")
+    parser.add_argument("--time", type=float, help="time budget per position (seconds)")
+    parser.add_argument("--workers", type=int, help="engine processes (default: all cores)")
+    parser.add_argument("--cache", help="persistent search cache file (SQLite, shared by the workers)")
+    args = parser.parse_args()
+
+    if args.nodes is None and args.time is None and args.depth is None:
+        parser.error("give at least one of --depth, --nodes or --time")
+    if args.depth is None:
+        args.depth = 64
+
+    stats = run(args.pgn, args.out, args.depth, args.nodes, args.time, args.workers,
+                cache_path=args.cache)
+
+    print(f"\n{stats['games']} games ({stats['skipped']} skipped), {stats['positions']} positions "
+          f"in {stats['wall_seconds']:.1f} s - {stats['positions_per_second']:.1f} positions/s")
+    for pid, share in sorted(stats["utilisation"].items()):
+        print(f"  worker {pid}: {share:.0%} busy")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+# batch_moves.py
+# ===============================
+# BATCHED NUMPY MOVE GENERATION
+# ===============================
+# Move generation for many positions at once, on the array layout of
+# packed.py: boards are (N, 64) int8 piece codes (history.PIECE_CODES, a8 =
+# 0 ... h1 = 63) with per-position flags (bit 0 = black to move, bits 1-4
+# castling KQkq) and en passant file + 1. packed.decode() output can be fed
+# in directly.
+#
+# Every board gets a 65th, off-board square (OFF) that reads as a blocker
+# for either side. Precomputed tables give for each square its knight /
+# king / pawn-attacker squares and, per direction, the ray of squares up to
+# the edge followed by OFF, so a blocker test is one gather plus an argmax
+# for the first non-empty square along every ray of every piece at once.
+#
+# The moves are the ones helper.generate_moves / generate_legal_moves
+# produce: pawns promote to one move (a queen), castling follows
+# is_legal_move, and a move is legal if the mover's king isn't attacked
+# afterwards (no king = never in check). One king per side is assumed.
+#
+#   python batch_moves.py verify --positions 5000     # against helper.py
+#   python batch_moves.py bench --positions 20000
+#   python batch_moves.py stats games.cpos --limit 1000000
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from helper import (
+    KNIGHT_STEPS, KING_STEPS, QUEEN_DIRS,
+    generate_moves, generate_legal_moves, is_square_attacked, king_in_check, make_move,
+)
+from packed import board_array, decode, game_fields, open_dataset
+from position import Position
+
+OFF = 64            # index of the off-board square added to every board
+OFF_CODE = 13       # what it holds: neither empty nor a piece of either side
+CHUNK = 4096        # positions per step in batch_stats (bounds the temporaries)
+
+BLACK_TO_MOVE = 1
+CASTLE_BITS = {"white": (2, 4), "black": (8, 16)}     # (king side, queen side)
+
+
+# -----------------------------
+# TABLES
+# -----------------------------
+def _step_table(steps):
+    """(64, len(steps)) target squares of each step from each square, OFF if off the board."""
+    table = np.full((64, len(steps)), OFF, dtype=np.intp)
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        for i, (dr, dc) in enumerate(steps):
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                table[sq, i] = (r + dr) * 8 + c + dc
+    return table
+
+
+def _ray_table():
+    """(64, 8, 8): per square and QUEEN_DIRS direction the ray to the edge, then OFF."""
+    table = np.full((64, 8, 8), OFF, dtype=np.intp)
+    for sq in range(64):
+        for d, (dr, dc) in enumerate(QUEEN_DIRS):
+            r, c = divmod(sq, 8)
+            k = 0
+            while 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                r += dr
+                c += dc
+                table[sq, d, k] = r * 8 + c
+                k += 1
+    return table
+
+
+KNIGHT_TABLE = _step_table(KNIGHT_STEPS)
+KING_TABLE = _step_table(KING_STEPS)
+RAY_TABLE = _ray_table()          # directions 0-3 straight, 4-7 diagonal
+RAY_INDEX = np.arange(8)
+
+# Squares a pawn of the colour attacks a square from / attacks from a square
+PAWN_ATTACKERS = {
+    "white": _step_table(((1, -1), (1, 1))),
+    "black": _step_table(((-1, -1), (-1, 1))),
+}
+PAWN_TARGETS = {"white": PAWN_ATTACKERS["black"], "black": PAWN_ATTACKERS["white"]}
+
+# ALIGNED[a, b]: b is on a straight or diagonal line from a
+ALIGNED = np.zeros((64, 65), dtype=bool)
+ALIGNED[np.arange(64)[:, None, None], RAY_TABLE] = True
+ALIGNED = ALIGNED[:, :64]
+
+
+class Side:
+    """Piece codes and geometry of one colour."""
+
+    def __init__(self, color):
+        white = color == "white"
+        self.color = color
+        self.enemy = "black" if white else "white"
+        o = 0 if white else 6
+        self.pawn, self.knight, self.bishop, self.rook, self.queen, self.king = range(1 + o, 7 + o)
+        self.enemy_codes = (7, 12) if white else (1, 6)
+        self.push = -8 if white else 8
+        self.start_row = 6 if white else 1
+        self.ep_row = 2 if white else 5
+        self.home = 56 if white else 0         # a1 / a8
+        self.castle_bits = CASTLE_BITS[color]
+
+    def capturable(self, codes):
+        low, high = self.enemy_codes
+        return (codes >= low) & (codes <= high)
+
+    def open(self, codes):
+        """Empty or an enemy piece (off the board is neither)."""
+        return (codes == 0) | self.capturable(codes)
+
+
+SIDES = {"white": Side("white"), "black": Side("black")}
+
+
+# -----------------------------
+# ATTACKS
+# -----------------------------
+def _extend(boards):
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 64)
+    b = np.empty((len(boards), 65), dtype=np.int8)
+    b[:, :64] = boards
+    b[:, OFF] = OFF_CODE
+    return b
+
+
+def _first_blockers(b, rows, rays):
+    """Codes along the rays from b[rows] and the index of the first non-empty one."""
+    codes = b[rows.reshape(-1, *([1] * (rays.ndim - 1))), rays]
+    return codes, np.argmax(codes != 0, axis=-1)
+
+
+def _attacked(b, rows, squares, color):
+    """For each i, whether squares[i] of board b[rows[i]] is attacked by color."""
+    side = SIDES[color]
+    column = rows[:, None]
+    hit = (b[column, PAWN_ATTACKERS[color][squares]] == side.pawn).any(axis=1)
+    hit |= (b[column, KNIGHT_TABLE[squares]] == side.knight).any(axis=1)
+    hit |= (b[column, KING_TABLE[squares]] == side.king).any(axis=1)
+
+    codes, first = _first_blockers(b, rows, RAY_TABLE[squares])
+    blocker = np.take_along_axis(codes, first[..., None], axis=-1)[..., 0]
+    straight, diagonal = blocker[:, :4], blocker[:, 4:]
+    hit |= ((straight == side.rook) | (straight == side.queen)).any(axis=1)
+    hit |= ((diagonal == side.bishop) | (diagonal == side.queen)).any(axis=1)
+    return hit
+
+
+def _attack_map(b, color):
+    """(N, 64) bool: every square a piece of color attacks, from the pieces outward."""
+    side = SIDES[color]
+    maps = np.zeros((len(b), 65), dtype=bool)   # column OFF soaks up off-board targets
+    for code, table in ((side.pawn, PAWN_TARGETS[color]), (side.knight, KNIGHT_TABLE),
+                        (side.king, KING_TABLE)):
+        p, s = np.nonzero(b[:, :64] == code)
+        maps[p[:, None], table[s]] = True
+    for code, directions in ((side.bishop, slice(4, 8)), (side.rook, slice(0, 4)),
+                             (side.queen, slice(0, 8))):
+        p, s = np.nonzero(b[:, :64] == code)
+        rays = RAY_TABLE[s][:, directions]
+        _, first = _first_blockers(b, p, rays)
+        i, d, k = np.nonzero(RAY_INDEX <= first[..., None])
+        maps[p[i], rays[i, d, k]] = True
+    return maps[:, :64]
+
+
+def attack_maps(boards):
+    """(white, black): (N, 64) bool arrays of the squares each colour attacks."""
+    b = _extend(boards)
+    return _attack_map(b, "white"), _attack_map(b, "black")
+
+
+def _king_squares(b, side):
+    """(square, present) of side's king on every board."""
+    is_king = b[:, :64] == side.king
+    return np.argmax(is_king, axis=1), is_king.any(axis=1)
+
+
+def check_flags(boards, flags):
+    """Whether the side to move is in check, per position."""
+    b = _extend(boards)
+    black = (np.asarray(flags) & BLACK_TO_MOVE).astype(bool)
+    check = np.zeros(len(b), dtype=bool)
+    for color, rows in (("white", np.flatnonzero(~black)), ("black", np.flatnonzero(black))):
+        square, present = _king_squares(b[rows], SIDES[color])
+        check[rows] = present & _attacked(b, rows, square, SIDES[color].enemy)
+    return check
+
+
+# -----------------------------
+# MOVES
+# -----------------------------
+def _step_moves(b, code, table, side):
+    p, s = np.nonzero(b[:, :64] == code)
+    targets = table[s]
+    i, j = np.nonzero(side.open(b[p[:, None], targets]))
+    return p[i], s[i], targets[i, j]
+
+
+def _slider_moves(b, code, directions, side):
+    p, s = np.nonzero(b[:, :64] == code)
+    rays = RAY_TABLE[s][:, directions]
+    codes, first = _first_blockers(b, p, rays)
+    blocker = np.take_along_axis(codes, first[..., None], axis=-1)
+    ok = (RAY_INDEX < first[..., None]) | ((RAY_INDEX == first[..., None]) & side.capturable(blocker))
+    i, d, k = np.nonzero(ok)
+    return p[i], s[i], rays[i, d, k]
+
+
+def _pawn_moves(b, ep, side):
+    p, s = np.nonzero(b[:, :64] == side.pawn)
+    row, col = s // 8, s % 8
+    inside = (row + side.push // 8 >= 0) & (row + side.push // 8 < 8)
+    p, s, row, col = p[inside], s[inside], row[inside], col[inside]
+    ahead = s + side.push
+    moves = []
+
+    single = b[p, ahead] == 0
+    moves.append((p[single], s[single], ahead[single]))
+    double = single & (row == side.start_row)
+    double &= b[p, np.where(double, ahead + side.push, OFF)] == 0
+    moves.append((p[double], s[double], ahead[double] + side.push))
+
+    ep_square = np.where(ep[p] > 0, side.ep_row * 8 + ep[p].astype(np.intp) - 1, -1)
+    for dc in (-1, 1):
+        on_board = (col + dc >= 0) & (col + dc < 8)
+        target = np.where(on_board, ahead + dc, OFF)
+        codes = b[p, target]
+        ok = on_board & (side.capturable(codes) | ((codes == 0) & (target == ep_square)))
+        moves.append((p[ok], s[ok], target[ok]))
+    return moves
+
+
+def _castling_moves(b, flags, side):
+    moves = []
+    king_side, queen_side = side.castle_bits
+    e = side.home + 4
+    at_home = b[:, e] == side.king
+    for bit, rook, empty, safe, to in (
+        (king_side, side.home + 7, (5, 6), (4, 5, 6), e + 2),
+        (queen_side, side.home, (1, 2, 3), (4, 3, 2), e - 2),
+    ):
+        ok = at_home & ((flags & bit) != 0) & (b[:, rook] == side.rook)
+        for c in empty:
+            ok &= b[:, side.home + c] == 0
+        p = np.flatnonzero(ok)
+        for c in safe:
+            p = p[~_attacked(b, p, np.full(len(p), side.home + c), side.enemy)]
+        moves.append((p, np.full(len(p), e), np.full(len(p), to)))
+    return moves
+
+
+def _pseudo_moves(b, flags, ep, side):
+    """(position, from, to) of side's pseudo-legal moves on every board of b."""
+    parts = _pawn_moves(b, ep, side)
+    parts.append(_step_moves(b, side.knight, KNIGHT_TABLE, side))
+    parts.append(_slider_moves(b, side.bishop, slice(4, 8), side))
+    parts.append(_slider_moves(b, side.rook, slice(0, 4), side))
+    parts.append(_slider_moves(b, side.queen, slice(0, 8), side))
+    parts.append(_step_moves(b, side.king, KING_TABLE, side))
+    parts += _castling_moves(b, flags, side)
+    return tuple(np.concatenate([part[k] for part in parts]).astype(np.intp) for k in range(3))
+
+
+def _legal(b, rows, p, sr, to, side):
+    """
+    Whether each move leaves side's king unattacked (as
+    helper.leaves_king_in_check). rows are the positions side is to move
+    in. Only king moves, en passant, moves from a line through the king
+    and moves out of check are played out and tested; nothing else can
+    expose the king.
+    """
+    king, present = _king_squares(b[rows], side)
+    in_check = present & _attacked(b, rows, king, side.enemy)
+    king_at = np.zeros(len(b), dtype=np.intp)
+    king_at[rows] = king
+    has_king = np.zeros(len(b), dtype=bool)
+    has_king[rows] = present
+    check = np.zeros(len(b), dtype=bool)
+    check[rows] = in_check
+
+    piece = b[p, sr]
+    captured = b[p, to]
+    ep = (piece == side.pawn) & (captured == 0) & (sr % 8 != to % 8)
+    test = has_king[p] & (check[p] | (piece == side.king) | ep | ALIGNED[king_at[p], sr])
+    legal = np.ones(len(p), dtype=bool)
+
+    t = np.flatnonzero(test)
+    after = b[p[t]]
+    moved = np.arange(len(t))
+    after[moved, to[t]] = piece[t]
+    after[moved, sr[t]] = 0
+    # En passant: the captured pawn is beside the mover, not on the target
+    e = ep[t]
+    after[moved[e], (sr[t][e] // 8) * 8 + to[t][e] % 8] = 0
+
+    king_after = np.where(piece[t] == side.king, to[t], king_at[p[t]])
+    legal[t] = ~_attacked(after, moved, king_after, side.enemy)
+    return legal
+
+
+def generate(boards, flags, ep, legal=True):
+    """
+    Moves of the side to move in every position, as arrays (position index,
+    from square, to square) ordered by position. Squares are a8 = 0 ... h1 = 63.
+    """
+    b = _extend(boards)
+    flags = np.asarray(flags).astype(np.intp)
+    ep = np.asarray(ep).astype(np.intp)
+    black = (flags & BLACK_TO_MOVE).astype(bool)
+
+    parts = []
+    for color, rows in (("white", np.flatnonzero(~black)), ("black", np.flatnonzero(black))):
+        if not len(rows):
+            continue
+        side = SIDES[color]
+        p, sr, to = _pseudo_moves(b[rows], flags[rows], ep[rows], side)
+        p = rows[p]
+        if legal:
+            keep = _legal(b, rows, p, sr, to, side)
+            p, sr, to = p[keep], sr[keep], to[keep]
+        parts.append((p, sr, to))
+
+    p, sr, to = (np.concatenate([part[k] for part in parts]) if parts else np.zeros(0, np.intp)
+                 for k in range(3))
+    order = np.argsort(p, kind="stable")
+    return p[order], sr[order], to[order]
+
+
+def move_counts(boards, flags, ep, legal=True):
+    """Number of (legal or pseudo-legal) moves per position."""
+    p, _, _ = generate(boards, flags, ep, legal)
+    return np.bincount(p, minlength=len(np.asarray(boards).reshape(-1, 64)))
+
+
+def _bitboards(maps):
+    """(N, 64) bool -> (N,) uint64, bit n = square n (as packed.py's occupancy)."""
+    return np.packbits(maps, axis=1, bitorder="little").view("<u8")[:, 0]
+
+
+def batch_stats(boards, flags, ep, chunk=CHUNK):
+    """
+    Per position: pseudo-legal and legal move counts, check flag and both
+    colours' attack maps as 64-bit bitboards. Works through `chunk`
+    positions at a time, so it runs over memory-mapped datasets of any size.
+    """
+    boards = np.asarray(boards).reshape(-1, 64)
+    flags = np.asarray(flags)
+    ep = np.asarray(ep)
+    n = len(boards)
+    out = {
+        "pseudo": np.zeros(n, dtype=np.int16),
+        "legal": np.zeros(n, dtype=np.int16),
+        "check": np.zeros(n, dtype=bool),
+        "white_attacks": np.zeros(n, dtype=np.uint64),
+        "black_attacks": np.zeros(n, dtype=np.uint64),
+    }
+    for start in range(0, n, chunk):
+        part = slice(start, min(start + chunk, n))
+        size = part.stop - start
+        b, f, e = boards[part], flags[part], ep[part]
+        out["pseudo"][part] = np.bincount(generate(b, f, e, legal=False)[0], minlength=size)
+        out["legal"][part] = np.bincount(generate(b, f, e)[0], minlength=size)
+        out["check"][part] = check_flags(b, f)
+        white, black = attack_maps(b)
+        out["white_attacks"][part] = _bitboards(white)
+        out["black_attacks"][part] = _bitboards(black)
+    return out
+
+
+def position_arrays(games):
+    """(boards, flags, ep) for a list of Position / Game objects."""
+    boards = np.array([board_array(game) for game in games], dtype=np.int8).reshape(-1, 64)
+    fields = np.array([game_fields(game)[:2] for game in games], dtype=np.intp).reshape(-1, 2)
+    return boards, fields[:, 0], fields[:, 1]
+
+
+# -----------------------------
+# CHECKING AGAINST helper.py
+# -----------------------------
+def random_positions(count, seed=0, max_plies=120):
+    """Positions from random games (castling, en passant, promotions and mates included)."""
+    rng = random.Random(seed)
+    positions = []
+    game = Position()
+    while len(positions) < count:
+        if not rng.randrange(max_plies) or not generate_legal_moves(game, game.current_turn):
+            game = Position()
+            continue
+        move = rng.choice(generate_legal_moves(game, game.current_turn))
+        # Favour wild positions: sometimes play a pseudo-legal move instead
+        if rng.random() < 0.05:
+            move = rng.choice(generate_moves(game, game.current_turn))
+        make_move(game, *move)
+        game.current_turn = "black" if game.current_turn == "white" else "white"
+        if sum(row.count("K") for row in game.board) != 1 or \
+                sum(row.count("k") for row in game.board) != 1:
+            game = Position()   # a king was captured
+            continue
+        positions.append(game.copy())
+    return positions
+
+
+def verify(count=2000, seed=0, verbose=True):
+    """Compare moves, check flags and attack maps with helper.py; returns the mismatches."""
+    games = random_positions(count, seed)
+    boards, flags, ep = position_arrays(games)
+    pseudo = generate(boards, flags, ep, legal=False)
+    legal = generate(boards, flags, ep)
+    check = check_flags(boards, flags)
+    white, black = attack_maps(boards)
+
+    def by_position(moves):
+        found = [set() for _ in games]
+        for p, sr, to in zip(*(m.tolist() for m in moves)):
+            found[p].add((sr // 8, sr % 8, to // 8, to % 8))
+        return found
+
+    pseudo, legal = by_position(pseudo), by_position(legal)
+    mismatches = []
+    for i, game in enumerate(games):
+        color = game.current_turn
+        problems = []
+        if pseudo[i] != set(generate_moves(game, color)):
+            problems.append("pseudo-legal moves")
+        if legal[i] != set(generate_legal_moves(game, color)):
+            problems.append("legal moves")
+        if check[i] != king_in_check(game, color):
+            problems.append("check flag")
+        for maps, by in ((white, "white"), (black, "black")):
+            expected = [is_square_attacked(game, sq // 8, sq % 8, by) for sq in range(64)]
+            if maps[i].tolist() != expected:
+                problems.append(f"{by} attack map")
+        if problems:
+            mismatches.append((i, problems))
+
+    if verbose:
+        moves = sum(len(m) for m in legal)
+        print(f"{len(games)} positions, {moves} legal moves, {int(check.sum())} in check: "
+              f"{len(mismatches)} mismatches")
+        from fen import get_fen
+        for i, problems in mismatches[:10]:
+            print(f"  {get_fen(games[i])}: {', '.join(problems)}")
+    return mismatches
+
+
+def benchmark(count=20000, seed=0):
+    games = random_positions(count, seed)
+    boards, flags, ep = position_arrays(games)
+
+    started = time.perf_counter()
+    batch_stats(boards, flags, ep)
+    batch = time.perf_counter() - started
+
+    sample = games[:min(len(games), 2000)]
+    started = time.perf_counter()
+    for game in sample:
+        generate_legal_moves(game, game.current_turn)
+    scalar = (time.perf_counter() - started) / len(sample) * len(games)
+
+    print(f"{len(games)} positions")
+    print(f"batch_stats (moves, legal, check, attack maps): {len(games) / batch:10.0f} positions/s")
+    print(f"helper.generate_legal_moves:                    {len(games) / scalar:10.0f} positions/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched NumPy move generation")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("verify", help="compare with helper.py on random positions")
+    p.add_argument("--positions", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=0)
+    p = sub.add_parser("bench", help="positions per second, batched and scalar")
+    p.add_argument("--positions", type=int, default=20000)
+    p = sub.add_parser("stats", help="move / check statistics of a packed dataset")
+    p.add_argument("dataset")
+    p.add_argument("--limit", type=int, help="only the first N positions")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        raise SystemExit(1 if verify(args.positions, args.seed) else 0)
+    if args.command == "bench":
+        benchmark(args.positions)
+        return
+
+    records = open_dataset(args.dataset)[:args.limit]
+    started = time.perf_counter()
+    legal = np.zeros(len(records), dtype=np.int16)
+    check = np.zeros(len(records), dtype=bool)
+    for start in range(0, len(records), CHUNK * 16):
+        part = slice(start, start + CHUNK * 16)
+        boards, flags, ep, _, _ = decode(records["position"][part])
+        stats = batch_stats(boards, flags, ep)
+        legal[part], check[part] = stats["legal"], stats["check"]
+    elapsed = time.perf_counter() - started
+
+    mates = int((check & (legal == 0)).sum())
+    stalemates = int((~check & (legal == 0)).sum())
+    print(f"{len(records)} positions in {elapsed:.1f} s ({len(records) / elapsed:.0f}/s)")
+    print(f"legal moves: mean {legal.mean():.1f}, max {legal.max()}")
+    print(f"in check {check.mean():.1%}, checkmates {mates}, stalemates {stalemates}")
+
+
+if __name__ == "__main__":
+    main()
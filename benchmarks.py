@@ -0,0 +1,314 @@
+# benchmarks.py
+# ===============================
+# PERFORMANCE REGRESSION SUITE
+# ===============================
+# Times the hot paths of the rules, the engine and the board drawing over
+# a fixed corpus of positions, so numbers are comparable between runs:
+#
+#   is_legal_move        every (from, to) pair of the side to move
+#   is_square_attacked   every square, by both colours
+#   has_legal_moves      both colours
+#   evaluate_board
+#   choose_best_move     the one-ply computer player
+#   search               alpha-beta at a fixed depth, fresh table each time
+#   redraw               draw.redraw on a real Tk canvas (Xvfb is started
+#                        when there is no display; skipped without either)
+#
+# Each benchmark is run --repeat times and the fastest run counts. Results
+# are written as JSON; "compare" re-runs the suite (or reads a second
+# file) and flags every benchmark that got slower than the baseline by
+# more than --threshold, exiting with status 1 if any did.
+#
+#   python benchmarks.py run --out bench_baseline.json
+#   python benchmarks.py compare bench_baseline.json --threshold 0.10
+#   python benchmarks.py compare old.json new.json
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+from ai import choose_best_move, evaluate_board, search, TranspositionTable
+from helper import is_legal_move, is_square_attacked, has_legal_moves
+from position import Position
+
+BASELINE_FILE = "bench_baseline.json"
+REPEAT = 5
+THRESHOLD = 0.10
+SEARCH_DEPTH = 3
+XVFB_DISPLAY = ":97"
+
+CORPUS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8",
+    "2r2rk1/1bqnbppp/p2ppn2/1p6/3NP3/1BN1BP2/PPPQ2PP/2KR3R w - - 0 13",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+    "8/5pk1/6p1/8/3R4/6P1/5PKP/r7 w - - 0 40",
+]
+
+
+def _corpus():
+    return [Position(fen) for fen in CORPUS]
+
+
+# -----------------------------
+# WORKLOADS (return the number of calls made)
+# -----------------------------
+def bench_is_legal_move(positions):
+    calls = 0
+    for game in positions:
+        board = game.board
+        white = game.current_turn == "white"
+        for sr in range(8):
+            for sc in range(8):
+                piece = board[sr][sc]
+                if piece == "." or piece.isupper() != white:
+                    continue
+                for tr in range(8):
+                    for tc in range(8):
+                        is_legal_move(game, piece, sr, sc, tr, tc)
+                calls += 64
+    return calls
+
+
+def bench_is_square_attacked(positions):
+    calls = 0
+    for game in positions:
+        for row in range(8):
+            for col in range(8):
+                is_square_attacked(game, row, col, "white")
+                is_square_attacked(game, row, col, "black")
+        calls += 128
+    return calls
+
+
+def bench_has_legal_moves(positions):
+    for game in positions:
+        has_legal_moves(game, "white")
+        has_legal_moves(game, "black")
+    return 2 * len(positions)
+
+
+def bench_evaluate_board(positions):
+    for _ in range(100):
+        for game in positions:
+            evaluate_board(game)
+    return 100 * len(positions)
+
+
+def bench_choose_best_move(positions):
+    for game in positions:
+        choose_best_move(game, game.current_turn)
+    return len(positions)
+
+
+def bench_search(positions):
+    for game in positions:
+        search(game, game.current_turn, max_depth=SEARCH_DEPTH, tt=TranspositionTable(12))
+    return len(positions)
+
+
+BENCHMARKS = {
+    "is_legal_move": bench_is_legal_move,
+    "is_square_attacked": bench_is_square_attacked,
+    "has_legal_moves": bench_has_legal_moves,
+    "evaluate_board": bench_evaluate_board,
+    "choose_best_move": bench_choose_best_move,
+    "search": bench_search,
+}
+
+
+# -----------------------------
+# RENDERING
+# -----------------------------
+def _start_xvfb():
+    """Start Xvfb for the redraw benchmark if there is no display; returns the process or None."""
+    if os.environ.get("DISPLAY") or not shutil.which("Xvfb"):
+        return None
+    process = subprocess.Popen(
+        ["Xvfb", XVFB_DISPLAY, "-screen", "0", "1024x768x24"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = XVFB_DISPLAY
+    return process
+
+
+def _redraw_workload():
+    """(workload, cleanup) for draw.redraw on a Tk canvas, or None if Tk can't open a display."""
+    import tkinter as tk
+    from draw import redraw
+    from game import Game
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    canvas = tk.Canvas(root, width=720, height=680)
+
+    game = Game()
+    game.root = root
+    game.canvas = canvas
+    images = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+    cwd = os.getcwd()
+    try:
+        os.chdir(os.path.dirname(images))
+        game.load_pieces()
+    except ImportError:
+        # No PIL: Tk reads the PNGs itself (unscaled, same number of items)
+        names = {"p": "pawn", "n": "knight", "b": "bishop", "r": "rook", "q": "queen", "k": "king"}
+        for piece, name in names.items():
+            for key, color in ((piece.upper(), "white"), (piece, "black")):
+                path = os.path.join(images, f"{color}-{name}.png")
+                game.pieces[key] = tk.PhotoImage(master=root, file=path)
+    finally:
+        os.chdir(cwd)
+
+    positions = _corpus()
+
+    def workload(_):
+        for position in positions:
+            game.position = position
+            redraw(game, 8, 80, 40, game.pieces)
+            root.update_idletasks()
+        return len(positions)
+
+    return workload, root.destroy
+
+
+# -----------------------------
+# RUNNING
+# -----------------------------
+def measure(workload, positions, repeat):
+    """Fastest of `repeat` runs: (calls, seconds)."""
+    best = None
+    calls = 0
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            calls = workload(positions)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return calls, best
+
+
+def run_suite(repeat=REPEAT, only=None, redraw=True, verbose=True):
+    results = {}
+    selected = [name for name in BENCHMARKS if not only or name in only]
+    for name in selected:
+        calls, seconds = measure(BENCHMARKS[name], _corpus(), repeat)
+        results[name] = {"calls": calls, "seconds": seconds, "per_second": calls / seconds}
+        if verbose:
+            print(f"{name:<20} {calls / seconds:>14.1f} calls/s")
+
+    if redraw and (not only or "redraw" in only):
+        xvfb = _start_xvfb()
+        try:
+            setup = _redraw_workload()
+            if setup is None:
+                if verbose:
+                    print(f"{'redraw':<20} {'skipped (no display)':>14}")
+            else:
+                workload, cleanup = setup
+                calls, seconds = measure(workload, None, repeat)
+                cleanup()
+                results["redraw"] = {"calls": calls, "seconds": seconds, "per_second": calls / seconds}
+                if verbose:
+                    print(f"{'redraw':<20} {calls / seconds:>14.1f} calls/s")
+        finally:
+            if xvfb is not None:
+                xvfb.terminate()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "repeat": repeat,
+            "search_depth": SEARCH_DEPTH,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    [(name, baseline/s, current/s, change, regressed)] for the benchmarks in
+    both reports; change is the relative speed difference (+ = faster).
+    """
+    rows = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        change = now["per_second"] / base["per_second"] - 1
+        rows.append((name, base["per_second"], now["per_second"], change, change < -threshold))
+    return rows
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance regression benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="run the suite and write a JSON report")
+    p.add_argument("--out", default=BASELINE_FILE)
+    p.add_argument("--repeat", type=int, default=REPEAT)
+    p.add_argument("--only", nargs="+", help="benchmark names to run")
+    p.add_argument("--no-redraw", action="store_true", help="skip the canvas benchmark")
+
+    p = sub.add_parser("compare", help="compare against a baseline report")
+    p.add_argument("baseline")
+    p.add_argument("current", nargs="?", help="second report (default: run the suite now)")
+    p.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown (0.10 = 10%%)")
+    p.add_argument("--repeat", type=int, default=REPEAT)
+    p.add_argument("--no-redraw", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_suite(args.repeat, args.only, not args.no_redraw)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"written to {args.out}")
+        return
+
+    baseline = _load(args.baseline)
+    if args.current:
+        current = _load(args.current)
+    else:
+        current = run_suite(args.repeat, list(baseline["results"]), not args.no_redraw, verbose=False)
+
+    regressions = 0
+    print(f"{'benchmark':<20} {'baseline/s':>14} {'current/s':>14} {'change':>8}")
+    for name, base, now, change, regressed in compare(baseline, current, args.threshold):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<20} {base:>14.1f} {now:>14.1f} {change:>+8.1%}{flag}")
+    if regressions:
+        print(f"\n{regressions} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nno regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
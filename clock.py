@@ -1,29 +1,98 @@
+# clock.py
+# ===============================
+# GAME CLOCK (PVP)
+# ===============================
+# Remaining time is only ever charged from time.monotonic() timestamps taken
+# when a side starts and stops thinking, so slow Tk callbacks can't make the
+# clock drift. Label updates are scheduled for the exact moment the displayed
+# value changes instead of polling every second.
+
+import math
+import time
+
+from journal import finish_journal
+
+# Below this many seconds the display switches to tenths
+LOW_TIME_THRESHOLD = 10
+
+FISCHER = "fischer"      # add the full increment after every move
+BRONSTEIN = "bronstein"  # give back the time used, at most the increment
+
+
 def format_time(seconds):
-    minutes = max(0, seconds) // 60
-    secs = max(0, seconds) % 60
-    return f"{minutes:02d}:{secs:02d}"
+    seconds = max(0.0, seconds)
+
+    if seconds <= LOW_TIME_THRESHOLD:
+        tenths = math.ceil(seconds * 10)
+        return f"00:{tenths // 10:02d}.{tenths % 10}"
+
+    whole = math.ceil(seconds)
+    return f"{whole // 60:02d}:{whole % 60:02d}"
+
+
+def _other(color):
+    return "black" if color == "white" else "white"
+
+
+def remaining_time(game, color):
+    """Seconds left for color, including the running side's current think."""
+    stored = game.white_time if color == "white" else game.black_time
+    if game.clock_running and game.clock_side == color:
+        stored -= time.monotonic() - game.clock_started_at
+    return stored
+
+
+def _set_time(game, color, seconds):
+    if color == "white":
+        game.white_time = seconds
+    else:
+        game.black_time = seconds
+
+
+def _cancel_update(game):
+    if game.clock_after_id is not None:
+        game.root.after_cancel(game.clock_after_id)
+        game.clock_after_id = None
+
+
+def _next_change(seconds):
+    """Seconds until the displayed value of `seconds` changes."""
+    if seconds <= LOW_TIME_THRESHOLD:
+        return seconds - (math.ceil(seconds * 10) - 1) / 10
+    return seconds - (math.ceil(seconds) - 1)
+
+
+def update_labels(game):
+    game.white_clock_label.config(text=f"White: {format_time(remaining_time(game, 'white'))}")
+    game.black_clock_label.config(text=f"Black: {format_time(remaining_time(game, 'black'))}")
 
 
 def tick(game):
-    if not getattr(game, "clock_running", False):
+    game.clock_after_id = None
+    if not game.clock_running:
         return
 
-    if game.current_turn == "white":
-        game.white_time -= 1
-        if game.white_time <= 0:
-            timeout(game, "black")
-            return
-    else:
-        game.black_time -= 1
-        if game.black_time <= 0:
-            timeout(game, "white")
-            return
+    side = game.clock_side
+    left = remaining_time(game, side)
+    if left <= 0:
+        game.clock_running = False
+        _set_time(game, side, 0)
+        timeout(game, _other(side))
+        update_labels(game)
+        return
 
-    # Update clocks
-    game.white_clock_label.config(text=f"White: {format_time(game.white_time)}")
-    game.black_clock_label.config(text=f"Black: {format_time(game.black_time)}")
+    update_labels(game)
 
-    game.root.after(1000, lambda: tick(game))
+    # Wake up exactly when the running clock's label changes (or flag falls)
+    delay = min(_next_change(left), left)
+    game.clock_after_id = game.root.after(max(1, math.ceil(delay * 1000)), lambda: tick(game))
+
+
+def _run(game, color):
+    game.clock_side = color
+    game.clock_started_at = time.monotonic()
+    game.clock_running = True
+    tick(game)
 
 
 def start_clock(game):
@@ -34,22 +103,55 @@ def start_clock(game):
         return
 
     if not game.clock_running:
-        game.clock_running = True
-        tick(game)
-
+        _run(game, game.current_turn)
 
 
 def stop_clock(game):
+    """Pause the clock, charging the running side for its think so far."""
+    _cancel_update(game)
+    if game.clock_running:
+        _set_time(game, game.clock_side, remaining_time(game, game.clock_side))
     game.clock_running = False
 
 
 def switch_clock(game):
-    if game.mode == "PVP":
-        start_clock(game)
+    """
+    Called after game.current_turn has made a move (before the turn flips):
+    charge the mover, apply the increment and start the opponent's clock.
+    The first move of the game starts the opponent's clock without charging.
+    """
+    if game.mode != "PVP":
+        return
+
+    mover = game.current_turn
+
+    if game.clock_running and game.clock_side == mover:
+        used = time.monotonic() - game.clock_started_at
+        stop_clock(game)
+
+        if game.increment_mode == FISCHER:
+            bonus = game.increment
+        elif game.increment_mode == BRONSTEIN:
+            bonus = min(game.increment, used)
+        else:
+            bonus = 0
+        _set_time(game, mover, remaining_time(game, mover) + bonus)
+    else:
+        stop_clock(game)
+
+    _run(game, _other(mover))
+
+
+def reset_clock(game, white_seconds, black_seconds):
+    stop_clock(game)
+    game.white_time = white_seconds
+    game.black_time = black_seconds
+    update_labels(game)
 
 
 def timeout(game, winner):
     stop_clock(game)
+    finish_journal(game)
     game.move_log.config(state="normal")
     game.move_log.insert("end", f"\nTIME OUT — {winner.upper()} WINS\n")
     game.move_log.see("end")
@@ -7,8 +7,10 @@ from helper import (
     is_white,
     is_black,
     is_legal_move,
-    king_in_check
+    king_in_check,
+    last_move
 )
+from see import hanging_value
 
 # -------------------------------
 # COLORS (UI THEME)
@@ -18,6 +20,7 @@ DARK_SQUARE = "#b58863"
 LAST_MOVE_COLOR = "#653b18"
 CHECK_COLOR = "#ff4d4d"
 LEGAL_MOVE_COLOR = "#4CAF50"
+HANGING_COLOR = "#ff9800"
 COORD_COLOR = "white"
 
 
@@ -81,26 +84,26 @@ def draw_board(game, BOARD_SIZE, SQUARE_SIZE, MARGIN):
         )
 
 
-def draw_pieces(game, pieces, SQUARE_SIZE, MARGIN):
+def draw_pieces(game, pieces, SQUARE_SIZE, MARGIN, hidden=()):
+    """hidden: squares whose piece is drawn elsewhere (frames.py animation)."""
     canvas = game.canvas
     board = game.board
 
     # -------------------------------
     # LAST MOVE HIGHLIGHT (DRAW FIRST)
     # -------------------------------
-    if game.board_history:
-        last_board = game.board_history[-1]
-        for r in range(8):
-            for c in range(8):
-                if last_board[r][c] != board[r][c]:
-                    canvas.create_rectangle(
-                        MARGIN + c * SQUARE_SIZE,
-                        r * SQUARE_SIZE,
-                        MARGIN + (c + 1) * SQUARE_SIZE,
-                        (r + 1) * SQUARE_SIZE,
-                        fill=LAST_MOVE_COLOR,
-                        outline=""
-                    )
+    move = last_move(game)
+    if move:
+        sr, sc, tr, tc = move
+        for r, c in ((sr, sc), (tr, tc)):
+            canvas.create_rectangle(
+                MARGIN + c * SQUARE_SIZE,
+                r * SQUARE_SIZE,
+                MARGIN + (c + 1) * SQUARE_SIZE,
+                (r + 1) * SQUARE_SIZE,
+                fill=LAST_MOVE_COLOR,
+                outline=""
+            )
 
     # -------------------------------
     # DRAW PIECES (ON TOP)
@@ -108,7 +111,7 @@ def draw_pieces(game, pieces, SQUARE_SIZE, MARGIN):
     for r in range(8):
         for c in range(8):
             piece = board[r][c]
-            if piece == ".":
+            if piece == "." or (r, c) in hidden:
                 continue
 
             # King in check highlight
@@ -123,6 +126,18 @@ def draw_pieces(game, pieces, SQUARE_SIZE, MARGIN):
                     width=4
                 )
 
+            # Hanging piece: the opponent wins material by taking it
+            if game.show_hanging and piece not in "Kk" and hanging_value(board, r, c) > 0:
+                canvas.create_rectangle(
+                    MARGIN + c * SQUARE_SIZE + 3,
+                    r * SQUARE_SIZE + 3,
+                    MARGIN + (c + 1) * SQUARE_SIZE - 3,
+                    (r + 1) * SQUARE_SIZE - 3,
+                    outline=HANGING_COLOR,
+                    width=3,
+                    dash=(6, 4)
+                )
+
             canvas.create_image(
                 MARGIN + c * SQUARE_SIZE + SQUARE_SIZE // 2,
                 r * SQUARE_SIZE + SQUARE_SIZE // 2,
@@ -157,7 +172,7 @@ def show_legal_moves(game, sr, sc, SQUARE_SIZE, MARGIN):
                 )
 
 
-def redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, pieces):
+def redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, pieces, hidden=()):
     game.canvas.delete("all")
     draw_board(game, BOARD_SIZE, SQUARE_SIZE, MARGIN)
-    draw_pieces(game, pieces, SQUARE_SIZE, MARGIN)
+    draw_pieces(game, pieces, SQUARE_SIZE, MARGIN, hidden)
@@ -0,0 +1,112 @@
+# epd_runner.py
+# ===============================
+# EPD TEST-SUITE RUNNER
+# ===============================
+# Solves every position of a local EPD suite ("bm"/"am" operations) under a
+# per-position node and/or time limit on a pool of worker processes, then
+# reports the solve rate and nodes/second - a repeatable strength-per-CPU
+# benchmark for the engine.
+#
+#   python epd_runner.py suites/wac.epd --nodes 20000 --workers 4
+
+import argparse
+import multiprocessing
+import time
+
+from ai import search
+from fen import set_epd, square_name
+from position import Position
+from san import parse_move
+
+
+def solve_position(job):
+    """Worker: search one EPD line. Returns a result dict."""
+    index, line, depth, nodes, seconds = job
+    game = Position()
+    ops = set_epd(game, line)
+
+    best = {parse_move(game, m)[0] for m in ops.get("bm", [])}
+    avoid = {parse_move(game, m)[0] for m in ops.get("am", [])}
+
+    result = search(game, game.current_turn, max_depth=depth, node_limit=nodes, time_limit=seconds)
+
+    if best:
+        solved = result.move in best
+    else:
+        solved = result.move is not None and result.move not in avoid
+
+    move = result.move
+    return {
+        "index": index,
+        "id": (ops.get("id") or [f"#{index + 1}"])[0],
+        "move": square_name(*move[:2]) + square_name(*move[2:]) if move else "-",
+        "solved": solved,
+        "depth": result.depth,
+        "nodes": result.nodes,
+        "elapsed": result.elapsed,
+    }
+
+
+def read_suite(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def run_suite(lines, depth=64, nodes=None, seconds=None, workers=None, verbose=True):
+    """Run a suite and return (results sorted by index, wall-clock seconds)."""
+    jobs = [(i, line, depth, nodes, seconds) for i, line in enumerate(lines)]
+    started = time.monotonic()
+    results = []
+
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(solve_position, jobs):
+            results.append(result)
+            if verbose:
+                mark = "ok " if result["solved"] else "-- "
+                print(f"{mark}{result['id']:<16} {result['move']:<6} "
+                      f"depth {result['depth']:>2}  {result['nodes']:>9} nodes")
+
+    results.sort(key=lambda r: r["index"])
+    return results, time.monotonic() - started
+
+
+def summarize(results, wall):
+    solved = sum(r["solved"] for r in results)
+    total_nodes = sum(r["nodes"] for r in results)
+    cpu = sum(r["elapsed"] for r in results)
+    return {
+        "positions": len(results),
+        "solved": solved,
+        "solve_rate": solved / len(results) if results else 0.0,
+        "nodes": total_nodes,
+        "nps": total_nodes / cpu if cpu else 0.0,
+        "wall_seconds": wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an EPD test suite against the engine")
+    parser.add_argument("suite", help="EPD file with bm/am operations")
+    parser.add_argument("--depth", type=int, help="maximum search depth (default: 64)")
+    parser.add_argument("--nodes", type=int, help="node limit per position")
+    parser.add_argument("--time", type=float, help="time limit per position (seconds)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    if args.nodes is None and args.time is None and args.depth is None:
+        parser.error("give at least one of --depth, --nodes or --time")
+    if args.depth is None:
+        args.depth = 64
+
+    results, wall = run_suite(read_suite(args.suite), args.depth, args.nodes,
+                              args.time, args.workers, verbose=not args.quiet)
+    s = summarize(results, wall)
+
+    print(f"\nSolved {s['solved']}/{s['positions']} ({s['solve_rate']:.1%})")
+    print(f"{s['nodes']} nodes, {s['nps']:.0f} nodes/s per worker, "
+          f"{s['wall_seconds']:.1f} s wall")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# eval_cache.py
+# ===============================
+# PERSISTENT SEARCH CACHE
+# ===============================
+# Root search results kept in SQLite between runs, so re-analysing the
+# same openings and games doesn't repeat the same searches:
+#
+#   search_cache(hash, depth, score, bound, move, used)
+#
+# keyed by (position hash, depth), WITHOUT ROWID so a probe - the deepest
+# entry at or above a depth - is one range scan of the primary key. `used`
+# is the time of the last store or hit; once the table grows past
+# max_entries (plus EVICT_SLACK) the least recently used rows are deleted
+# down to max_entries.
+#
+# The database runs in WAL mode, so any number of worker processes can
+# probe while one of them writes; every store is its own short transaction.
+# Scores depend on the evaluation, so the cache remembers a fingerprint of
+# ai.EVAL_TABLE and empties itself when opened with different weights.
+#
+# ai.search(..., cache=EvalCache(path)) returns a deep enough entry without
+# searching and otherwise continues iterative deepening after the cached
+# depth; analyze_games.py --cache shares one file between its workers.
+#
+#   python eval_cache.py info cache.sqlite
+#   python eval_cache.py trim cache.sqlite --max-entries 100000
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from ai import EVAL_TABLE
+from zobrist import signed64
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+EVICT_SLACK = 0.05          # evict once this much over the limit ...
+EVICT_CHECK = 1000          # ... checked every this many stores
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+    hash  INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    bound INTEGER NOT NULL,
+    move  INTEGER,
+    used  INTEGER NOT NULL,
+    PRIMARY KEY (hash, depth)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS search_cache_used ON search_cache (used);
+
+CREATE TABLE IF NOT EXISTS cache_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO search_cache (hash, depth, score, bound, move, used)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (hash, depth) DO UPDATE SET
+    score = excluded.score,
+    bound = excluded.bound,
+    move  = excluded.move,
+    used  = excluded.used
+"""
+
+CacheEntry = namedtuple("CacheEntry", "depth score bound move")
+
+
+def eval_fingerprint():
+    """Short digest of the evaluation weights the cached scores were made with."""
+    data = json.dumps(EVAL_TABLE, sort_keys=True).encode("ascii")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def _encode_move(move):
+    if move is None:
+        return None
+    sr, sc, tr, tc = move
+    return (sr * 8 + sc) * 64 + tr * 8 + tc
+
+
+def _decode_move(code):
+    if code is None:
+        return None
+    source, target = divmod(code, 64)
+    return source // 8, source % 8, target // 8, target % 8
+
+
+class EvalCache:
+    """Connection to a cache file; open one per process."""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.stores = 0
+        self.hits = 0
+        self.probes = 0
+        self.conn = sqlite3.connect(path, timeout=120, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._check_fingerprint()
+
+    def _check_fingerprint(self):
+        fingerprint = eval_fingerprint()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM cache_meta WHERE key = 'eval'").fetchone()
+            if row is None or row[0] != fingerprint:
+                conn.execute("DELETE FROM search_cache")
+                conn.execute("INSERT OR REPLACE INTO cache_meta VALUES ('eval', ?)", (fingerprint,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def probe(self, key, depth=0):
+        """The deepest CacheEntry for the position with at least `depth`, or None."""
+        self.probes += 1
+        h = signed64(key)
+        row = self.conn.execute(
+            "SELECT depth, score, bound, move FROM search_cache"
+            " WHERE hash = ? AND depth >= ? ORDER BY depth DESC LIMIT 1",
+            (h, depth),
+        ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE search_cache SET used = ? WHERE hash = ? AND depth = ?",
+            (int(time.time()), h, row[0]),
+        )
+        return CacheEntry(row[0], row[1], row[2], _decode_move(row[3]))
+
+    def store(self, key, depth, score, bound, move):
+        self.conn.execute(
+            UPSERT, (signed64(key), depth, score, bound, _encode_move(move), int(time.time()))
+        )
+        self.stores += 1
+        if self.stores % EVICT_CHECK == 0:
+            self.evict()
+
+    def __len__(self):
+        return self.conn.execute("SELECT count(*) FROM search_cache").fetchone()[0]
+
+    def evict(self, force=False):
+        """
+        Delete the least recently used entries down to max_entries if the
+        table is more than EVICT_SLACK over it (any excess with force).
+        Returns the number of rows deleted.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")   # one process evicts at a time
+        try:
+            excess = len(self) - self.max_entries
+            if excess <= 0 or (not force and excess <= self.max_entries * EVICT_SLACK):
+                excess = 0
+            else:
+                conn.execute(
+                    "DELETE FROM search_cache WHERE (hash, depth) IN"
+                    " (SELECT hash, depth FROM search_cache ORDER BY used LIMIT ?)",
+                    (excess,),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return excess
+
+    def clear(self):
+        self.conn.execute("DELETE FROM search_cache")
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent search cache tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("info", help="entries, depths and file size")
+    p.add_argument("path")
+    p = sub.add_parser("trim", help="evict least recently used entries")
+    p.add_argument("path")
+    p.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    p = sub.add_parser("clear", help="delete every entry")
+    p.add_argument("path")
+    args = parser.parse_args()
+
+    cache = EvalCache(args.path, getattr(args, "max_entries", DEFAULT_MAX_ENTRIES))
+    if args.command == "info":
+        print(f"{len(cache)} entries, {os.path.getsize(args.path) / 1e6:.1f} MB")
+        for depth, count in cache.conn.execute(
+                "SELECT depth, count(*) FROM search_cache GROUP BY depth ORDER BY depth"):
+            print(f"  depth {depth:2d}: {count}")
+    elif args.command == "trim":
+        print(f"evicted {cache.evict(force=True)} entries")
+    else:
+        cache.clear()
+        print("cleared")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 # events.py
-from draw import redraw
-from helper import is_white, is_black, is_legal_move, make_move, is_checkmate
-from clock import stop_clock, switch_clock
-from main_helpers import log_move, promote_pawn, show_game_over
+from frames import request_redraw, animate_move
+from helper import is_white, is_black, is_legal_move, make_move, is_checkmate, draw_reason, last_move
+from fen import set_fen, START_FEN
+from clock import stop_clock, switch_clock, reset_clock
+from main_helpers import log_move, rebuild_move_log, promote_pawn, show_game_over, show_draw
 from sound import play_sound
-from ai import computer_move
+from ai import computer_move, stop_computer
+from analysis import toggle_analysis, restart_analysis
+from pgn import export_game
+from journal import record_position, start_journal
+from navigation import clear_line, new_move, step_back, step_forward, seek_first, seek_prev, seek_next, seek_last
 import tkinter as tk
+from tkinter import filedialog
 
 BOARD_SIZE = 8
 SQUARE_SIZE = 80
@@ -18,8 +24,20 @@ def bind_events(game, canvas, root):
     canvas.bind("<ButtonRelease-1>", lambda e: on_drag_release(game, e))
     root.bind("z", lambda e: undo_move(game))
     root.bind("Z", lambda e: undo_move(game))
+    root.bind("y", lambda e: redo_last_move(game))
+    root.bind("Y", lambda e: redo_last_move(game))
     root.bind("r", lambda e: restart_game(game))
     root.bind("R", lambda e: restart_game(game))
+    root.bind("<Home>", lambda e: navigate(game, seek_first))
+    root.bind("<Left>", lambda e: navigate(game, seek_prev))
+    root.bind("<Right>", lambda e: navigate(game, seek_next))
+    root.bind("<End>", lambda e: navigate(game, seek_last))
+    root.bind("a", lambda e: toggle_analysis(game))
+    root.bind("A", lambda e: toggle_analysis(game))
+    root.bind("h", lambda e: toggle_hanging(game))
+    root.bind("H", lambda e: toggle_hanging(game))
+    root.bind("s", lambda e: export_pgn(game))
+    root.bind("S", lambda e: export_pgn(game))
     root.bind("q", lambda e: root.destroy())
     root.bind("Q", lambda e: root.destroy())
 
@@ -30,6 +48,9 @@ def on_drag_start(game, event):
     if not (0 <= row < 8 and 0 <= col < 8):
         return
 
+    if game.engine_search is not None:
+        return  # the computer is choosing its move
+
     piece = game.board[row][col]
 
     if piece == ".":
@@ -52,7 +73,10 @@ def on_drag_start(game, event):
     )
 
 def on_drag_motion(game, event):
-    if game.drag_image:
+    # Only the latest position matters: the frame scheduler moves the image
+    if game.frames is not None:
+        game.frames.move_drag(event.x, event.y)
+    elif game.drag_image:
         game.canvas.coords(game.drag_image, event.x, event.y)
 
 def reset_drag(game):
@@ -79,12 +103,10 @@ def on_drag_release(game, event):
     piece = game.dragging_piece
 
     if is_legal_move(game, piece, sr, sc, tr, tc):
-        # move piece in board
-        game.board[tr][tc] = piece
-        game.board[sr][sc] = "."          # remove from old square
-        game.board_history.append([row.copy() for row in game.board])
+        # move piece in board (castling, en passant, promotion included)
+        make_move(game, sr, sc, tr, tc)
 
-        promote_pawn(game, tr, tc)
+        promote_pawn(game, tr, tc, piece)
         log_move(game, sr, sc, tr, tc, piece)
 
         if game.mode == "PVP":
@@ -92,35 +114,41 @@ def on_drag_release(game, event):
 
         game.current_turn = "black" if game.current_turn == "white" else "white"
         game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
+        new_move(game)
+        record_position(game)
+        restart_analysis(game)
 
         if is_checkmate(game, game.current_turn):
             winner = "white" if game.current_turn == "black" else "black"
             show_game_over(game, winner)
 
+        elif draw_reason(game):
+            show_draw(game, draw_reason(game))
+
         elif game.mode == "PVC":
-            game.root.after(300, lambda: computer_move(game))
+            # Redraw first: on a ponder hit the reply is played (and starts
+            # sliding) right away, and a redraw after it would stop that
+            reset_drag(game)
+            request_redraw(game)
+            computer_move(game)
+            return
 
     else:
         play_sound("illegal")
 
     reset_drag(game)
-    redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces)
+    request_redraw(game)
 
 
 def undo_move(game):
-    if not game.board_history:
+    stop_computer(game)
+
+    # Takes the move back (kept for redo), switches the turn back and fixes
+    # the move number
+    if step_back(game) is None:
         play_sound("illegal")
         return
-
-    # Restore last board state
-    game.board = game.board_history.pop()
-
-    # Switch turn back
-    game.current_turn = "black" if game.current_turn == "white" else "white"
-
-    # Fix move number if needed
-    if game.current_turn == "white":
-        game.move_number = max(1, game.move_number - 1)
+    game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
 
     # Remove last move from log
     game.move_log.config(state="normal")
@@ -131,30 +159,77 @@ def undo_move(game):
     if game.mode == "PVP":
         stop_clock(game)
 
+    record_position(game)
+    restart_analysis(game)
+
     # Redraw UI
-    redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces)
+    request_redraw(game)
     play_sound("move")
 
 
 
-def restart_game(game):
-    # Reset board to initial state
-    game.board = [row.copy() for row in game.initial_board]
+def redo_last_move(game):
+    if not game.redo_history:
+        play_sound("illegal")
+        return
 
-    # Reset turns and counters
-    game.current_turn = "white"
-    game.move_number = 1
+    stop_computer(game)
+    step_forward(game)
+    record_position(game)
+    rebuild_move_log(game)
 
-    # Clear history
-    game.board_history = []
+    game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
+    restart_analysis(game)
 
-    # Reset clocks if PVP
+    animate_move(game, last_move(game))
+    play_sound("move_self")
+
+
+def toggle_hanging(game):
+    """Show / hide the hanging-piece markers."""
+    game.show_hanging = not game.show_hanging
+    request_redraw(game)
+
+
+def navigate(game, seek_func):
+    """First / previous / next / last position of the game line."""
+    stop_computer(game)
     if game.mode == "PVP":
         stop_clock(game)
-        game.white_time = 10 * 60
-        game.black_time = 10 * 60
-        game.white_clock_label.config(text="White: 10:00")
-        game.black_clock_label.config(text="Black: 10:00")
+
+    before = len(game.move_history)
+    seek_func(game)
+    if len(game.move_history) == before:
+        play_sound("illegal")
+        return
+
+    record_position(game)
+    rebuild_move_log(game)
+    game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
+    reset_drag(game)
+    restart_analysis(game)
+
+    # A single step forward slides the piece in; jumps just redraw
+    if len(game.move_history) == before + 1:
+        animate_move(game, last_move(game))
+    else:
+        request_redraw(game)
+    play_sound("move_self")
+
+
+def restart_game(game):
+    stop_computer(game)
+
+    # Reset board, castling / en passant state, turn, counters and history
+    set_fen(game, START_FEN)
+    clear_line(game)
+
+    # Reset clocks if PVP
+    if game.mode == "PVP":
+        reset_clock(game, *game.initial_times)
+
+    # The abandoned game's journal goes; the new game gets its own
+    start_journal(game)
 
     # Clear move log
     game.move_log.config(state="normal")
@@ -163,10 +238,31 @@ def restart_game(game):
 
     # Reset drag state
     reset_drag(game)
+    restart_analysis(game)
 
     # Redraw everything
-    redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces)
+    request_redraw(game)
 
     play_sound("game_start")
 
 
+def export_pgn(game):
+    path = filedialog.asksaveasfilename(
+        parent=game.root,
+        title="Export game as PGN",
+        defaultextension=".pgn",
+        filetypes=[("PGN files", "*.pgn"), ("All files", "*.*")]
+    )
+    if not path:
+        return
+
+    headers = {}
+    if game.mode == "PVP":
+        headers["White"] = getattr(game, "player1_name", "?")
+        headers["Black"] = getattr(game, "player2_name", "?")
+    elif game.mode == "PVC":
+        human = getattr(game, "player_color", "white")
+        headers["White"] = "Player" if human == "white" else "Computer"
+        headers["Black"] = "Player" if human == "black" else "Computer"
+
+    export_game(game, path, headers)
@@ -0,0 +1,216 @@
+# fen.py
+# ===============================
+# FEN / EPD CODEC
+# ===============================
+# Reads and writes the full game state: board, side to move, castling
+# flags, en passant square and the halfmove / fullmove clocks.
+
+from history import new_history
+from zobrist import (
+    position_hash,
+    castling_mask,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+PIECES = "PNBRQKpnbrqk"
+FILES = "abcdefgh"
+
+# "3" -> "...", used to expand a FEN rank in one pass
+_EXPAND = {str(n): "." * n for n in range(1, 9)}
+_EXPAND.update({p: p for p in PIECES})
+
+# Longest runs first, so "........" becomes "8" and not "44"
+_COMPRESS = [("." * n, str(n)) for n in range(8, 0, -1)]
+
+_CASTLING_FLAGS = (
+    (WHITE_KINGSIDE, "K"),
+    (WHITE_QUEENSIDE, "Q"),
+    (BLACK_KINGSIDE, "k"),
+    (BLACK_QUEENSIDE, "q"),
+)
+
+
+def square_name(row, col):
+    """(6, 4) -> "e2" """
+    return FILES[col] + str(8 - row)
+
+
+def parse_square(name):
+    """"e2" -> (6, 4)"""
+    if len(name) != 2 or name[0] not in FILES or name[1] not in "12345678":
+        raise ValueError(f"Invalid square: {name!r}")
+    return 8 - int(name[1]), FILES.index(name[0])
+
+
+# -----------------------------
+# PARSING
+# -----------------------------
+def _parse_board(field):
+    ranks = field.split("/")
+    if len(ranks) != 8:
+        raise ValueError(f"FEN board needs 8 ranks: {field!r}")
+
+    board = []
+    for rank in ranks:
+        try:
+            row = list("".join([_EXPAND[ch] for ch in rank]))
+        except KeyError as e:
+            raise ValueError(f"Invalid FEN character {e.args[0]!r} in {rank!r}") from None
+        if len(row) != 8:
+            raise ValueError(f"FEN rank must have 8 squares: {rank!r}")
+        board.append(row)
+    return board
+
+
+def _set_position(game, board, turn, castling, ep):
+    if turn not in ("w", "b"):
+        raise ValueError(f"Invalid side to move: {turn!r}")
+
+    game.board = board
+    game.current_turn = "white" if turn == "w" else "black"
+
+    if castling != "-" and set(castling) - set("KQkq"):
+        raise ValueError(f"Invalid castling field: {castling!r}")
+
+    # A missing right is modelled as "that rook has moved"; no rights at all
+    # for a side means its king has moved.
+    game.white_rook_moved = {"left": "Q" not in castling, "right": "K" not in castling}
+    game.black_rook_moved = {"left": "q" not in castling, "right": "k" not in castling}
+    game.white_king_moved = "K" not in castling and "Q" not in castling
+    game.black_king_moved = "k" not in castling and "q" not in castling
+
+    game.en_passant_target = None if ep == "-" else parse_square(ep)
+    game.move_history = new_history()
+    game.hash_history = new_history()
+    game.hash_key = position_hash(game)
+
+
+def set_fen(game, fen):
+    """Load a FEN string into game (board, turn, castling, en passant, clocks)."""
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+
+    _set_position(game, _parse_board(fields[0]), fields[1], fields[2], fields[3])
+
+    try:
+        game.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        game.move_number = int(fields[5]) if len(fields) > 5 else 1
+    except ValueError:
+        raise ValueError(f"Invalid FEN move counters: {fen!r}") from None
+
+    game.start_fen = get_fen(game)
+
+
+# -----------------------------
+# SERIALISATION
+# -----------------------------
+def _board_field(board):
+    ranks = []
+    for row in board:
+        rank = "".join(row)
+        for dots, digit in _COMPRESS:
+            if dots in rank:
+                rank = rank.replace(dots, digit)
+        ranks.append(rank)
+    return "/".join(ranks)
+
+
+def castling_rights(game):
+    """FEN castling field ("KQkq", "Kq", "-") of the current position."""
+    mask = castling_mask(game)
+    rights = "".join(flag for bit, flag in _CASTLING_FLAGS if mask & bit)
+    return rights or "-"
+
+
+def _position_fields(game):
+    ep = game.en_passant_target
+    return [
+        _board_field(game.board),
+        "w" if game.current_turn == "white" else "b",
+        castling_rights(game),
+        square_name(*ep) if ep else "-",
+    ]
+
+
+def get_fen(game):
+    fields = _position_fields(game)
+    fields.append(str(game.halfmove_clock))
+    fields.append(str(game.move_number))
+    return " ".join(fields)
+
+
+# -----------------------------
+# EPD
+# -----------------------------
+def _split_operations(text):
+    """'bm Qxf7+; id "WAC 1";' -> {"bm": ["Qxf7+"], "id": ["WAC 1"]}"""
+    ops = {}
+    i, n = 0, len(text)
+    opcode, operands, token = None, [], ""
+
+    def flush_token():
+        nonlocal opcode, token
+        if token:
+            if opcode is None:
+                opcode = token
+            else:
+                operands.append(token)
+            token = ""
+
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            end = text.find('"', i + 1)
+            if end < 0:
+                raise ValueError(f"Unterminated string in EPD: {text!r}")
+            operands.append(text[i + 1:end])
+            i = end + 1
+            continue
+        if ch == ";":
+            flush_token()
+            if opcode is not None:
+                ops[opcode] = operands
+            opcode, operands = None, []
+        elif ch.isspace():
+            flush_token()
+        else:
+            token += ch
+        i += 1
+
+    flush_token()
+    if opcode is not None:
+        ops[opcode] = operands
+    return ops
+
+
+def parse_epd(line):
+    """Split an EPD line into its 4 position fields and an operations dict."""
+    fields = line.strip().split(None, 4)
+    if len(fields) < 4:
+        raise ValueError(f"EPD needs at least 4 fields: {line!r}")
+    ops = _split_operations(fields[4]) if len(fields) > 4 else {}
+    return fields[:4], ops
+
+
+def set_epd(game, line):
+    """Load an EPD line into game and return its operations."""
+    fields, ops = parse_epd(line)
+    _set_position(game, _parse_board(fields[0]), fields[1], fields[2], fields[3])
+    game.halfmove_clock = int(ops["hmvc"][0]) if "hmvc" in ops else 0
+    game.move_number = int(ops["fmvn"][0]) if "fmvn" in ops else 1
+    game.start_fen = get_fen(game)
+    return ops
+
+
+def get_epd(game, ops=None):
+    parts = [" ".join(_position_fields(game))]
+    for opcode, operands in (ops or {}).items():
+        values = " ".join(f'"{v}"' if " " in v or not v else v for v in operands)
+        parts.append(f"{opcode} {values};" if values else f"{opcode};")
+    return " ".join(parts)
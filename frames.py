@@ -0,0 +1,158 @@
+# frames.py
+# ===============================
+# FRAME SCHEDULER & MOVE ANIMATION
+# ===============================
+# Board updates are requested, not drawn on the spot: drag motion only
+# records the pointer position and state changes only mark the board as
+# stale. One Tk callback per display frame (FRAME_MS) then applies the
+# latest drag position and does at most one full redraw, however many
+# events and state changes came in since the last frame. While nothing is
+# pending no callback is scheduled, so an idle board costs no CPU.
+#
+# Move animation runs on the same ticks: the board is drawn with the
+# destination squares empty and the moving pieces slide across as
+# separate canvas items for ANIMATION_MS, then the final board is drawn.
+
+import time
+
+from draw import redraw
+
+BOARD_SIZE = 8
+SQUARE_SIZE = 80
+MARGIN = 40
+
+FRAME_MS = 16          # ~60 frames per second
+ANIMATION_MS = 180
+
+
+def _square_center(row, col):
+    return MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2
+
+
+def _ease(t):
+    return t * t * (3 - 2 * t)
+
+
+class FrameScheduler:
+    def __init__(self, game):
+        self.game = game
+        self.after_id = None
+        self.last_frame = 0.0
+        self.stale = False          # full redraw due
+        self.drag_position = None   # latest pointer position while dragging
+        self.sprites = []           # [canvas item, piece, (x0, y0), (x1, y1)]
+        self.hidden = ()            # squares left empty while their piece slides in
+        self.animation_start = 0.0
+        self.frames = 0             # ticks run / full redraws done (for profiling)
+        self.redraws = 0
+
+    # -----------------------------
+    # REQUESTS
+    # -----------------------------
+    def request_redraw(self):
+        if self.sprites:
+            self._stop_animation()   # the position changed under the animation
+        self.stale = True
+        self._schedule()
+
+    def move_drag(self, x, y):
+        self.drag_position = (x, y)
+        self._schedule()
+
+    def animate(self, moves):
+        """
+        Slide pieces that are already on their new squares in from their old
+        ones: moves is a list of (sr, sc, tr, tc).
+        """
+        self._stop_animation()
+        board = self.game.board
+        canvas = self.game.canvas
+        for sr, sc, tr, tc in moves:
+            piece = board[tr][tc]
+            start = _square_center(sr, sc)
+            item = canvas.create_image(*start, image=self.game.pieces[piece], tags="anim")
+            self.sprites.append([item, piece, start, _square_center(tr, tc)])
+        self.hidden = {(tr, tc) for _, _, tr, tc in moves}
+        self.animation_start = time.monotonic()
+        self.stale = True
+        self._schedule()
+
+    # -----------------------------
+    # FRAMES
+    # -----------------------------
+    def _schedule(self):
+        if self.after_id is not None:
+            return
+        # At most one frame per FRAME_MS, but no wait after an idle period
+        since = int((time.monotonic() - self.last_frame) * 1000)
+        delay = max(1, FRAME_MS - since)
+        self.after_id = self.game.root.after(delay, self._frame)
+
+    def _frame(self):
+        self.after_id = None
+        self.last_frame = time.monotonic()
+        self.frames += 1
+        game = self.game
+        canvas = game.canvas
+
+        if self.stale:
+            self.stale = False
+            self.redraws += 1
+            redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces, self.hidden)
+            for sprite in self.sprites:
+                # redraw() cleared the canvas; put the sliding pieces back
+                sprite[0] = canvas.create_image(*sprite[2], image=game.pieces[sprite[1]], tags="anim")
+            if game.is_dragging:
+                game.drag_image = canvas.create_image(
+                    *(self.drag_position or _square_center(*game.drag_start)),
+                    image=game.pieces[game.dragging_piece], tags="drag")
+
+        if self.sprites:
+            t = min(1.0, (time.monotonic() - self.animation_start) * 1000 / ANIMATION_MS)
+            k = _ease(t)
+            for item, _, (x0, y0), (x1, y1) in self.sprites:
+                canvas.coords(item, x0 + (x1 - x0) * k, y0 + (y1 - y0) * k)
+            if t >= 1.0:
+                self._stop_animation()
+                self.stale = True
+            self._schedule()
+
+        if self.drag_position is not None and game.drag_image:
+            canvas.coords(game.drag_image, *self.drag_position)
+            canvas.tag_raise(game.drag_image)
+        if not game.is_dragging:
+            self.drag_position = None
+
+    def _stop_animation(self):
+        for item, *_ in self.sprites:
+            self.game.canvas.delete(item)
+        self.sprites = []
+        self.hidden = ()
+
+
+# -----------------------------
+# MODULE HELPERS
+# -----------------------------
+def request_redraw(game):
+    """Redraw the board on the next frame (now, without a scheduler)."""
+    if game.frames is None:
+        redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces)
+    else:
+        game.frames.request_redraw()
+
+
+def move_sprites(game, move):
+    """The piece (and castling rook) to slide for a move just made on game.board."""
+    sr, sc, tr, tc = move
+    moves = [move]
+    if game.board[tr][tc] in "Kk" and abs(tc - sc) == 2:
+        moves.append((sr, 7, sr, 5) if tc == 6 else (sr, 0, sr, 3))
+    return moves
+
+
+def animate_move(game, move):
+    """Show a move already made on the board sliding in (plain redraw without a scheduler)."""
+    if game.frames is None:
+        request_redraw(game)
+    else:
+        game.frames.animate(move_sprites(game, move))
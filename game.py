@@ -1,35 +1,20 @@
 # game.py
-from PIL import Image, ImageTk
+from history import new_history
+from position import Position
 
 class Game:
     def __init__(self):
-        self.board = [
-            list("rnbqkbnr"),
-            list("pppppppp"),
-            list("........"),
-            list("........"),
-            list("........"),
-            list("........"),
-            list("PPPPPPPP"),
-            list("RNBQKBNR")
-        ]
+        # Rules state (board, turn, castling, clocks, hash, history); the
+        # attributes of Position are forwarded to it, see below
+        self.position = Position()
 
         self.initial_board = [row.copy() for row in self.board]
-        self.board_history = []
+        self.redo_history = new_history()
+        self.redo_hashes = new_history()    # hash before each redo move (navigation.py)
+        self.checkpoints = {}               # ply -> full-state snapshot (navigation.py)
 
-        self.current_turn = "white"
         self.selected_square = None
 
-        self.en_passant_target = None
-
-        self.white_king_moved = False
-        self.black_king_moved = False
-
-        self.white_rook_moved = {"left": False, "right": False}
-        self.black_rook_moved = {"left": False, "right": False}
-
-        self.move_number = 1
-
         self.dragging_piece = None
         self.drag_start = None
         self.drag_image = None
@@ -47,11 +32,43 @@ class Game:
         self.clock_running = False
         self.white_time = 0
         self.black_time = 0
+        self.initial_times = (0, 0)
+        self.increment = 0
+        self.increment_mode = None   # clock.FISCHER / clock.BRONSTEIN
+        self.clock_side = None
+        self.clock_started_at = 0.0
+        self.clock_after_id = None
         self.mode = None   # "PVC" or "PVP"
 
+        # -----------------------------
+        # COMPUTER (PVC ONLY)
+        # -----------------------------
+        self.engine_search = None   # ai.BackgroundSearch picking the computer's move
+        self.ponder = None          # ai.BackgroundSearch on the expected reply
+
+        # -----------------------------
+        # ANALYSIS PANEL
+        # -----------------------------
+        self.analysis = None        # analysis.AnalysisThread, None when off
+        self.analysis_text = None
+
+        self.frames = None          # frames.FrameScheduler, created with the window
+        self.journal = None         # journal.Journal of the game being played
+        self.journal_after_id = None
+        self.show_hanging = False   # mark pieces that lose material (see.py), toggled with h
         self.pieces = {}
 
+    def copy(self):
+        """
+        Headless copy of the position and its history (a Position: no
+        widgets, clock or drag state), e.g. for a search in another thread.
+        """
+        return self.position.copy()
+
     def load_pieces(self):
+        # Imported here so headless tools can build a Game without PIL/Tk
+        from PIL import Image, ImageTk
+
         pieces_files = {
             "r": "images/black-rook.png",
             "n": "images/black-knight.png",
@@ -71,3 +88,13 @@ class Game:
             img = img.resize((70, 70), Image.Resampling.LANCZOS)
             self.pieces[key] = ImageTk.PhotoImage(img, master=self.root)
 
+
+def _forward(name):
+    return property(
+        lambda game: getattr(game.position, name),
+        lambda game, value: setattr(game.position, name, value),
+    )
+
+
+for _name in Position.__slots__:
+    setattr(Game, _name, _forward(_name))
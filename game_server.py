@@ -0,0 +1,434 @@
+# game_server.py
+# ===============================
+# ASYNCIO MULTI-GAME SERVER
+# ===============================
+# Hosts many independent headless games from one process over plain TCP.
+# The protocol is JSON lines: every request is one JSON object per line
+# and gets exactly one JSON object back (with the request's "id" echoed).
+#
+#   {"op": "new", "mode": "pvc", "color": "white", "depth": 3}
+#   {"op": "move", "game": 1, "move": "e4"}          SAN or "e2e4"
+#   {"op": "state", "game": 1}
+#   {"op": "close", "game": 1}
+#   {"op": "stats"}
+#
+# Moves are validated with the rules engine (helper.py / san.py). Computer
+# replies run on a shared pool of engine processes; at most a bounded
+# number of searches are queued, so a slow search never blocks the event
+# loop and a burst of requests cannot pile up unbounded work. Positions
+# are sent to the engine processes as position.Position (pickled through
+# its compact byte form, history included).
+#
+#   python game_server.py serve --port 8765 --workers 4
+#   python game_server.py client --port 8765
+#   python game_server.py loadtest --port 8765 --clients 200 --moves 40
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ai import search
+from fen import START_FEN, get_fen, square_name
+from position import Position
+from helper import make_move, unmake_move, generate_legal_moves
+from san import parse_move, move_to_san
+from tournament import adjudicate
+
+DEFAULT_PORT = 8765
+MAX_GAMES = 10000
+MAX_DEPTH = 6              # cap on the search depth a client may ask for
+DEFAULT_DEPTH = 2
+
+
+# -----------------------------
+# ENGINE (WORKER PROCESS)
+# -----------------------------
+def engine_reply(job):
+    """
+    Best move for the side to move, as a (sr, sc, tr, tc) tuple. The
+    Position arrives with its history, so the search sees repetitions.
+    """
+    game, depth, nodes, seconds = job
+    return search(game, game.current_turn, max_depth=depth, node_limit=nodes, time_limit=seconds).move
+
+
+def coordinate(move, promotion=None):
+    """(6, 4, 4, 4) -> "e2e4" """
+    sr, sc, tr, tc = move
+    return square_name(sr, sc) + square_name(tr, tc) + (promotion or "")
+
+
+# -----------------------------
+# ONE HOSTED GAME
+# -----------------------------
+class HostedGame:
+    def __init__(self, game_id, fen, engine_color, depth, nodes, seconds):
+        self.id = game_id
+        self.game = Position(fen)
+        self.engine_color = engine_color     # None in PVP
+        self.limits = (depth, nodes, seconds)
+        self.lock = asyncio.Lock()           # one move (plus reply) at a time
+        self.result = None
+        self.reason = None
+
+    def play(self, move, promotion=None):
+        """Apply a legal move and return its SAN."""
+        game = self.game
+        color = game.current_turn
+        san = move_to_san(game, move, promotion)
+        make_move(game, *move, promotion=promotion)
+        if color == "black":
+            game.move_number += 1
+        game.current_turn = "black" if color == "white" else "white"
+
+        outcome = adjudicate(game)
+        if outcome:
+            self.result, self.reason = outcome
+        return san
+
+    def take_back(self):
+        """Undo the last move played (its result with it)."""
+        game = self.game
+        unmake_move(game)
+        color = "black" if game.current_turn == "white" else "white"
+        if color == "black":
+            game.move_number -= 1
+        game.current_turn = color
+        self.result = self.reason = None
+
+    def state(self, legal=False):
+        info = {
+            "game": self.id,
+            "fen": get_fen(self.game),
+            "turn": self.game.current_turn,
+            "result": self.result,
+            "reason": self.reason,
+        }
+        if legal:
+            info["legal"] = [coordinate(m) for m in generate_legal_moves(self.game, self.game.current_turn)]
+        return info
+
+
+class RequestError(Exception):
+    pass
+
+
+def _limit(request, key, kind, default=None):
+    """A positive int/float search limit from the request, or default."""
+    value = request.get(key)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RequestError(f"{key} must be a number: {value!r}")
+    value = kind(value)
+    if value <= 0:
+        raise RequestError(f"{key} must be positive: {value!r}")
+    return value
+
+
+# -----------------------------
+# SERVER
+# -----------------------------
+class GameServer:
+    def __init__(self, workers=None, max_games=MAX_GAMES, max_pending=None):
+        workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(workers)
+        # Searches queued or running; more requests wait for a free slot
+        self.engine_slots = asyncio.Semaphore(max_pending or workers * 4)
+        self.max_games = max_games
+        self.games = {}
+        self.next_id = 1
+        self.requests = 0
+        self.moves = 0
+        self.engine_moves = 0
+        self.connections = 0
+
+    # --- engine ---
+    async def engine_move(self, hosted):
+        job = (hosted.game.copy(),) + hosted.limits
+        async with self.engine_slots:
+            try:
+                move = await asyncio.get_running_loop().run_in_executor(self.pool, engine_reply, job)
+            except Exception as e:
+                raise RequestError(f"engine error: {e}")
+        if move is None:
+            return None
+        self.engine_moves += 1
+        return hosted.play(move)
+
+    # --- requests ---
+    def _get(self, request):
+        try:
+            return self.games[request["game"]]
+        except (KeyError, TypeError):
+            raise RequestError(f"unknown game: {request.get('game')!r}")
+
+    async def op_new(self, request):
+        if len(self.games) >= self.max_games:
+            raise RequestError("server full")
+
+        mode = request.get("mode", "pvp")
+        if not isinstance(mode, str) or mode.lower() not in ("pvp", "pvc"):
+            raise RequestError(f"unknown mode: {mode!r}")
+        mode = mode.lower()
+        color = request.get("color", "white")
+        if color not in ("white", "black"):
+            raise RequestError(f"unknown color: {color!r}")
+
+        depth = min(_limit(request, "depth", int, DEFAULT_DEPTH), MAX_DEPTH)
+        nodes = _limit(request, "nodes", int)
+        seconds = _limit(request, "time", float)
+        engine_color = ("black" if color == "white" else "white") if mode == "pvc" else None
+        fen = request.get("fen", START_FEN)
+        if not isinstance(fen, str):
+            raise RequestError(f"fen must be a string: {fen!r}")
+
+        try:
+            hosted = HostedGame(self.next_id, fen, engine_color, depth, nodes, seconds)
+        except ValueError as e:
+            raise RequestError(str(e))
+        self.next_id += 1
+
+        # Registered only once the engine's opening move (if any) has
+        # succeeded, so a failed search never leaves a stuck game behind
+        reply = None
+        async with hosted.lock:
+            if hosted.game.current_turn == engine_color and hosted.result is None:
+                reply = await self.engine_move(hosted)
+        self.games[hosted.id] = hosted
+        return dict(hosted.state(request.get("legal", False)), reply=reply)
+
+    async def op_move(self, request):
+        hosted = self._get(request)
+        async with hosted.lock:
+            if hosted.result:
+                raise RequestError(f"game over: {hosted.result} ({hosted.reason})")
+            if hosted.game.current_turn == hosted.engine_color:
+                raise RequestError("not your turn")
+            try:
+                move, promotion = parse_move(hosted.game, str(request["move"]))
+            except KeyError:
+                raise RequestError("missing move")
+            except ValueError as e:
+                raise RequestError(str(e))
+
+            san = hosted.play(move, promotion)
+
+            reply = None
+            if hosted.engine_color and hosted.result is None:
+                try:
+                    reply = await self.engine_move(hosted)
+                except RequestError:
+                    # Leave the game as it was, so the client can retry the move
+                    hosted.take_back()
+                    raise
+            self.moves += 1
+        return dict(hosted.state(request.get("legal", False)), san=san, reply=reply)
+
+    async def op_state(self, request):
+        return self._get(request).state(request.get("legal", False))
+
+    async def op_close(self, request):
+        hosted = self._get(request)
+        del self.games[hosted.id]
+        return {"game": hosted.id}
+
+    async def op_stats(self, request):
+        return {
+            "games": len(self.games),
+            "connections": self.connections,
+            "requests": self.requests,
+            "moves": self.moves,
+            "engine_moves": self.engine_moves,
+        }
+
+    async def handle(self, request):
+        self.requests += 1
+        handler = getattr(self, f"op_{request.get('op')}", None)
+        if handler is None:
+            raise RequestError(f"unknown op: {request.get('op')!r}")
+        return await handler(request)
+
+    # --- connections ---
+    async def serve_client(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise RequestError("request must be a JSON object")
+                    response = dict(await self.handle(request), ok=True)
+                except (RequestError, ValueError) as e:
+                    response = {"ok": False, "error": str(e)}
+                if "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def run(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.serve_client, host, port)
+        print(f"[Server] Listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+# -----------------------------
+# CLIENT
+# -----------------------------
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=DEFAULT_PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op, **fields):
+        self.next_id += 1
+        self.writer.write(json.dumps(dict(fields, op=op, id=self.next_id)).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def interactive(host, port, mode, color, depth):
+    """Play one game against the server from the terminal."""
+    client = await Client.connect(host, port)
+    loop = asyncio.get_running_loop()
+    try:
+        response = await client.request("new", mode=mode, color=color, depth=depth)
+        game_id = response["game"]
+        while True:
+            if not response["ok"]:
+                print("error:", response["error"])
+            else:
+                if response.get("reply"):
+                    print("engine plays", response["reply"])
+                print(response["fen"])
+                if response["result"]:
+                    print(response["result"], f"({response['reason']})")
+                    break
+
+            text = (await loop.run_in_executor(None, input, "move> ")).strip()
+            if text in ("", "quit"):
+                break
+            response = await client.request("move", game=game_id, move=text)
+    finally:
+        await client.close()
+
+
+# -----------------------------
+# LOAD TEST
+# -----------------------------
+async def _load_client(host, port, moves, mode, depth, latencies, rng):
+    client = await Client.connect(host, port)
+    try:
+        state = await client.request("new", mode=mode, depth=depth, legal=True)
+        for _ in range(moves):
+            if state["result"] or not state["legal"]:
+                await client.request("close", game=state["game"])
+                state = await client.request("new", mode=mode, depth=depth, legal=True)
+            move = rng.choice(state["legal"])
+            started = time.perf_counter()
+            state = await client.request("move", game=state["game"], move=move, legal=True)
+            latencies.append(time.perf_counter() - started)
+            if not state["ok"]:
+                raise RuntimeError(f"server rejected {move}: {state['error']}")
+        await client.request("close", game=state["game"])
+    finally:
+        await client.close()
+
+
+async def load_test(host="127.0.0.1", port=DEFAULT_PORT, clients=100, moves=40,
+                    mode="pvp", depth=1, seed=None):
+    """
+    `clients` concurrent connections each play `moves` random legal moves.
+    Returns moves/second and latency percentiles (seconds).
+    """
+    rng = random.Random(seed)
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _load_client(host, port, moves, mode, depth, latencies, random.Random(rng.random()))
+        for _ in range(clients)
+    ))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+    return {
+        "moves": len(latencies),
+        "wall_seconds": wall,
+        "moves_per_second": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(0.50),
+        "p99": percentile(0.99),
+        "max": latencies[-1] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON-lines multi-game chess server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="run the server")
+    p.add_argument("--workers", type=int, help="engine processes (default: all cores)")
+    p.add_argument("--max-games", type=int, default=MAX_GAMES)
+
+    p = sub.add_parser("client", help="play a game from the terminal")
+    p.add_argument("--mode", choices=["pvp", "pvc"], default="pvc")
+    p.add_argument("--color", choices=["white", "black"], default="white")
+    p.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+
+    p = sub.add_parser("loadtest", help="measure moves/second and latency")
+    p.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    p.add_argument("--moves", type=int, default=40, help="moves per client")
+    p.add_argument("--mode", choices=["pvp", "pvc"], default="pvp")
+    p.add_argument("--depth", type=int, default=1, help="engine depth in pvc mode")
+    p.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        try:
+            asyncio.run(GameServer(args.workers, args.max_games).run(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "client":
+        asyncio.run(interactive(args.host, args.port, args.mode, args.color, args.depth))
+    else:
+        stats = asyncio.run(load_test(args.host, args.port, args.clients, args.moves,
+                                      args.mode, args.depth, args.seed))
+        print(f"{stats['moves']} moves in {stats['wall_seconds']:.2f} s - "
+              f"{stats['moves_per_second']:.0f} moves/s")
+        print(f"latency p50 {stats['p50'] * 1000:.1f} ms, p99 {stats['p99'] * 1000:.1f} ms, "
+              f"max {stats['max'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,31 @@
 # CHESS RULES & VALIDATION
 # ===============================
 
+from history import (
+    NORMAL,
+    CASTLE,
+    EN_PASSANT,
+    pack_record,
+    with_promotion,
+    unpack_record,
+    record_move,
+    restore_castling,
+)
+from zobrist import (
+    PIECE_SQUARE_KEYS,
+    BLACK_TO_MOVE_KEY,
+    CASTLING_KEYS,
+    castling_mask,
+    en_passant_key,
+)
+
+KNIGHT_STEPS = ((2, 1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2), (1, -2), (2, -1))
+KING_STEPS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+ROOK_DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+QUEEN_DIRS = ROOK_DIRS + BISHOP_DIRS
+
+
 def is_white(piece):
     return piece.isupper()
 
@@ -110,14 +135,21 @@ def is_legal_move(game, piece, sr, sc, tr, tc):
                 return False
             row = 7
             enemy = "black"
+            rook = "R"
+            rook_moved = game.white_rook_moved
         else:
             if game.black_king_moved:
                 return False
             row = 0
             enemy = "white"
+            rook = "r"
+            rook_moved = game.black_rook_moved
+
+        if sr != row or sc != 4:
+            return False
 
         # King-side castling
-        if dr == 0 and dc == 2:
+        if dr == 0 and dc == 2 and not rook_moved["right"] and board[row][7] == rook:
             if board[row][5] == "." and board[row][6] == ".":
                 if not is_square_attacked(game, row, 4, enemy) and \
                    not is_square_attacked(game, row, 5, enemy) and \
@@ -125,7 +157,7 @@ def is_legal_move(game, piece, sr, sc, tr, tc):
                     return True
 
         # Queen-side castling
-        if dr == 0 and dc == -2:
+        if dr == 0 and dc == -2 and not rook_moved["left"] and board[row][0] == rook:
             if board[row][1] == "." and board[row][2] == "." and board[row][3] == ".":
                 if not is_square_attacked(game, row, 4, enemy) and \
                    not is_square_attacked(game, row, 3, enemy) and \
@@ -136,35 +168,50 @@ def is_legal_move(game, piece, sr, sc, tr, tc):
 
 
 def is_square_attacked(game, row, col, by_color):
+    """
+    Looks outward from (row, col) for pawns, knights, kings and sliders
+    of by_color, instead of testing every piece on the board.
+    """
     board = game.board
 
-    for r in range(8):
-        for c in range(8):
-            piece = board[r][c]
-            if piece == ".":
-                continue
+    if by_color == "white":
+        pawn, knight, bishop, rook, queen, king = "PNBRQK"
+        pawn_row = row + 1
+    else:
+        pawn, knight, bishop, rook, queen, king = "pnbrqk"
+        pawn_row = row - 1
 
-            if by_color == "white" and is_white(piece):
-                if piece.lower() == "p":
-                    if r - 1 == row and abs(c - col) == 1:
-                        return True
-                elif piece.lower() == "k":
-                    if max(abs(r - row), abs(c - col)) == 1:
-                        return True
-                else:
-                    if is_legal_move(game, piece, r, c, row, col):
-                        return True
+    # Pawns
+    if 0 <= pawn_row < 8:
+        if col > 0 and board[pawn_row][col - 1] == pawn:
+            return True
+        if col < 7 and board[pawn_row][col + 1] == pawn:
+            return True
 
-            if by_color == "black" and is_black(piece):
-                if piece.lower() == "p":
-                    if r + 1 == row and abs(c - col) == 1:
-                        return True
-                elif piece.lower() == "k":
-                    if max(abs(r - row), abs(c - col)) == 1:
-                        return True
-                else:
-                    if is_legal_move(game, piece, r, c, row, col):
+    # Knights
+    for dr, dc in KNIGHT_STEPS:
+        r, c = row + dr, col + dc
+        if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == knight:
+            return True
+
+    # King
+    for dr, dc in KING_STEPS:
+        r, c = row + dr, col + dc
+        if 0 <= r < 8 and 0 <= c < 8 and board[r][c] == king:
+            return True
+
+    # Sliders
+    for dirs, straight in ((ROOK_DIRS, rook), (BISHOP_DIRS, bishop)):
+        for dr, dc in dirs:
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                piece = board[r][c]
+                if piece != ".":
+                    if piece == straight or piece == queen:
                         return True
+                    break
+                r += dr
+                c += dc
 
     return False
 
@@ -213,40 +260,172 @@ def has_legal_moves(game, color):
     return False
 
 
+def generate_moves(game, color):
+    """
+    Pseudo-legal moves for color as (sr, sc, tr, tc), generated from piece
+    movement patterns. Same moves is_legal_move accepts, but without
+    testing all 64 target squares for every piece.
+    """
+    board = game.board
+    own = str.isupper if color == "white" else str.islower
+    moves = []
+
+    for sr in range(8):
+        row = board[sr]
+        for sc in range(8):
+            piece = row[sc]
+            if piece == "." or not own(piece):
+                continue
+
+            kind = piece.lower()
+
+            if kind == "p":
+                direction = -1 if color == "white" else 1
+                start_row = 6 if color == "white" else 1
+                tr = sr + direction
+                if not 0 <= tr < 8:
+                    continue
+                if board[tr][sc] == ".":
+                    moves.append((sr, sc, tr, sc))
+                    if sr == start_row and board[tr + direction][sc] == ".":
+                        moves.append((sr, sc, tr + direction, sc))
+                for tc in (sc - 1, sc + 1):
+                    if 0 <= tc < 8:
+                        target = board[tr][tc]
+                        if target != ".":
+                            if not own(target):
+                                moves.append((sr, sc, tr, tc))
+                        elif game.en_passant_target == (tr, tc):
+                            moves.append((sr, sc, tr, tc))
+
+            elif kind == "n" or kind == "k":
+                for dr, dc in (KNIGHT_STEPS if kind == "n" else KING_STEPS):
+                    tr, tc = sr + dr, sc + dc
+                    if 0 <= tr < 8 and 0 <= tc < 8:
+                        target = board[tr][tc]
+                        if target == "." or not own(target):
+                            moves.append((sr, sc, tr, tc))
+
+                if kind == "k":
+                    for tc in (sc + 2, sc - 2):
+                        if 0 <= tc < 8 and is_legal_move(game, piece, sr, sc, sr, tc):
+                            moves.append((sr, sc, sr, tc))
+
+            else:
+                dirs = ROOK_DIRS if kind == "r" else BISHOP_DIRS if kind == "b" else QUEEN_DIRS
+                for dr, dc in dirs:
+                    tr, tc = sr + dr, sc + dc
+                    while 0 <= tr < 8 and 0 <= tc < 8:
+                        target = board[tr][tc]
+                        if target == ".":
+                            moves.append((sr, sc, tr, tc))
+                        else:
+                            if not own(target):
+                                moves.append((sr, sc, tr, tc))
+                            break
+                        tr += dr
+                        tc += dc
+
+    return moves
+
+
+def leaves_king_in_check(game, color, sr, sc, tr, tc):
+    """Try the move on the board (incl. en passant removal) and test king safety."""
+    board = game.board
+    piece = board[sr][sc]
+    captured = board[tr][tc]
+
+    ep_row = None
+    if piece.lower() == "p" and captured == "." and sc != tc:
+        ep_row = sr
+        ep_piece = board[sr][tc]
+        board[sr][tc] = "."
+
+    board[tr][tc] = piece
+    board[sr][sc] = "."
+
+    illegal = king_in_check(game, color)
+
+    board[sr][sc] = piece
+    board[tr][tc] = captured
+    if ep_row is not None:
+        board[ep_row][tc] = ep_piece
+
+    return illegal
+
+
+def generate_legal_moves(game, color):
+    return [
+        move for move in generate_moves(game, color)
+        if not leaves_king_in_check(game, color, *move)
+    ]
+
+
 def is_checkmate(game, color):
     return king_in_check(game, color) and not has_legal_moves(game, color)
 
-def make_move(game, sr, sc, tr, tc):
+def make_move(game, sr, sc, tr, tc, promotion=None):
     """
     Executes a move from (sr, sc) to (tr, tc) on the game.board.
-    Handles normal moves, en passant, and castling.
+    Handles normal moves, en passant, castling and promotion
+    (to `promotion`, a queen by default).
     """
     piece = game.board[sr][sc]
     target = game.board[tr][tc]
 
-    # Save board for undo if needed
-    game.board_history.append([row.copy() for row in game.board])
+    if piece.lower() == "k" and abs(tc - sc) == 2:
+        special = CASTLE
+    elif piece.lower() == "p" and game.en_passant_target == (tr, tc) and target == ".":
+        special = EN_PASSANT
+    else:
+        special = NORMAL
+
+    # Compact undo record (see history.py), written before anything changes
+    record = pack_record(game, sr, sc, tr, tc, piece, target, special)
+    # Incremental Zobrist hash: remove the old castling rights / en passant
+    # key, the mover and anything captured
+    h = game.hash_key
+    game.hash_history.append(h)
+    h ^= CASTLING_KEYS[castling_mask(game)] ^ en_passant_key(game.board, game.en_passant_target)
+    h ^= PIECE_SQUARE_KEYS[piece][sr * 8 + sc]
+    if target != ".":
+        h ^= PIECE_SQUARE_KEYS[target][tr * 8 + tc]
 
     # Normal move
     game.board[tr][tc] = piece
     game.board[sr][sc] = "."
 
     # Castling
-    if piece.lower() == "k" and abs(tc - sc) == 2:
+    if special == CASTLE:
         row = sr
         if tc == 6:  # King-side
             game.board[row][5] = game.board[row][7]
             game.board[row][7] = "."
+            rook_from, rook_to = row * 8 + 7, row * 8 + 5
         elif tc == 2:  # Queen-side
             game.board[row][3] = game.board[row][0]
             game.board[row][0] = "."
+            rook_from, rook_to = row * 8, row * 8 + 3
+        rook_keys = PIECE_SQUARE_KEYS["R" if piece == "K" else "r"]
+        h ^= rook_keys[rook_from] ^ rook_keys[rook_to]
 
     # En passant
-    if piece.lower() == "p" and game.en_passant_target == (tr, tc) and target == ".":
-        if piece.isupper():
-            game.board[tr + 1][tc] = "."
-        else:
-            game.board[tr - 1][tc] = "."
+    if special == EN_PASSANT:
+        h ^= PIECE_SQUARE_KEYS[game.board[sr][tc]][sr * 8 + tc]
+        game.board[sr][tc] = "."
+
+    # Promotion
+    if (piece == "P" and tr == 0) or (piece == "p" and tr == 7):
+        promotion = promotion or "q"
+        promoted = promotion.upper() if piece.isupper() else promotion.lower()
+        game.board[tr][tc] = promoted
+        record = with_promotion(record, promoted)
+
+    # Halfmove clock (50-move rule)
+    if piece.lower() == "p" or target != ".":
+        game.halfmove_clock = 0
+    else:
+        game.halfmove_clock += 1
 
     # Update castling flags
     if piece == "K":
@@ -263,8 +442,145 @@ def make_move(game, sr, sc, tr, tc):
     elif piece == "r" and sr == 0 and sc == 7:
         game.black_rook_moved["right"] = True
 
+    # A rook captured on its home square loses its castling right too
+    if (tr, tc) == (7, 0):
+        game.white_rook_moved["left"] = True
+    elif (tr, tc) == (7, 7):
+        game.white_rook_moved["right"] = True
+    elif (tr, tc) == (0, 0):
+        game.black_rook_moved["left"] = True
+    elif (tr, tc) == (0, 7):
+        game.black_rook_moved["right"] = True
+
     # Update en passant target
     game.en_passant_target = None
     if piece.lower() == "p" and abs(tr - sr) == 2:
         game.en_passant_target = ((tr + sr) // 2, tc)
 
+    # Hash: piece on its new square, castling / en passant changes, side to move
+    h ^= PIECE_SQUARE_KEYS[game.board[tr][tc]][tr * 8 + tc]
+    h ^= CASTLING_KEYS[castling_mask(game)] ^ en_passant_key(game.board, game.en_passant_target)
+    game.hash_key = h ^ BLACK_TO_MOVE_KEY
+
+    game.move_history.append(record)
+
+
+def make_null_move(game):
+    """
+    Pass the move to the other side (search only: null-move pruning).
+    Returns the state unmake_null_move needs. The halfmove clock is reset
+    so repetition checks don't look back across the null move.
+    """
+    state = (game.en_passant_target, game.halfmove_clock)
+    h = game.hash_key
+    game.hash_history.append(h)
+    h ^= en_passant_key(game.board, game.en_passant_target)
+    game.en_passant_target = None
+    game.halfmove_clock = 0
+    game.hash_key = h ^ BLACK_TO_MOVE_KEY
+    return state
+
+
+def unmake_null_move(game, state):
+    game.en_passant_target, game.halfmove_clock = state
+    game.hash_key = game.hash_history.pop()
+
+
+def set_promotion(game, tr, tc, piece):
+    """Replace the piece the last move promoted to (promotion popup)."""
+    old = game.board[tr][tc]
+    game.board[tr][tc] = piece
+    game.move_history[-1] = with_promotion(game.move_history[-1], piece)
+    game.hash_key ^= PIECE_SQUARE_KEYS[old][tr * 8 + tc] ^ PIECE_SQUARE_KEYS[piece][tr * 8 + tc]
+
+
+# -----------------------------
+# DRAW RULES
+# -----------------------------
+def repetition_count(game):
+    """
+    How often the current position has occurred, looking back only to the
+    last capture or pawn move (halfmove_clock plies): O(plies since the
+    last irreversible move), cheap enough to call at every search node.
+    """
+    history = game.hash_history
+    h = game.hash_key
+    count = 1
+    back = min(game.halfmove_clock, len(history))
+    # Same side to move: every second entry, starting two plies back
+    for i in range(len(history) - 2, len(history) - back - 1, -2):
+        if history[i] == h:
+            count += 1
+    return count
+
+
+def is_repetition(game):
+    """The position has been seen before (enough for a draw score in search)."""
+    history = game.hash_history
+    h = game.hash_key
+    back = min(game.halfmove_clock, len(history))
+    for i in range(len(history) - 2, len(history) - back - 1, -2):
+        if history[i] == h:
+            return True
+    return False
+
+
+def is_fifty_move_draw(game):
+    return game.halfmove_clock >= 100
+
+
+def draw_reason(game):
+    """"threefold repetition", "50-move rule" or None."""
+    if repetition_count(game) >= 3:
+        return "threefold repetition"
+    if is_fifty_move_draw(game):
+        return "50-move rule"
+    return None
+
+
+def unmake_move(game):
+    """
+    Takes back the last move of game.move_history, restoring the board,
+    castling flags, en passant target and halfmove clock.
+    Returns the undone record (for a redo stack), or None if there is none.
+    """
+    if not game.move_history:
+        return None
+
+    record = game.move_history.pop()
+    m = unpack_record(record)
+    board = game.board
+
+    board[m.sr][m.sc] = m.piece
+    board[m.tr][m.tc] = m.captured
+
+    if m.special == CASTLE:
+        if m.tc == 6:
+            board[m.sr][7] = board[m.sr][5]
+            board[m.sr][5] = "."
+        else:
+            board[m.sr][0] = board[m.sr][3]
+            board[m.sr][3] = "."
+    elif m.special == EN_PASSANT:
+        board[m.sr][m.tc] = "p" if m.piece == "P" else "P"
+
+    restore_castling(game, m.castling)
+    game.en_passant_target = m.en_passant
+    game.halfmove_clock = m.halfmove_clock
+    game.hash_key = game.hash_history.pop()
+
+    return record
+
+
+def redo_move(game, record):
+    """Replay a record previously returned by unmake_move."""
+    m = unpack_record(record)
+    make_move(game, m.sr, m.sc, m.tr, m.tc, m.promoted)
+
+
+def last_move(game):
+    """(sr, sc, tr, tc) of the last move played, or None."""
+    if not game.move_history:
+        return None
+    return record_move(game.move_history[-1])
+
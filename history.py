@@ -0,0 +1,98 @@
+# history.py
+# ===============================
+# COMPACT MOVE HISTORY
+# ===============================
+# Every ply is stored as one 64-bit integer in an array("Q") - 8 bytes per
+# move instead of a copy of the whole board. A record holds the move plus
+# everything make_move overwrites, so it can be undone (and redone) exactly:
+#
+#   bits  0-5   from square (row * 8 + col)
+#   bits  6-11  to square
+#   bits 12-15  moved piece code
+#   bits 16-19  captured piece code (0 = none)
+#   bits 20-23  promoted piece code (0 = none)
+#   bits 24-25  special move (NORMAL / CASTLE / EN_PASSANT)
+#   bits 26-31  castling flags before the move
+#   bits 32-38  en passant target before the move (square + 1, 0 = none)
+#   bits 39-54  halfmove clock before the move
+
+from array import array
+from collections import namedtuple
+
+PIECE_CODES = ".PNBRQKpnbrqk"
+PIECE_INDEX = {p: i for i, p in enumerate(PIECE_CODES)}
+
+NORMAL = 0
+CASTLE = 1
+EN_PASSANT = 2
+
+MoveRecord = namedtuple(
+    "MoveRecord",
+    "sr sc tr tc piece captured promoted special castling en_passant halfmove_clock"
+)
+
+
+def new_history():
+    return array("Q")
+
+
+def castling_bits(game):
+    return (
+        game.white_king_moved
+        | game.white_rook_moved["left"] << 1
+        | game.white_rook_moved["right"] << 2
+        | game.black_king_moved << 3
+        | game.black_rook_moved["left"] << 4
+        | game.black_rook_moved["right"] << 5
+    )
+
+
+def restore_castling(game, bits):
+    game.white_king_moved = bool(bits & 1)
+    game.white_rook_moved = {"left": bool(bits & 2), "right": bool(bits & 4)}
+    game.black_king_moved = bool(bits & 8)
+    game.black_rook_moved = {"left": bool(bits & 16), "right": bool(bits & 32)}
+
+
+def pack_record(game, sr, sc, tr, tc, piece, captured, special):
+    """Encode a move about to be made on game (state is read before the move)."""
+    ep = game.en_passant_target
+    ep_code = ep[0] * 8 + ep[1] + 1 if ep else 0
+    return (
+        (sr * 8 + sc)
+        | (tr * 8 + tc) << 6
+        | PIECE_INDEX[piece] << 12
+        | PIECE_INDEX[captured] << 16
+        | special << 24
+        | castling_bits(game) << 26
+        | ep_code << 32
+        | min(game.halfmove_clock, 0xFFFF) << 39
+    )
+
+
+def with_promotion(record, piece):
+    """Return record with its promoted piece replaced (after a promotion popup)."""
+    return (record & ~(0xF << 20)) | PIECE_INDEX[piece] << 20
+
+
+def unpack_record(record):
+    ep_code = (record >> 32) & 0x7F
+    promoted = (record >> 20) & 0xF
+    return MoveRecord(
+        (record >> 3) & 7,
+        record & 7,
+        (record >> 9) & 7,
+        (record >> 6) & 7,
+        PIECE_CODES[(record >> 12) & 0xF],
+        PIECE_CODES[(record >> 16) & 0xF],
+        PIECE_CODES[promoted] if promoted else None,
+        (record >> 24) & 3,
+        (record >> 26) & 0x3F,
+        divmod(ep_code - 1, 8) if ep_code else None,
+        (record >> 39) & 0xFFFF,
+    )
+
+
+def record_move(record):
+    """Just the (sr, sc, tr, tc) of a record, without a full unpack."""
+    return (record >> 3) & 7, record & 7, (record >> 9) & 7, (record >> 6) & 7
@@ -0,0 +1,404 @@
+# journal.py
+# ===============================
+# CRASH-SAFE GAME JOURNAL
+# ===============================
+# Every game being played is mirrored to a small append-only file in
+# JOURNAL_DIR, so a crash or a closed window doesn't lose it:
+#
+#   header   magic, version, length + JSON settings (start FEN, mode,
+#            player colour and names, clock settings), fsync'ed at once
+#   frames   32 bytes each:
+#              kind (MOVE / TRUNCATE / END), ply, 8-byte move record
+#              (history.py), position hash after the frame, white and
+#              black clock in milliseconds, CRC32 of the frame
+#
+# A MOVE frame puts its record at `ply`, dropping whatever followed (so
+# undo + a new move, or a changed promotion piece, is one frame); TRUNCATE
+# cuts the line back to `ply` moves (undo, seeking back); END marks a
+# finished game. Frames are written straight to the OS (one write() per
+# move, so a crash of the program loses nothing) and fsync'ed in batches -
+# every FSYNC_FRAMES frames, or FSYNC_SECONDS after the first unsynced one -
+# so only a power cut can lose the last few moves.
+#
+# Only unfinished games with at least one move are kept: the journal of a
+# finished or empty game is deleted when it is closed, and any left behind
+# (a crash after END or before the first move) is pruned on the next
+# startup.
+#
+# Reading stops at the first short or corrupt frame (a torn write at the
+# tail), which is cut off when the journal is reopened. Resuming replays
+# the line through navigation.seek, a few microseconds per move.
+#
+#   python journal.py show journal/20240101-120000.cjl
+#   python journal.py bench --moves 400
+
+import argparse
+import json
+import os
+import random
+import struct
+import tempfile
+import time
+import zlib
+
+from fen import set_fen
+from helper import generate_legal_moves, make_move, draw_reason
+from navigation import clear_line, seek_last
+
+JOURNAL_DIR = "journal"
+SUFFIX = ".cjl"
+MAGIC = b"CHESSJNL"
+VERSION = 1
+HEADER = struct.Struct("<8sII")          # magic, version, settings length
+FRAME = struct.Struct("<BBHQQiiI")       # kind, pad, ply, record, hash, white ms, black ms, crc
+CRC_OFFSET = FRAME.size - 4
+
+MOVE = 1
+TRUNCATE = 2
+END = 3
+
+FSYNC_FRAMES = 16
+FSYNC_SECONDS = 1.0
+
+
+def _clock_ms(seconds):
+    return max(-2**31, min(2**31 - 1, round(seconds * 1000)))
+
+
+def _frame(kind, ply, record, key, white_ms, black_ms):
+    data = FRAME.pack(kind, 0, ply, record, key, white_ms, black_ms, 0)[:CRC_OFFSET]
+    return data + struct.pack("<I", zlib.crc32(data))
+
+
+# -----------------------------
+# WRITING
+# -----------------------------
+class Journal:
+    def __init__(self, path, settings=None):
+        """
+        Create the journal at path with the given settings, or (settings
+        None) reopen an existing one for appending after its last good frame.
+        """
+        self.path = path
+        self.unsynced = 0
+        self.first_unsynced = 0.0
+        self.finished = False           # last frame is END
+
+        if settings is None:
+            _, line, last, end = read_journal(path)
+            self.line = line
+            self.finished = last is not None and last[0] == END
+            self.file = open(path, "r+b", buffering=0)
+            self.file.truncate(end)      # drop a torn frame at the tail
+            self.file.seek(end)
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = json.dumps(settings).encode("utf-8")
+        self.line = []
+        self.file = open(path, "wb", buffering=0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(data)) + data)
+        self.sync()
+
+    def append(self, kind, ply, record, key, white_ms, black_ms):
+        self.file.write(_frame(kind, ply, record, key, white_ms, black_ms))
+        self.finished = kind == END
+        if kind == MOVE:
+            del self.line[ply:]
+            self.line.append(record)
+        elif kind == TRUNCATE:
+            del self.line[ply:]
+
+        if self.unsynced == 0:
+            self.first_unsynced = time.monotonic()
+        self.unsynced += 1
+        if kind == END or self.unsynced >= FSYNC_FRAMES \
+                or time.monotonic() - self.first_unsynced >= FSYNC_SECONDS:
+            self.sync()
+
+    def record_line(self, history, key, white_ms=0, black_ms=0):
+        """
+        Write the frames that turn the journalled line into `history` (the
+        game's move_history): usually a single MOVE frame.
+        """
+        line = self.line
+        n = len(history)
+        if len(line) == n - 1 and (n == 1 or line[-1] == history[n - 2]):
+            common = n - 1                       # one move added (the usual case)
+        else:
+            common = 0
+            limit = min(len(line), n)
+            while common < limit and line[common] == history[common]:
+                common += 1
+        if common == n:
+            if len(line) > n:
+                self.append(TRUNCATE, n, 0, key, white_ms, black_ms)
+            return
+        for ply in range(common, n):
+            # Only the last frame's hash is the position after it
+            self.append(MOVE, ply, history[ply], key if ply == n - 1 else 0, white_ms, black_ms)
+
+    def sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def new_journal_path(directory=JOURNAL_DIR):
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(directory, stamp + SUFFIX)
+    n = 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(directory, f"{stamp}-{n}{SUFFIX}")
+    return path
+
+
+# -----------------------------
+# READING
+# -----------------------------
+def read_journal(path):
+    """
+    (settings, line, last frame, end offset): the move records of the
+    journalled line, the last good frame as a tuple (or None) and the file
+    offset just past it.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: not a game journal")
+    magic, version, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a game journal (version {VERSION})")
+    offset = HEADER.size + length
+    settings = json.loads(data[HEADER.size:offset].decode("utf-8"))
+
+    line = []
+    last = None
+    while offset + FRAME.size <= len(data):
+        frame = FRAME.unpack_from(data, offset)
+        if zlib.crc32(data[offset:offset + CRC_OFFSET]) != frame[-1]:
+            break
+        kind, _, ply, record = frame[:4]
+        if kind == MOVE and ply <= len(line):
+            del line[ply:]
+            line.append(record)
+        elif kind == TRUNCATE and ply <= len(line):
+            del line[ply:]
+        elif kind != END:
+            break
+        last = frame
+        offset += FRAME.size
+    return settings, line, last, offset
+
+
+def interrupted_journals(directory=JOURNAL_DIR):
+    """
+    Journals of unfinished games, newest first (finished and empty ones are
+    deleted).
+    """
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for name in os.listdir(directory):
+        if not name.endswith(SUFFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            _, line, last, _ = read_journal(path)
+        except (OSError, ValueError):
+            continue
+        if line and (last is None or last[0] != END):
+            found.append((os.path.getmtime(path), path))
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return [path for _, path in sorted(found, reverse=True)]
+
+
+def load_line(game, start_fen, line):
+    """Set game to start_fen and play the journalled line (through seek)."""
+    set_fen(game, start_fen)
+    clear_line(game)
+    game.redo_history.extend(reversed(line))
+    seek_last(game)
+
+
+# -----------------------------
+# GAME HOOKS
+# -----------------------------
+def _settings(game):
+    return {
+        "start_fen": game.start_fen,
+        "mode": game.mode,
+        "player_color": getattr(game, "player_color", "white"),
+        "player1_name": getattr(game, "player1_name", None),
+        "player2_name": getattr(game, "player2_name", None),
+        "initial_times": list(game.initial_times),
+        "increment": game.increment,
+        "increment_mode": game.increment_mode,
+    }
+
+
+def _clocks(game):
+    from clock import remaining_time   # here: clock.py imports this module
+    return _clock_ms(remaining_time(game, "white")), _clock_ms(remaining_time(game, "black"))
+
+
+def start_journal(game):
+    """Begin journalling a new game (the previous game's journal is deleted)."""
+    discard_journal(game)
+    game.journal = Journal(new_journal_path(), _settings(game))
+    record_position(game)
+
+
+def record_position(game):
+    """Journal the game's current line and clocks; call after every change to move_history."""
+    journal = game.journal
+    if journal is None:
+        return
+    journal.record_line(game.move_history, game.hash_key, *_clocks(game))
+    if journal.unsynced and game.root is not None and game.journal_after_id is None:
+        # Make sure a lone move is on disk FSYNC_SECONDS later
+        def sync():
+            game.journal_after_id = None
+            if game.journal is journal and journal.unsynced:
+                journal.sync()
+        game.journal_after_id = game.root.after(int(FSYNC_SECONDS * 1000), sync)
+
+
+def finish_journal(game):
+    """Mark the game as over; it is no longer offered for resuming."""
+    if game.journal is not None:
+        game.journal.append(END, len(game.move_history), 0, game.hash_key, *_clocks(game))
+
+
+def close_journal(game):
+    """
+    Flush and close (the window is closing; an unfinished game stays
+    resumable, the journal of a finished or empty game is deleted).
+    """
+    journal = game.journal
+    if journal is not None:
+        journal.close()
+        game.journal = None
+        if journal.finished or not journal.line:
+            try:
+                os.remove(journal.path)
+            except OSError:
+                pass
+
+
+def discard_journal(game):
+    """Close and delete the journal (the game was restarted or replaced)."""
+    if game.journal is not None:
+        path = game.journal.path
+        close_journal(game)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _game_over(game):
+    color = game.current_turn
+    return not generate_legal_moves(game, color) or draw_reason(game) is not None
+
+
+def resume_game(game, path):
+    """
+    Restore an interrupted game from its journal (settings, moves, clocks)
+    and keep journalling to it. Returns False if it can't be replayed.
+    """
+    settings, line, last, _ = read_journal(path)
+    try:
+        load_line(game, settings["start_fen"], line)
+    except (KeyError, ValueError, IndexError):
+        return False
+    if last is not None and last[4] and last[4] != game.hash_key:
+        return False
+    if (last is not None and last[0] == END) or _game_over(game):
+        return False  # finished, with or without its END frame
+
+    game.mode = settings["mode"]
+    game.player_color = settings["player_color"]
+    if settings["player1_name"] is not None:
+        game.player1_name = settings["player1_name"]
+        game.player2_name = settings["player2_name"]
+    game.initial_times = tuple(settings["initial_times"])
+    game.increment = settings["increment"]
+    game.increment_mode = settings["increment_mode"]
+    if last is not None:
+        game.white_time = last[5] / 1000
+        game.black_time = last[6] / 1000
+    game.journal = Journal(path)
+    return True
+
+
+# -----------------------------
+# TOOLS
+# -----------------------------
+def benchmark(moves=400):
+    """(µs per journalled move, ms to resume) for a game of `moves` plies."""
+    from game import Game
+
+    game = Game()
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        game.journal = Journal(new_journal_path(directory), _settings(game))
+        elapsed = 0.0
+        for _ in range(moves):
+            legal = generate_legal_moves(game, game.current_turn)
+            if not legal:
+                break
+            make_move(game, *rng.choice(legal))
+            game.current_turn = "black" if game.current_turn == "white" else "white"
+            started = time.perf_counter()
+            game.journal.record_line(game.move_history, game.hash_key)
+            elapsed += time.perf_counter() - started
+        played = len(game.move_history)
+        path = game.journal.path
+        game.journal.close()
+
+        started = time.perf_counter()
+        restored = Game()
+        ok = resume_game(restored, path)
+        resume_ms = (time.perf_counter() - started) * 1000
+        restored.journal.close()
+    assert ok and restored.hash_key == game.hash_key
+    return elapsed / played * 1e6, resume_ms, played
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game journal tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("show", help="print a journal's settings and line")
+    p.add_argument("path")
+    p = sub.add_parser("bench", help="time journalling and resuming a random game")
+    p.add_argument("--moves", type=int, default=400)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        from fen import get_fen
+        from game import Game
+        settings, line, last, end = read_journal(args.path)
+        print(json.dumps(settings, indent=2))
+        game = Game()
+        load_line(game, settings["start_fen"], line)
+        state = "finished" if last is not None and last[0] == END else "interrupted"
+        print(f"{len(line)} plies, {end} bytes, {state}")
+        print(get_fen(game))
+        return
+
+    per_move, resume_ms, played = benchmark(args.moves)
+    print(f"{played} plies: {per_move:.1f} µs per move written, resume in {resume_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,20 @@
 import tkinter as tk
 from game import Game
 from ui import create_ui
-from start_game_dialog import start_game_dialog
+from start_game_dialog import start_game_dialog, offer_resume
 from events import bind_events  # separate drag, undo, restart bindings
+from frames import FrameScheduler
+from sound import preload_sounds
+from journal import close_journal
 
 BOARD_SIZE = 8
 SQUARE_SIZE = 80
 MARGIN = 40
 
 def main():
+    # 0. Decode sounds in the background while the UI comes up
+    preload_sounds()
+
     # 1. Create game state
     game = Game()
 
@@ -19,6 +25,7 @@ def main():
     game.canvas = canvas
     game.turn_label = turn_label
     game.move_log = move_log
+    game.frames = FrameScheduler(game)   # coalesces redraws / drag motion per frame
 
     # 3. Load piece images AFTER root exists
     game.load_pieces()
@@ -26,11 +33,15 @@ def main():
     # 4. Bind all events (drag, undo, restart)
     bind_events(game, canvas, root)
 
-    # 5. Start settings dialog
-    start_game_dialog(game)
+    # 5. Resume an interrupted game, or start settings dialog
+    if not offer_resume(game):
+        start_game_dialog(game)
 
     # 6. Run Tkinter
     root.mainloop()
 
+    # 7. Flush the journal; an unfinished game can be resumed next time
+    close_journal(game)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
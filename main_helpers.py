@@ -1,16 +1,13 @@
 # main_helpers.py
-from draw import redraw
+from frames import request_redraw
 from sound import play_sound
-from helper import is_checkmate
+from helper import is_checkmate, set_promotion
+from history import record_move
 from clock import stop_clock
+from journal import record_position, finish_journal
 import tkinter as tk
 
 
-BOARD_SIZE = 8
-SQUARE_SIZE = 80
-MARGIN = 40
-
-
 # -----------------------------
 # MOVE LOGGING
 # -----------------------------
@@ -28,11 +25,33 @@ def log_move(game,sr, sc, tr, tc, piece):
     if game.current_turn == "black":
         game.move_number += 1
 
+def rebuild_move_log(game):
+    """Rewrite the move log from move_history (after undo / redo / seeking)."""
+    fields = game.start_fen.split()
+    turn = fields[1]
+    number = int(fields[5]) if len(fields) > 5 else 1
+
+    lines = []
+    for record in game.move_history:
+        sr, sc, tr, tc = record_move(record)
+        start = chr(ord('a') + sc) + str(8 - sr)
+        end = chr(ord('a') + tc) + str(8 - tr)
+        lines.append(f"{number}. {start} → {end}\n")
+        if turn == "b":
+            number += 1
+        turn = "b" if turn == "w" else "w"
+
+    game.move_log.config(state="normal")
+    game.move_log.delete(1.0, tk.END)
+    game.move_log.insert(tk.END, "".join(lines))
+    game.move_log.see(tk.END)
+    game.move_log.config(state="disabled")
+
 # -----------------------------
 # PAWN PROMOTION
 # -----------------------------
-def promote_pawn(game, tr, tc):
-    piece = game.board[tr][tc]
+def promote_pawn(game, tr, tc, piece):
+    """make_move has already queened the pawn; let the player pick another piece."""
     if not ((piece == "P" and tr == 0) or (piece == "p" and tr == 7)):
         return
 
@@ -43,10 +62,11 @@ def promote_pawn(game, tr, tc):
     tk.Label(popup, text="Promote to:", font=("Segoe UI", 12)).pack(pady=5)
 
     def choose(new_piece):
-        game.board[tr][tc] = new_piece
+        set_promotion(game, tr, tc, new_piece)
+        record_position(game)
         play_sound("promote")
         popup.destroy()
-        redraw(game, BOARD_SIZE, SQUARE_SIZE, MARGIN, game.pieces)
+        request_redraw(game)
 
     options = ["Q", "R", "B", "N"] if piece.isupper() else ["q", "r", "b", "n"]
     for p in options:
@@ -64,7 +84,18 @@ def promote_pawn(game, tr, tc):
 def show_game_over(game, winner):
     play_sound("game_end")
     stop_clock(game)
+    finish_journal(game)
     game.move_log.config(state="normal")
     game.move_log.insert(tk.END, f"\nCHECKMATE — {winner.upper()} WINS\n")
     game.move_log.see(tk.END)
     game.move_log.config(state="disabled")
+
+
+def show_draw(game, reason):
+    play_sound("game_draw")
+    stop_clock(game)
+    finish_journal(game)
+    game.move_log.config(state="normal")
+    game.move_log.insert(tk.END, f"\nDRAW — {reason.upper()}\n")
+    game.move_log.see(tk.END)
+    game.move_log.config(state="disabled")
@@ -0,0 +1,348 @@
+# mate_solver.py
+# ===============================
+# MATE-IN-N SOLVER (DF-PN)
+# ===============================
+# Depth-first proof-number search over the helper.py rules. The side to
+# move is the attacker: a position is "proven" when every defence runs
+# into mate within the given number of moves and "disproven" as soon as
+# one defence escapes. Unlike alpha-beta, the search always expands the
+# most-proving node, so forcing lines (few replies) are explored first
+# and wide, quiet subtrees are left alone.
+#
+# Proof/disproof numbers live in a bounded table keyed by
+# (Zobrist hash, plies left); when it is full the oldest quarter is
+# dropped and re-derived if needed.
+#
+#   python mate_solver.py puzzles.epd --workers 4 --compare
+#   python mate_solver.py --fen "<FEN>" --moves 3
+#
+# Puzzle files are EPD lines with a "dm N" (mate in N) operation and
+# optionally "bm" (the key move).
+
+import argparse
+import itertools
+import multiprocessing
+import time
+from collections import namedtuple
+
+from ai import search, SearchAborted, TranspositionTable, MATE_SCORE
+from fen import set_epd
+from position import Position
+from helper import make_move, unmake_move, generate_legal_moves, king_in_check
+from san import move_to_san, parse_move
+
+INF = 10 ** 9
+TABLE_SIZE = 1 << 20
+MAX_MOVES = 5
+
+MateResult = namedtuple("MateResult", "moves line sans nodes elapsed")
+
+
+def _other(color):
+    return "black" if color == "white" else "white"
+
+
+class MateSolver:
+    """
+    Reusable solver; the node table persists between calls, so solving
+    mate-in-1, 2, 3 ... of the same position builds on earlier work.
+    """
+
+    def __init__(self, table_size=TABLE_SIZE, node_limit=None):
+        self.table = {}
+        self.table_size = table_size
+        self.node_limit = node_limit
+        self.nodes = 0
+
+    # -----------------------------
+    # TABLE
+    # -----------------------------
+    def _store(self, key, pn, dn):
+        table = self.table
+        if key not in table and len(table) >= self.table_size:
+            for old in list(itertools.islice(table, self.table_size // 4)):
+                del table[old]
+        table[key] = (pn, dn)
+
+    # -----------------------------
+    # SEARCH
+    # -----------------------------
+    def _mid(self, game, color, attacker, plies, thpn, thdn):
+        """Expand the most-proving node until pn >= thpn or dn >= thdn."""
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted
+
+        key = (game.hash_key, plies)
+        or_node = color == attacker
+        moves = generate_legal_moves(game, color)
+
+        if not moves:
+            # Mate is a proof only when the defender is the one mated
+            if not or_node and king_in_check(game, color):
+                pn, dn = 0, INF
+            else:
+                pn, dn = INF, 0
+            self._store(key, pn, dn)
+            return pn, dn
+        if plies == 0:
+            self._store(key, INF, 0)   # out of moves without mate
+            return INF, 0
+
+        child_keys = []
+        for move in moves:
+            make_move(game, *move)
+            child_keys.append((game.hash_key, plies - 1))
+            unmake_move(game)
+
+        table = self.table
+        other = _other(color)
+        while True:
+            values = [table.get(k, (1, 1)) for k in child_keys]
+            if or_node:
+                pn = min(v[0] for v in values)
+                dn = min(INF, sum(v[1] for v in values))
+            else:
+                pn = min(INF, sum(v[0] for v in values))
+                dn = min(v[1] for v in values)
+            if pn >= thpn or dn >= thdn:
+                break
+
+            # Most-proving child, and the threshold that makes it stop as
+            # soon as its sibling becomes the better choice
+            side = 0 if or_node else 1
+            best = min(range(len(values)), key=lambda i: values[i][side])
+            second = min((v[side] for i, v in enumerate(values) if i != best), default=INF)
+            if or_node:
+                child_thpn = min(thpn, second + 1)
+                child_thdn = min(INF, thdn - dn + values[best][1])
+            else:
+                child_thdn = min(thdn, second + 1)
+                child_thpn = min(INF, thpn - pn + values[best][0])
+
+            make_move(game, *moves[best])
+            try:
+                self._mid(game, other, attacker, plies - 1, child_thpn, child_thdn)
+            finally:
+                unmake_move(game)
+
+        self._store(key, pn, dn)
+        return pn, dn
+
+    def _proven(self, game, color, attacker, plies):
+        entry = self.table.get((game.hash_key, plies))
+        if entry is None or (entry[0] and entry[1]):
+            entry = self._mid(game, color, attacker, plies, INF, INF)
+        return entry[0] == 0
+
+    # -----------------------------
+    # FORCED LINE
+    # -----------------------------
+    def _shortest(self, game, color, attacker, plies):
+        """Fewest plies (<= plies, same parity) that still force mate, or None."""
+        for k in range(plies % 2, plies + 1, 2):
+            if self._proven(game, color, attacker, k):
+                return k
+        return None
+
+    def _child_proven(self, game, move, plies):
+        make_move(game, *move)
+        entry = self.table.get((game.hash_key, plies))
+        unmake_move(game)
+        return entry is not None and entry[0] == 0
+
+    def _line(self, game, color, attacker, plies):
+        """Attacker's quickest mate against the defender's longest resistance."""
+        line = []
+        made = 0
+        try:
+            while True:
+                moves = generate_legal_moves(game, color)
+                if not moves:
+                    break
+                if color == attacker:
+                    # Only moves the proof went through need a closer look
+                    moves = [m for m in moves if self._child_proven(game, m, plies - 1)] or moves
+                choice = None
+                for move in moves:
+                    make_move(game, *move)
+                    k = self._shortest(game, _other(color), attacker, plies - 1)
+                    unmake_move(game)
+                    if k is None:
+                        continue
+                    if choice is None or (k < choice[0] if color == attacker else k > choice[0]):
+                        choice = (k, move)
+                k, move = choice
+                line.append(move)
+                make_move(game, *move)
+                made += 1
+                color = _other(color)
+                plies = k
+        finally:
+            for _ in range(made):
+                unmake_move(game)
+        return line
+
+    # -----------------------------
+    # API
+    # -----------------------------
+    def mate_in(self, game, moves):
+        """
+        Forced mate for the side to move in at most `moves` moves, as a
+        list of (sr, sc, tr, tc) moves (attacker first), or None.
+        """
+        game = game.copy()
+        color = game.current_turn
+        if not self._proven(game, color, color, 2 * moves - 1):
+            return None
+        return self._line(game, color, color, 2 * moves - 1)
+
+    def find_mate(self, game, max_moves=MAX_MOVES):
+        """Shortest forced mate up to max_moves: MateResult (line None if none found)."""
+        started = time.perf_counter()
+        self.nodes = 0
+        line = None
+        moves = None
+        for n in range(1, max_moves + 1):
+            line = self.mate_in(game, n)
+            if line is not None:
+                moves = (len(line) + 1) // 2
+                break
+        return MateResult(moves, line, _sans(game, line), self.nodes, time.perf_counter() - started)
+
+
+def _sans(game, line):
+    if line is None:
+        return None
+    game = game.copy()
+    sans = []
+    for move in line:
+        sans.append(move_to_san(game, move))
+        make_move(game, *move)
+    return sans
+
+
+def mate_in(game, moves, node_limit=None, table_size=TABLE_SIZE):
+    """Module-level shortcut for MateSolver().mate_in()."""
+    return MateSolver(table_size, node_limit).mate_in(game, moves)
+
+
+def find_mate(game, max_moves=MAX_MOVES, node_limit=None, table_size=TABLE_SIZE):
+    return MateSolver(table_size, node_limit).find_mate(game, max_moves)
+
+
+# -----------------------------
+# ALPHA-BETA REFERENCE
+# -----------------------------
+def alpha_beta_mate(game, moves, node_limit=None):
+    """
+    (found, nodes, seconds) for the regular search on the same task, with a
+    fresh transposition table so earlier searches don't skew the count.
+    found is False both without a mate and when node_limit ran out first.
+    """
+    # One ply more than the mate: the search only sees "no legal replies"
+    # when it expands the mated side's node
+    started = time.perf_counter()
+    result = search(game, game.current_turn, max_depth=2 * moves, node_limit=node_limit,
+                    tt=TranspositionTable())
+    found = result.score >= MATE_SCORE - 2 * moves
+    return found, result.nodes, time.perf_counter() - started
+
+
+# -----------------------------
+# PUZZLE BATCH (WORKER)
+# -----------------------------
+def verify_puzzle(job):
+    index, line, max_moves, node_limit, compare = job
+    game = Position()
+    ops = set_epd(game, line)
+    moves = int(ops["dm"][0]) if "dm" in ops else max_moves
+    key = {parse_move(game, m)[0] for m in ops.get("bm", [])}
+
+    solver = MateSolver(node_limit=node_limit)
+    try:
+        result = solver.find_mate(game, moves)
+    except SearchAborted:
+        result = MateResult(None, None, None, solver.nodes, 0.0)
+
+    solved = result.line is not None and (not key or result.line[0] in key)
+    record = {
+        "index": index,
+        "id": (ops.get("id") or [f"#{index + 1}"])[0],
+        "solved": solved,
+        "moves": result.moves,
+        "line": " ".join(result.sans) if result.sans else "-",
+        "nodes": result.nodes,
+        "elapsed": result.elapsed,
+    }
+    if compare:
+        game = Position()
+        set_epd(game, line)
+        found, nodes, seconds = alpha_beta_mate(game, moves, node_limit)
+        record.update(ab_found=found, ab_nodes=nodes, ab_elapsed=seconds)
+    return record
+
+
+def run_puzzles(lines, max_moves=MAX_MOVES, node_limit=None, workers=None, compare=False, verbose=True):
+    jobs = [(i, line, max_moves, node_limit, compare) for i, line in enumerate(lines)]
+    started = time.monotonic()
+    results = []
+
+    with multiprocessing.Pool(workers) as pool:
+        for r in pool.imap_unordered(verify_puzzle, jobs):
+            results.append(r)
+            if verbose:
+                mark = "ok " if r["solved"] else "-- "
+                text = f"{mark}{r['id']:<16} {r['line']:<40} {r['nodes']:>8} nodes {r['elapsed']:6.2f}s"
+                if compare:
+                    text += (f"  | alpha-beta {'ok' if r['ab_found'] else '--'} "
+                             f"{r['ab_nodes']:>8} nodes {r['ab_elapsed']:6.2f}s")
+                print(text)
+
+    results.sort(key=lambda r: r["index"])
+    return results, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mate-in-N solver (df-pn)")
+    parser.add_argument("puzzles", nargs="?", help='EPD file with "dm N" (and optional "bm")')
+    parser.add_argument("--fen", help="solve a single position instead")
+    parser.add_argument("--moves", type=int, default=MAX_MOVES, help="mate in at most this many moves")
+    parser.add_argument("--nodes", type=int, help="node limit per puzzle")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--compare", action="store_true", help="also time alpha-beta on each puzzle")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args()
+
+    if args.fen:
+        game = Position(args.fen)
+        result = find_mate(game, args.moves, args.nodes)
+        if result.line is None:
+            print(f"No mate in {args.moves} ({result.nodes} nodes, {result.elapsed:.2f} s)")
+        else:
+            print(f"Mate in {result.moves}: {' '.join(result.sans)} "
+                  f"({result.nodes} nodes, {result.elapsed:.2f} s)")
+        return
+
+    if not args.puzzles:
+        parser.error("give a puzzle file or --fen")
+
+    with open(args.puzzles, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    results, wall = run_puzzles(lines, args.moves, args.nodes, args.workers, args.compare,
+                                verbose=not args.quiet)
+    solved = sum(r["solved"] for r in results)
+    nodes = sum(r["nodes"] for r in results)
+    seconds = sum(r["elapsed"] for r in results)
+    print(f"\nVerified {solved}/{len(results)} puzzles, {nodes} nodes, "
+          f"{seconds:.1f} s CPU, {wall:.1f} s wall")
+    if args.compare:
+        ab_found = sum(r["ab_found"] for r in results)
+        ab_nodes = sum(r["ab_nodes"] for r in results)
+        ab_seconds = sum(r["ab_elapsed"] for r in results)
+        print(f"alpha-beta: {ab_found}/{len(results)} found, {ab_nodes} nodes, {ab_seconds:.1f} s CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# navigation.py
+# ===============================
+# GAME NAVIGATION (SEEK TO ANY PLY)
+# ===============================
+# The game line is move_history (played) followed by redo_history (undone,
+# top of the stack = next move). Moving along it is an unmake / redo per
+# ply; to keep long jumps cheap, a full-state checkpoint is kept every
+# CHECKPOINT_INTERVAL plies, so seeking anywhere restores the nearest
+# checkpoint and replays fewer than CHECKPOINT_INTERVAL moves.
+#
+# Memory: the moves themselves stay 8-byte records (history.py) plus the
+# 8-byte hash before each undone move (redo_hashes, needed to restore
+# hash_history when jumping forward); checkpoints are one small tuple per
+# CHECKPOINT_INTERVAL plies.
+
+from position import Position
+from helper import unmake_move, redo_move
+
+CHECKPOINT_INTERVAL = 16
+
+
+# -----------------------------
+# CHECKPOINTS
+# -----------------------------
+def _snapshot(game):
+    return (
+        "".join("".join(row) for row in game.board),
+        game.current_turn,
+        game.en_passant_target,
+        game.white_king_moved,
+        game.black_king_moved,
+        (game.white_rook_moved["left"], game.white_rook_moved["right"]),
+        (game.black_rook_moved["left"], game.black_rook_moved["right"]),
+        game.move_number,
+        game.halfmove_clock,
+        game.hash_key,
+    )
+
+
+def _load_snapshot(game, snap):
+    squares, turn, ep, wk, bk, wr, br, number, halfmove, key = snap
+    game.board = [list(squares[i:i + 8]) for i in range(0, 64, 8)]
+    game.current_turn = turn
+    game.en_passant_target = ep
+    game.white_king_moved = wk
+    game.black_king_moved = bk
+    game.white_rook_moved = {"left": wr[0], "right": wr[1]}
+    game.black_rook_moved = {"left": br[0], "right": br[1]}
+    game.move_number = number
+    game.halfmove_clock = halfmove
+    game.hash_key = key
+
+
+def _checkpoint(game):
+    ply = len(game.move_history)
+    if ply % CHECKPOINT_INTERVAL == 0 and ply not in game.checkpoints:
+        game.checkpoints[ply] = _snapshot(game)
+
+
+def _start_snapshot(game):
+    return _snapshot(Position(game.start_fen))
+
+
+def _hash_at(game, ply):
+    """Hash of the position at ply, if known without replaying."""
+    current = len(game.move_history)
+    if ply < current:
+        return game.hash_history[ply]
+    if ply == current:
+        return game.hash_key
+    if len(game.redo_hashes) != len(game.redo_history):
+        return None
+    index = len(game.redo_hashes) - 1 - (ply - current)
+    return game.redo_hashes[index] if index >= 0 else None
+
+
+def _prune(game):
+    """Drop checkpoints that are off the line or no longer match it."""
+    length = line_length(game)
+    for ply, snap in list(game.checkpoints.items()):
+        if ply > length:
+            del game.checkpoints[ply]
+            continue
+        key = _hash_at(game, ply)
+        if key is not None and key != snap[-1]:
+            del game.checkpoints[ply]
+
+
+def clear_line(game):
+    """Forget the undone moves and checkpoints (after a new position is loaded)."""
+    del game.redo_history[:]
+    del game.redo_hashes[:]
+    game.checkpoints.clear()
+
+
+def new_move(game):
+    """
+    Call after a move is played on the board (not one replayed from the
+    line) and the turn has passed: the old continuation and its
+    checkpoints are dropped.
+    """
+    del game.redo_history[:]
+    del game.redo_hashes[:]
+    ply = len(game.move_history)
+    for p in [p for p in game.checkpoints if p >= ply]:
+        del game.checkpoints[p]
+    _checkpoint(game)
+
+
+# -----------------------------
+# STEPS
+# -----------------------------
+def line_length(game):
+    return len(game.move_history) + len(game.redo_history)
+
+
+def current_ply(game):
+    return len(game.move_history)
+
+
+def step_back(game):
+    """Undo one ply, keeping it for step_forward. Returns the record or None."""
+    record = unmake_move(game)
+    if record is None:
+        return None
+    game.redo_history.append(record)
+    game.redo_hashes.append(game.hash_key)
+
+    game.current_turn = "black" if game.current_turn == "white" else "white"
+    if game.current_turn == "black":
+        game.move_number = max(1, game.move_number - 1)
+    return record
+
+
+def step_forward(game):
+    """Replay the next ply of the line. Returns the record or None."""
+    if not game.redo_history:
+        return None
+    record = game.redo_history.pop()
+    if len(game.redo_hashes) > len(game.redo_history):
+        game.redo_hashes.pop()
+    redo_move(game, record)
+
+    if game.current_turn == "black":
+        game.move_number += 1
+    game.current_turn = "black" if game.current_turn == "white" else "white"
+    _checkpoint(game)
+    return record
+
+
+# -----------------------------
+# SEEK
+# -----------------------------
+def _restore(game, ply, snap):
+    """Jump to a checkpoint, moving records between the two stacks."""
+    current = len(game.move_history)
+    if ply < current:
+        game.redo_history.extend(game.move_history[ply:][::-1])
+        game.redo_hashes.extend(game.hash_history[ply:][::-1])
+        del game.move_history[ply:]
+        del game.hash_history[ply:]
+    elif ply > current:
+        count = ply - current
+        game.move_history.extend(game.redo_history[-count:][::-1])
+        game.hash_history.extend(game.redo_hashes[-count:][::-1])
+        del game.redo_history[-count:]
+        del game.redo_hashes[-count:]
+    _load_snapshot(game, snap)
+
+
+def seek(game, ply):
+    """
+    Move to `ply` (0 = start position) of the current line; out-of-range
+    values are clamped. Returns the number of moves replayed or undone.
+    """
+    ply = max(0, min(ply, line_length(game)))
+    current = len(game.move_history)
+    if ply == current:
+        return 0
+
+    _prune(game)
+    if 0 not in game.checkpoints:
+        game.checkpoints[0] = _start_snapshot(game)
+
+    # Checkpoints past the current ply are only usable while the hashes of
+    # the undone moves are known
+    synced = len(game.redo_hashes) == len(game.redo_history)
+    base = max(
+        (p for p in game.checkpoints if p <= ply and (p <= current or synced)),
+        default=None,
+    )
+    cost = abs(ply - current)
+    if base is not None and ply - base < cost:
+        _restore(game, base, game.checkpoints[base])
+        cost = ply - base
+
+    while len(game.move_history) > ply:
+        step_back(game)
+    while len(game.move_history) < ply:
+        step_forward(game)
+    return cost
+
+
+def seek_first(game):
+    return seek(game, 0)
+
+
+def seek_prev(game):
+    return seek(game, current_ply(game) - 1)
+
+
+def seek_next(game):
+    return seek(game, current_ply(game) + 1)
+
+
+def seek_last(game):
+    return seek(game, line_length(game))
@@ -0,0 +1,268 @@
+# opening_db.py
+# ===============================
+# OPENING EXPLORER DATABASE
+# ===============================
+# Replays PGN games through helper.make_move and stores, for every position
+# hash, which moves were played there and how they scored:
+#
+#   position_moves(hash, move, white, draws, black)
+#
+# The table is WITHOUT ROWID with PRIMARY KEY (hash, move), so the primary
+# key B-tree is itself a covering index: looking up a position is a single
+# range scan with no table lookups.
+#
+# Ingestion is split into shards (game index % shards) that run in separate
+# processes. Each shard flushes its counts in batches, and the same
+# transaction records how many of its games are done, so an interrupted
+# ingest resumes where it stopped without double counting. A file keeps the
+# shard count it was first ingested with, so resuming with a different
+# --workers (or on another machine) still skips exactly the games done.
+#
+#   python opening_db.py ingest games.sqlite archive.pgn --workers 4
+#   python opening_db.py query games.sqlite --moves "e4 c5 Nf3"
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import time
+
+from fen import START_FEN, parse_square, square_name
+from position import Position
+from helper import make_move
+from pgn import read_games, replay_game
+from san import parse_san, move_to_san
+from zobrist import position_hash, signed64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS position_moves (
+    hash  INTEGER NOT NULL,
+    move  TEXT    NOT NULL,
+    white INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    black INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (hash, move)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ingest_progress (
+    source     TEXT    NOT NULL,
+    shard      INTEGER NOT NULL,
+    shards     INTEGER NOT NULL,
+    games_done INTEGER NOT NULL,
+    PRIMARY KEY (source, shard, shards)
+);
+"""
+
+UPSERT = """
+INSERT INTO position_moves (hash, move, white, draws, black)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (hash, move) DO UPDATE SET
+    white = white + excluded.white,
+    draws = draws + excluded.draws,
+    black = black + excluded.black
+"""
+
+# PGN result -> index into the (white, draws, black) counters
+RESULT_COLUMN = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+
+
+def connect(path):
+    conn = sqlite3.connect(path, timeout=120)
+    conn.execute("PRAGMA journal_mode=WAL")     # readers never block the writers
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def move_uci(move, promotion=None):
+    return square_name(*move[:2]) + square_name(*move[2:]) + (promotion or "")
+
+
+# -----------------------------
+# INGESTION
+# -----------------------------
+def _flush(conn, pending, source, shard, shards, games_done):
+    rows = [(h, move, *counts) for (h, move), counts in pending.items()]
+    with conn:  # one transaction: counts and progress land together
+        conn.executemany(UPSERT, rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO ingest_progress VALUES (?, ?, ?, ?)",
+            (source, shard, shards, games_done),
+        )
+    pending.clear()
+
+
+def ingest_shard(job):
+    """
+    Worker: ingest every game of one PGN file whose index % shards == shard.
+    Returns (games, positions, skipped games).
+    """
+    db_path, pgn_path, shard, shards, batch_games, max_plies = job
+    source = os.path.abspath(pgn_path)
+    conn = connect(db_path)
+
+    row = conn.execute(
+        "SELECT games_done FROM ingest_progress WHERE source=? AND shard=? AND shards=?",
+        (source, shard, shards),
+    ).fetchone()
+    games_done = row[0] if row else 0
+
+    game = Position()
+    pending = {}
+    games = positions = skipped = 0
+    shard_index = 0
+    unflushed = 0
+
+    for index, pgn_game in enumerate(read_games(pgn_path)):
+        if index % shards != shard:
+            continue
+        shard_index += 1
+        if shard_index <= games_done:
+            continue  # already ingested before a restart
+
+        column = RESULT_COLUMN.get(pgn_game.result)
+        seen = []
+        if column is not None:
+            try:
+                for ply, (move, promotion) in enumerate(replay_game(pgn_game, game)):
+                    if max_plies is not None and ply >= max_plies:
+                        break
+                    seen.append((signed64(game.hash_key), move_uci(move, promotion)))
+            except ValueError:
+                seen = None
+
+        if not seen:
+            skipped += 1
+        else:
+            for key in seen:
+                counts = pending.get(key)
+                if counts is None:
+                    counts = pending[key] = [0, 0, 0]
+                counts[column] += 1
+            games += 1
+            positions += len(seen)
+
+        unflushed += 1
+        if unflushed >= batch_games:
+            _flush(conn, pending, source, shard, shards, shard_index)
+            unflushed = 0
+
+    _flush(conn, pending, source, shard, shards, shard_index)
+    conn.close()
+    return games, positions, skipped
+
+
+def _source_shards(conn, pgn_path, default):
+    """Shard count a file's recorded progress uses (default if none yet)."""
+    rows = conn.execute(
+        "SELECT DISTINCT shards FROM ingest_progress WHERE source=?",
+        (os.path.abspath(pgn_path),),
+    ).fetchall()
+    if len(rows) > 1:
+        raise ValueError(f"{pgn_path}: progress recorded with several shard counts")
+    return rows[0][0] if rows else default
+
+
+def ingest(db_path, pgn_paths, workers=None, batch_games=2000, max_plies=None):
+    """
+    Ingest PGN files with `workers` processes. Safe to re-run after a crash,
+    with any number of workers: a partly ingested file is resumed with the
+    shard count it was started with.
+    """
+    workers = workers or os.cpu_count() or 1
+    conn = connect(db_path)  # create the schema once, before the workers race
+    try:
+        shards = {path: _source_shards(conn, path, workers) for path in pgn_paths}
+    finally:
+        conn.close()
+
+    jobs = [
+        (db_path, path, shard, shards[path], batch_games, max_plies)
+        for path in pgn_paths
+        for shard in range(shards[path])
+    ]
+    totals = [0, 0, 0]
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(ingest_shard, jobs):
+            totals = [a + b for a, b in zip(totals, result)]
+    return tuple(totals)
+
+
+# -----------------------------
+# QUERIES
+# -----------------------------
+def query_position(conn, game):
+    """
+    Move statistics for the position of `game` (side to move included),
+    most played first. Each entry is a dict with san, games, white, draws,
+    black and score (from the mover's point of view).
+    """
+    rows = conn.execute(
+        "SELECT move, white, draws, black FROM position_moves WHERE hash = ?",
+        (signed64(position_hash(game)),),
+    ).fetchall()
+
+    stats = []
+    for uci, white, draws, black in rows:
+        move = parse_square(uci[0:2]) + parse_square(uci[2:4])
+        promotion = uci[4:] or None
+        total = white + draws + black
+        wins = white if game.current_turn == "white" else black
+        stats.append({
+            "san": move_to_san(game, move, promotion),
+            "move": move,
+            "games": total,
+            "white": white,
+            "draws": draws,
+            "black": black,
+            "score": (wins + draws / 2) / total if total else 0.0,
+        })
+
+    stats.sort(key=lambda s: s["games"], reverse=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opening explorer database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="add PGN files to the database (resumable)")
+    p.add_argument("db")
+    p.add_argument("pgn", nargs="+")
+    p.add_argument("--workers", type=int, help="processes (default: all cores)")
+    p.add_argument("--batch", type=int, default=2000, help="games per transaction")
+    p.add_argument("--max-plies", type=int, help="only index the first N plies of each game")
+
+    q = sub.add_parser("query", help="show move statistics for a position")
+    q.add_argument("db")
+    q.add_argument("--fen", default=START_FEN)
+    q.add_argument("--moves", default="", help="SAN moves played from --fen")
+
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        started = time.perf_counter()
+        games, positions, skipped = ingest(args.db, args.pgn, args.workers, args.batch, args.max_plies)
+        seconds = time.perf_counter() - started
+        print(f"{games} games, {positions} positions ({skipped} skipped) in {seconds:.1f} s "
+              f"- {games / seconds:.0f} games/s")
+        return
+
+    game = Position(args.fen)
+    for san in args.moves.split():
+        move, promotion = parse_san(game, san)
+        make_move(game, *move, promotion)
+        game.current_turn = "black" if game.current_turn == "white" else "white"
+
+    conn = connect(args.db)
+    started = time.perf_counter()
+    stats = query_position(conn, game)
+    ms = (time.perf_counter() - started) * 1000
+
+    for s in stats:
+        print(f"{s['san']:<8} {s['games']:>8}  +{s['white']} ={s['draws']} -{s['black']}  {s['score']:.1%}")
+    print(f"{len(stats)} moves in {ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
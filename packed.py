@@ -0,0 +1,307 @@
+# packed.py
+# ===============================
+# PACKED POSITIONS & DATASETS
+# ===============================
+# A position packed into 32 bytes:
+#
+#   bytes  0-7   occupancy bitmask, bit n = square n (a8 = 0 ... h1 = 63)
+#   bytes  8-23  piece codes of the occupied squares in square order,
+#                4 bits each (history.PIECE_CODES), low nibble first
+#   byte  24     bit 0 side to move (1 = black), bits 1-4 castling KQkq
+#   byte  25     en passant file + 1 (0 = none)
+#   byte  26     halfmove clock (capped at 255)
+#   bytes 27-28  fullmove number (little-endian)
+#   bytes 29-31  zero
+#
+# encode() / decode() work on whole NumPy batches: boards are (N, 64) int8
+# arrays of piece codes. A dataset file is a 64-byte header followed by
+# fixed-size records (packed position, result, engine score, game number)
+# and is opened with numpy.memmap, so millions of positions are randomly
+# accessible with no parse step and no copy.
+#
+#   python packed.py build archive.pgn games.cpos
+#   python packed.py info games.cpos
+#   python packed.py show games.cpos 123456
+
+import argparse
+import struct
+import time
+
+import numpy as np
+
+from fen import castling_rights, set_fen, square_name
+from position import Position
+from history import PIECE_CODES, PIECE_INDEX
+from pgn import read_games, replay_game
+
+PACKED_SIZE = 32
+MAGIC = b"CHESSPOS"
+VERSION = 1
+HEADER_SIZE = 64
+HEADER = struct.Struct("<8sIIQ")          # magic, version, record size, count
+
+NO_SCORE = -32768
+RESULT_CODES = {"1-0": 2, "1/2-1/2": 1, "0-1": 0}   # white's score * 2, -1 = unknown
+
+RECORD_DTYPE = np.dtype([
+    ("position", np.uint8, PACKED_SIZE),
+    ("score", "<i2"),       # centipawns, white's point of view (NO_SCORE = none)
+    ("result", np.int8),    # RESULT_CODES
+    ("pad", np.uint8),
+    ("game", "<u4"),        # index of the source game
+])
+
+CASTLING_BITS = {"K": 2, "Q": 4, "k": 8, "q": 16}
+
+
+# -----------------------------
+# SCALAR <-> ARRAYS
+# -----------------------------
+def board_array(game):
+    """game.board as 64 int8 piece codes."""
+    return np.array([PIECE_INDEX[p] for row in game.board for p in row], dtype=np.int8)
+
+
+def game_fields(game):
+    """(flags, en passant file + 1, halfmove clock, fullmove number) of game."""
+    flags = game.current_turn == "black"
+    for right in castling_rights(game).strip("-"):
+        flags |= CASTLING_BITS[right]
+    ep = game.en_passant_target
+    return flags, ep[1] + 1 if ep else 0, game.halfmove_clock, game.move_number
+
+
+# -----------------------------
+# VECTORISED ENCODE / DECODE
+# -----------------------------
+def encode(boards, flags, ep, halfmove, fullmove):
+    """
+    boards: (N, 64) piece codes; the other arguments are length-N arrays.
+    Returns an (N, 32) uint8 array of packed positions.
+    """
+    boards = np.asarray(boards, dtype=np.uint8).reshape(-1, 64)
+    n = len(boards)
+    out = np.zeros((n, PACKED_SIZE), dtype=np.uint8)
+
+    occupied = boards != 0
+    out[:, 0:8] = np.packbits(occupied, axis=1, bitorder="little")
+
+    # Occupied squares first (stable, so still in square order), then 0s
+    order = np.argsort(~occupied, axis=1, kind="stable")[:, :32]
+    codes = np.take_along_axis(boards, order, axis=1)
+    out[:, 8:24] = codes[:, 0::2] | (codes[:, 1::2] << 4)
+
+    out[:, 24] = flags
+    out[:, 25] = ep
+    out[:, 26] = np.minimum(halfmove, 255)
+    fullmove = np.asarray(fullmove, dtype=np.uint16)
+    out[:, 27] = fullmove & 0xFF
+    out[:, 28] = fullmove >> 8
+    return out
+
+
+def decode(packed):
+    """
+    (N, 32) packed positions -> (boards (N, 64) int8, flags, ep, halfmove,
+    fullmove).
+    """
+    packed = np.asarray(packed, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+    occupied = np.unpackbits(packed[:, 0:8], axis=1, bitorder="little").astype(bool)
+
+    nibbles = packed[:, 8:24]
+    codes = np.empty((len(packed), 32), dtype=np.uint8)
+    codes[:, 0::2] = nibbles & 0x0F
+    codes[:, 1::2] = nibbles >> 4
+
+    # The k-th occupied square takes the k-th code
+    rank = np.clip(np.cumsum(occupied, axis=1) - 1, 0, 31)
+    boards = np.where(occupied, np.take_along_axis(codes, rank, axis=1), 0).astype(np.int8)
+
+    fullmove = packed[:, 27].astype(np.uint16) | packed[:, 28].astype(np.uint16) << 8
+    return boards, packed[:, 24].copy(), packed[:, 25].copy(), packed[:, 26].copy(), fullmove
+
+
+def pack_game(game):
+    """One game position -> 32 bytes."""
+    flags, ep, halfmove, fullmove = game_fields(game)
+    return encode(board_array(game)[None], [flags], [ep], [halfmove], [fullmove])[0].tobytes()
+
+
+def packed_fen(packed):
+    """FEN of one packed position (bytes or a 32-byte array)."""
+    boards, flags, ep, halfmove, fullmove = decode(np.frombuffer(bytes(packed), dtype=np.uint8))
+    board, flags, ep = boards[0], int(flags[0]), int(ep[0])
+
+    ranks = []
+    for r in range(8):
+        rank, empty = "", 0
+        for c in range(8):
+            piece = PIECE_CODES[board[r * 8 + c]]
+            if piece == ".":
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            rank += piece
+        ranks.append(rank + (str(empty) if empty else ""))
+
+    black = flags & 1
+    rights = "".join(right for right, bit in CASTLING_BITS.items() if flags & bit) or "-"
+    ep_square = square_name(2 if not black else 5, ep - 1) if ep else "-"
+    return (f"{'/'.join(ranks)} {'b' if black else 'w'} {rights} {ep_square} "
+            f"{int(halfmove[0])} {int(fullmove[0])}")
+
+
+def unpack_game(packed, game=None):
+    """Load a packed position into game (a new Position by default)."""
+    if game is None:
+        return Position(packed_fen(packed))
+    set_fen(game, packed_fen(packed))
+    return game
+
+
+# -----------------------------
+# DATASET FILES
+# -----------------------------
+class DatasetWriter:
+    """Append records to a dataset file; the header count is written on close."""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.count = 0
+        self._write_header()
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, self.count).ljust(HEADER_SIZE, b"\0"))
+
+    def append(self, positions, results=None, scores=None, games=None):
+        """positions: (N, 32) packed; the other columns default to unknown."""
+        positions = np.asarray(positions, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+        records = np.zeros(len(positions), dtype=RECORD_DTYPE)
+        records["position"] = positions
+        records["result"] = -1 if results is None else results
+        records["score"] = NO_SCORE if scores is None else scores
+        if games is not None:
+            records["game"] = games
+        self.file.seek(0, 2)
+        records.tofile(self.file)
+        self.count += len(records)
+
+    def close(self):
+        self._write_header()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, version, record_size, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a packed position dataset")
+    if version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported dataset version {version}")
+    return count
+
+
+def open_dataset(path, mode="r"):
+    """The records of a dataset file as a memory-mapped structured array."""
+    count = read_header(path)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode=mode, offset=HEADER_SIZE, shape=(count,))
+
+
+def build_dataset(pgn_paths, out_path, chunk=65536, verbose=True):
+    """Every position of every valid game, labelled with the game result."""
+    boards = np.zeros((chunk, 64), dtype=np.int8)
+    fields = np.zeros((chunk, 4), dtype=np.int32)
+    results = np.zeros(chunk, dtype=np.int8)
+    games = np.zeros(chunk, dtype=np.uint32)
+    filled = index = 0
+    started = time.perf_counter()
+    game = Position()
+
+    with DatasetWriter(out_path) as writer:
+
+        def flush():
+            nonlocal filled
+            f = fields[:filled]
+            writer.append(encode(boards[:filled], f[:, 0], f[:, 1], f[:, 2], f[:, 3]),
+                          results[:filled], None, games[:filled])
+            filled = 0
+
+        for path in pgn_paths:
+            for pgn_game in read_games(path):
+                rows = []
+                try:
+                    for _ in replay_game(pgn_game, game):
+                        rows.append((board_array(game), game_fields(game)))
+                except ValueError:
+                    index += 1
+                    continue
+                rows.append((board_array(game), game_fields(game)))
+
+                result = RESULT_CODES.get(pgn_game.result, -1)
+                for board, row_fields in rows:
+                    boards[filled] = board
+                    fields[filled] = row_fields
+                    results[filled] = result
+                    games[filled] = index
+                    filled += 1
+                    if filled == chunk:
+                        flush()
+                index += 1
+                if verbose and index % 1000 == 0:
+                    print(f"{index} games, {writer.count + filled} positions, "
+                          f"{(writer.count + filled) / (time.perf_counter() - started):.0f} positions/s")
+        flush()
+        return writer.count
+
+
+def benchmark(path, sample=1_000_000, seed=0):
+    """Random-access decode throughput on a dataset (positions/second)."""
+    data = open_dataset(path)
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(data), size=min(sample, len(data)))
+    started = time.perf_counter()
+    decode(data["position"][index])
+    return len(index) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Packed position datasets")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="PGN archive -> dataset file")
+    p.add_argument("pgn", nargs="+")
+    p.add_argument("out")
+
+    p = sub.add_parser("info", help="record count and random-access decode speed")
+    p.add_argument("dataset")
+
+    p = sub.add_parser("show", help="print one position as FEN")
+    p.add_argument("dataset")
+    p.add_argument("index", type=int)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_dataset(args.pgn, args.out)
+        print(f"{count} positions written to {args.out}")
+    elif args.command == "info":
+        data = open_dataset(args.dataset)
+        print(f"{len(data)} positions, {data.dtype.itemsize} bytes each")
+        if len(data):
+            print(f"random-access decode: {benchmark(args.dataset):.0f} positions/s")
+    else:
+        record = open_dataset(args.dataset)[args.index]
+        result = {2: "1-0", 1: "1/2-1/2", 0: "0-1"}.get(int(record["result"]), "*")
+        print(packed_fen(record["position"]), f"(game {int(record['game'])}, {result})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# pgn.py
+# ===============================
+# PGN READER / WRITER
+# ===============================
+# The reader is a generator: it walks the file line by line and yields one
+# game at a time, so multi-gigabyte archives are read in constant memory.
+# Moves are kept as SAN until replay_game() checks them against the rules.
+#
+#   python pgn.py archive.pgn          # games/second and plies/second
+
+import argparse
+import re
+import time
+from collections import namedtuple
+
+from fen import START_FEN, set_fen
+from position import Position
+from helper import make_move, is_checkmate
+from history import unpack_record
+from san import parse_san, move_to_san
+
+PgnGame = namedtuple("PgnGame", "headers moves result")
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+TAG_RE = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN_RE = re.compile(r'\{|\}|\(|\)|;|\$\d+|[^\s{}();]+')
+MOVE_NUMBER_RE = re.compile(r"^\d+\.+")
+ESCAPE_RE = re.compile(r"\\(.)")
+
+
+# -----------------------------
+# READING
+# -----------------------------
+def iter_games(f):
+    """
+    Yield a PgnGame(headers, moves, result) for every game in an open
+    text file. Comments, NAGs and variations are skipped.
+    """
+    headers, moves, result = {}, [], None
+    in_comment = False
+    variation_depth = 0
+
+    for line in f:
+        if in_comment:
+            end = line.find("}")
+            if end < 0:
+                continue
+            in_comment = False
+            line = line[end + 1:]
+
+        stripped = line.strip()
+        if not stripped or stripped.startswith("%"):
+            continue
+
+        if stripped.startswith("[") and variation_depth == 0:
+            m = TAG_RE.match(stripped)
+            if m:
+                # A tag after movetext without a result: previous game ends here
+                if moves:
+                    yield PgnGame(headers, moves, result or "*")
+                    headers, moves, result = {}, [], None
+                headers[m.group(1)] = ESCAPE_RE.sub(r"\1", m.group(2))
+                continue
+
+        for token in TOKEN_RE.findall(line):
+            if in_comment:
+                if token == "}":
+                    in_comment = False
+                continue
+            if token == "{":
+                in_comment = True
+            elif token == ";":
+                break  # rest-of-line comment
+            elif token == "(":
+                variation_depth += 1
+            elif token == ")":
+                variation_depth = max(0, variation_depth - 1)
+            elif variation_depth or token[0] == "$":
+                continue
+            elif token in RESULTS:
+                yield PgnGame(headers, moves, token)
+                headers, moves, result = {}, [], None
+            else:
+                token = MOVE_NUMBER_RE.sub("", token)
+                if token:
+                    moves.append(token)
+
+    if moves or headers:
+        yield PgnGame(headers, moves, result or headers.get("Result", "*"))
+
+
+def read_games(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        yield from iter_games(f)
+
+
+def replay_game(pgn_game, game=None):
+    """
+    Play a PgnGame's moves through the rules engine, yielding
+    (move, promotion) before each move is made on `game`.
+    Raises ValueError on the first illegal or unparsable move.
+    """
+    if game is None:
+        game = Position()
+    set_fen(game, pgn_game.headers.get("FEN", START_FEN))
+
+    for san in pgn_game.moves:
+        move, promotion = parse_san(game, san)
+        yield move, promotion
+        make_move(game, *move, promotion)
+        if game.current_turn == "black":
+            game.move_number += 1
+        game.current_turn = "black" if game.current_turn == "white" else "white"
+
+
+def load_game(pgn_game, game=None):
+    """Replay a whole PgnGame and return the resulting Position."""
+    if game is None:
+        game = Position()
+    for _ in replay_game(pgn_game, game):
+        pass
+    return game
+
+
+# -----------------------------
+# WRITING
+# -----------------------------
+def game_sans(game):
+    """SAN of every move in game.move_history, replayed from game.start_fen."""
+    board = Position(game.start_fen)
+    sans = []
+
+    for record in game.move_history:
+        m = unpack_record(record)
+        move = (m.sr, m.sc, m.tr, m.tc)
+        promotion = m.promoted.lower() if m.promoted else None
+        sans.append(move_to_san(board, move, promotion))
+        make_move(board, *move, promotion)
+        board.current_turn = "black" if board.current_turn == "white" else "white"
+
+    return sans
+
+
+def game_result(game):
+    if is_checkmate(game, game.current_turn):
+        return "0-1" if game.current_turn == "white" else "1-0"
+    return "*"
+
+
+def _tag_value(value):
+    """Tag value with backslashes and quotes escaped, as PGN requires."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def format_pgn(headers, sans, result="*", start_fen=START_FEN, width=79):
+    """PGN text for one game: tag pairs, then wrapped movetext."""
+    headers = dict(headers)
+    headers["Result"] = result
+    if start_fen != START_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = start_fen
+
+    lines = []
+    for tag in SEVEN_TAG_ROSTER:
+        lines.append(f'[{tag} "{_tag_value(headers.pop(tag, "?"))}"]')
+    for tag, value in headers.items():
+        lines.append(f'[{tag} "{_tag_value(value)}"]')
+    lines.append("")
+
+    fields = start_fen.split()
+    white_to_move = fields[1] == "w"
+    number = int(fields[5]) if len(fields) > 5 else 1
+
+    tokens = []
+    for i, san in enumerate(sans):
+        if white_to_move:
+            tokens.append(f"{number}.")
+        elif i == 0:
+            tokens.append(f"{number}...")
+        tokens.append(san)
+        if not white_to_move:
+            number += 1
+        white_to_move = not white_to_move
+    tokens.append(result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+
+    return "\n".join(lines) + "\n\n"
+
+
+def write_pgn(f, headers, sans, result="*", start_fen=START_FEN):
+    f.write(format_pgn(headers, sans, result, start_fen))
+
+
+def export_game(game, path, headers=None):
+    """Append the current game (from its start position) to a PGN file."""
+    headers = dict(headers or {})
+    headers.setdefault("Event", "Python Chess game")
+    headers.setdefault("Date", time.strftime("%Y.%m.%d"))
+
+    with open(path, "a", encoding="utf-8") as f:
+        write_pgn(f, headers, game_sans(game), game_result(game), game.start_fen)
+
+
+# -----------------------------
+# THROUGHPUT
+# -----------------------------
+def benchmark(path, validate=True):
+    """Stream a PGN file and return (games, plies, bad games, seconds)."""
+    games = plies = bad = 0
+    started = time.perf_counter()
+
+    for pgn_game in read_games(path):
+        games += 1
+        if validate:
+            try:
+                for _ in replay_game(pgn_game):
+                    plies += 1
+            except ValueError:
+                bad += 1
+        else:
+            plies += len(pgn_game.moves)
+
+    return games, plies, bad, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a PGN file and report reader throughput")
+    parser.add_argument("pgn", help="PGN file")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="only tokenize, don't replay moves through the rules")
+    args = parser.parse_args()
+
+    games, plies, bad, seconds = benchmark(args.pgn, validate=not args.no_validate)
+    print(f"{games} games, {plies} plies in {seconds:.2f} s")
+    print(f"{games / seconds:.1f} games/s, {plies / seconds:.0f} plies/s"
+          + (f", {bad} games with illegal moves" if bad else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# position.py
+# ===============================
+# POSITION (RULES STATE ONLY)
+# ===============================
+# Everything the rules and the engine read or write - board, side to move,
+# castling flags, en passant square, clocks, Zobrist hash and the move /
+# hash history - and nothing else: no widgets, sprites, clocks or threads.
+# The helper.py rules, search and tools all work on a Position; the UI's
+# Game holds one and forwards these attributes to it.
+#
+# __slots__ keeps instances small and attribute access fast; copy() is a
+# handful of list/array copies, and pickling goes through to_bytes(), so a
+# Position can be handed to a worker process with its full history
+# (repetitions included):
+#
+#   header   struct HEADER: 32 bytes of 4-bit piece codes (a8 first, low
+#            nibble first), side to move, castling flags
+#            (history.castling_bits), en passant square + 1, halfmove
+#            clock, move number, hash, history lengths, start FEN length
+#   body     move_history and hash_history (little-endian uint64 each),
+#            then start_fen (UTF-8)
+
+import struct
+import sys
+
+from fen import START_FEN, get_fen, set_fen
+from history import PIECE_CODES, PIECE_INDEX, new_history, castling_bits, restore_castling
+from zobrist import position_hash
+
+HEADER = struct.Struct("<32sBBBHHQIIH")
+
+
+class Position:
+    __slots__ = (
+        "board",
+        "current_turn",
+        "en_passant_target",
+        "white_king_moved",
+        "black_king_moved",
+        "white_rook_moved",
+        "black_rook_moved",
+        "move_number",
+        "halfmove_clock",
+        "hash_key",
+        "move_history",
+        "hash_history",
+        "start_fen",
+    )
+
+    def __init__(self, fen=None):
+        self.board = [
+            list("rnbqkbnr"),
+            list("pppppppp"),
+            list("........"),
+            list("........"),
+            list("........"),
+            list("........"),
+            list("PPPPPPPP"),
+            list("RNBQKBNR")
+        ]
+        self.current_turn = "white"
+        self.en_passant_target = None
+        self.white_king_moved = False
+        self.black_king_moved = False
+        self.white_rook_moved = {"left": False, "right": False}
+        self.black_rook_moved = {"left": False, "right": False}
+        self.move_number = 1
+        self.halfmove_clock = 0   # plies since the last capture or pawn move
+
+        # Zobrist hash of the current position, plus the hash before every
+        # move of move_history (maintained by make_move / unmake_move)
+        self.hash_key = position_hash(self)
+        self.move_history = new_history()   # compact undo records, see history.py
+        self.hash_history = new_history()
+        self.start_fen = START_FEN          # position move_history starts from
+
+        if fen is not None:
+            set_fen(self, fen)
+
+    def copy(self):
+        other = Position.__new__(Position)
+        other.board = [row.copy() for row in self.board]
+        other.current_turn = self.current_turn
+        other.en_passant_target = self.en_passant_target
+        other.white_king_moved = self.white_king_moved
+        other.black_king_moved = self.black_king_moved
+        other.white_rook_moved = dict(self.white_rook_moved)
+        other.black_rook_moved = dict(self.black_rook_moved)
+        other.move_number = self.move_number
+        other.halfmove_clock = self.halfmove_clock
+        other.hash_key = self.hash_key
+        other.move_history = self.move_history[:]
+        other.hash_history = self.hash_history[:]
+        other.start_fen = self.start_fen
+        return other
+
+    # -----------------------------
+    # BYTES / PICKLE
+    # -----------------------------
+    def to_bytes(self):
+        codes = [PIECE_INDEX[p] for row in self.board for p in row]
+        squares = bytes(codes[i] | codes[i + 1] << 4 for i in range(0, 64, 2))
+        ep = self.en_passant_target
+        start_fen = self.start_fen.encode()
+
+        moves, hashes = self.move_history[:], self.hash_history[:]
+        if sys.byteorder == "big":
+            moves.byteswap()
+            hashes.byteswap()
+
+        header = HEADER.pack(
+            squares,
+            self.current_turn == "black",
+            castling_bits(self),
+            ep[0] * 8 + ep[1] + 1 if ep else 0,
+            min(self.halfmove_clock, 0xFFFF),
+            min(self.move_number, 0xFFFF),
+            self.hash_key,
+            len(moves),
+            len(hashes),
+            len(start_fen),
+        )
+        return header + moves.tobytes() + hashes.tobytes() + start_fen
+
+    @classmethod
+    def from_bytes(cls, data):
+        (squares, black, castling, ep, halfmove, number, key,
+         move_count, hash_count, fen_length) = HEADER.unpack_from(data)
+
+        position = cls.__new__(cls)
+        cells = []
+        for byte in squares:
+            cells.append(PIECE_CODES[byte & 0xF])
+            cells.append(PIECE_CODES[byte >> 4])
+        position.board = [cells[i:i + 8] for i in range(0, 64, 8)]
+        position.current_turn = "black" if black else "white"
+        restore_castling(position, castling)
+        position.en_passant_target = divmod(ep - 1, 8) if ep else None
+        position.halfmove_clock = halfmove
+        position.move_number = number
+        position.hash_key = key
+
+        offset = HEADER.size
+        position.move_history = new_history()
+        position.move_history.frombytes(data[offset:offset + 8 * move_count])
+        offset += 8 * move_count
+        position.hash_history = new_history()
+        position.hash_history.frombytes(data[offset:offset + 8 * hash_count])
+        offset += 8 * hash_count
+        if sys.byteorder == "big":
+            position.move_history.byteswap()
+            position.hash_history.byteswap()
+        position.start_fen = bytes(data[offset:offset + fen_length]).decode()
+        return position
+
+    def __reduce__(self):
+        return Position.from_bytes, (self.to_bytes(),)
+
+    def __repr__(self):
+        return f"Position({get_fen(self)!r})"
@@ -0,0 +1,104 @@
+# profiling.py
+# ===============================
+# OPT-IN PROFILING HOOKS
+# ===============================
+# Wraps a call (e.g. the computer's move) in cProfile or a lightweight
+# sampling profiler, selected from the environment so a slow position can
+# be profiled without editing code:
+#
+#   CHESS_PROFILE=cprofile python main.py     # deterministic, to profile.out
+#   CHESS_PROFILE=sample   python main.py     # statistical, low overhead
+#
+# CHESS_PROFILE_OUT sets the cProfile output file and
+# CHESS_PROFILE_INTERVAL the sampling interval in seconds.
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_ENV = "CHESS_PROFILE"
+TOP_N = 25
+
+
+def profile_mode():
+    return os.environ.get(PROFILE_ENV, "").lower() or None
+
+
+def _run_cprofile(func, args, kwargs):
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+
+    out = os.environ.get("CHESS_PROFILE_OUT", "profile.out")
+    profiler.dump_stats(out)
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(TOP_N)
+    print(text.getvalue())
+    print(f"[Profile] Full cProfile data written to {out}")
+    return result
+
+
+def _run_sampling(func, args, kwargs):
+    interval = float(os.environ.get("CHESS_PROFILE_INTERVAL", "0.001"))
+    target = threading.get_ident()
+    own = Counter()        # samples where the function was running
+    inclusive = Counter()  # samples where it was anywhere on the stack
+    samples = 0
+    done = threading.Event()
+
+    def sampler():
+        nonlocal samples
+        while not done.wait(interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+            samples += 1
+            own[(frame.f_code.co_filename, frame.f_code.co_name)] += 1
+            seen = set()
+            while frame is not None:
+                key = (frame.f_code.co_filename, frame.f_code.co_name)
+                if key not in seen:
+                    inclusive[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+
+    # Let the sampler get the GIL about as often as it wants to sample
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(min(switch_interval, interval))
+
+    thread = threading.Thread(target=sampler, name="chess-sampler", daemon=True)
+    thread.start()
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(switch_interval)
+        elapsed = time.perf_counter() - started
+        print(f"[Profile] {samples} samples in {elapsed:.3f} s")
+        print(f"{'self %':>7} {'total %':>8}  function")
+        for key, count in own.most_common(TOP_N):
+            filename, name = key
+            print(f"{100 * count / max(1, samples):6.1f}% {100 * inclusive[key] / max(1, samples):7.1f}%  "
+                  f"{name} ({os.path.basename(filename)})")
+
+
+def profile_call(func, *args, mode=None, **kwargs):
+    """
+    Call func(*args, **kwargs), profiled when mode (or $CHESS_PROFILE) is
+    "cprofile" or "sample". Without a mode this is a plain call.
+    """
+    mode = mode or profile_mode()
+    if mode is None:
+        return func(*args, **kwargs)
+    if mode == "cprofile":
+        return _run_cprofile(func, args, kwargs)
+    if mode == "sample":
+        return _run_sampling(func, args, kwargs)
+    raise ValueError(f"Unknown profile mode: {mode!r} (use 'cprofile' or 'sample')")
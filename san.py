@@ -0,0 +1,129 @@
+# san.py
+# ===============================
+# STANDARD ALGEBRAIC NOTATION
+# ===============================
+
+import re
+
+from fen import parse_square, square_name
+from helper import (
+    generate_moves,
+    generate_legal_moves,
+    leaves_king_in_check,
+    king_in_check,
+    make_move,
+    unmake_move,
+)
+
+SAN_RE = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+COORD_RE = re.compile(r"^([a-h][1-8])([a-h][1-8])([nbrqNBRQ])?$")
+
+
+def parse_san(game, san):
+    """
+    Resolve a SAN move ("Nbd7", "exd6", "e8=Q+", "O-O") for the side to
+    move against the legal moves of the position.
+    Returns ((sr, sc, tr, tc), promotion) where promotion is None or "q"/"r"/"b"/"n".
+    """
+    color = game.current_turn
+    text = san.rstrip("+#!?")
+    # Pseudo-legal first; king safety is only tested for matching candidates
+    moves = generate_moves(game, color)
+
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        row = 7 if color == "white" else 0
+        tc = 6 if len(text) == 3 else 2
+        move = (row, 4, row, tc)
+        if move in moves and game.board[row][4].lower() == "k":
+            return move, None
+        raise ValueError(f"Illegal castling in this position: {san!r}")
+
+    m = SAN_RE.match(text)
+    if not m:
+        raise ValueError(f"Invalid SAN: {san!r}")
+
+    kind, from_file, from_rank, to_square, promotion = m.groups()
+    kind = (kind or "P").lower()
+    tr, tc = parse_square(to_square)
+    from_col = "abcdefgh".index(from_file) if from_file else None
+    from_row = 8 - int(from_rank) if from_rank else None
+
+    candidates = [
+        move for move in moves
+        if move[2] == tr and move[3] == tc
+        and game.board[move[0]][move[1]].lower() == kind
+        and (from_col is None or move[1] == from_col)
+        and (from_row is None or move[0] == from_row)
+        and not leaves_king_in_check(game, color, *move)
+    ]
+
+    if len(candidates) != 1:
+        reason = "Illegal" if not candidates else "Ambiguous"
+        raise ValueError(f"{reason} move in this position: {san!r}")
+
+    return candidates[0], promotion.lower() if promotion else None
+
+
+def parse_move(game, text):
+    """Accept either SAN or coordinate notation ("e2e4", "e7e8q")."""
+    m = COORD_RE.match(text)
+    if m:
+        move = parse_square(m.group(1)) + parse_square(m.group(2))
+        if move not in generate_legal_moves(game, game.current_turn):
+            raise ValueError(f"Illegal move in this position: {text!r}")
+        return move, m.group(3).lower() if m.group(3) else None
+    return parse_san(game, text)
+
+
+def _has_legal_move(game, color):
+    return any(
+        not leaves_king_in_check(game, color, *move)
+        for move in generate_moves(game, color)
+    )
+
+
+def move_to_san(game, move, promotion=None, legal=None):
+    """
+    SAN for a legal move of the side owning the moving piece, with
+    file/rank disambiguation and a +/# suffix. `legal` may pass in the
+    already generated legal moves of that side.
+    """
+    sr, sc, tr, tc = move
+    board = game.board
+    piece = board[sr][sc]
+    color = "white" if piece.isupper() else "black"
+    kind = piece.lower()
+
+    if kind == "k" and abs(tc - sc) == 2:
+        san = "O-O" if tc == 6 else "O-O-O"
+    elif kind == "p":
+        san = square_name(tr, tc)
+        if sc != tc:
+            san = square_name(sr, sc)[0] + "x" + san
+        if tr in (0, 7):
+            san += "=" + (promotion or "q").upper()
+    else:
+        if legal is None:
+            legal = generate_legal_moves(game, color)
+        rivals = [
+            m for m in legal
+            if m[2] == tr and m[3] == tc and m != move and board[m[0]][m[1]] == piece
+        ]
+        prefix = ""
+        if rivals:
+            if all(m[1] != sc for m in rivals):
+                prefix = "abcdefgh"[sc]
+            elif all(m[0] != sr for m in rivals):
+                prefix = str(8 - sr)
+            else:
+                prefix = square_name(sr, sc)
+        capture = "x" if board[tr][tc] != "." else ""
+        san = piece.upper() + prefix + capture + square_name(tr, tc)
+
+    opponent = "black" if color == "white" else "white"
+    make_move(game, sr, sc, tr, tc, promotion)
+    if king_in_check(game, opponent):
+        san += "+" if _has_legal_move(game, opponent) else "#"
+    unmake_move(game)
+
+    return san
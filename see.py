@@ -0,0 +1,197 @@
+# see.py
+# ===============================
+# STATIC EXCHANGE EVALUATION
+# ===============================
+# What a capture wins or loses once every piece aimed at the target square
+# has taken part, cheapest first, each side free to stop when going on
+# would cost it material. No moves are made: the attackers of the square
+# are collected once, as stacks along each ray (front piece first, x-ray
+# attackers such as a rook behind a rook or a bishop behind a pawn behind
+# it), and the exchange is played out on those stacks.
+#
+# Pins and checks are ignored, as usual for SEE.
+#
+#   python see.py --seconds 2        # SEE / attackers-to calls per second
+
+import argparse
+import time
+
+from position import Position
+from helper import KNIGHT_STEPS, ROOK_DIRS, BISHOP_DIRS, generate_moves
+
+SEE_VALUES = {
+    "p": 100, "n": 300, "b": 300, "r": 500, "q": 900, "k": 20000,
+    "P": 100, "N": 300, "B": 300, "R": 500, "Q": 900, "K": 20000,
+}
+
+BENCH_FENS = [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8",
+    "2r2rk1/1bqnbppp/p2ppn2/1p6/3NP3/1BN1BP2/PPPQ2PP/2KR3R w - - 0 13",
+    "r2q1rk1/1b1nbppp/p2ppn2/1p6/3NPP2/1BN1B3/PPPQ2PP/2KR3R b - - 0 12",
+]
+
+
+# -----------------------------
+# ATTACKERS TO A SQUARE
+# -----------------------------
+def _ray(board, row, col, dr, dc, sliders):
+    """Pieces attacking (row, col) along one ray, front first, x-rays included."""
+    stack = []
+    r, c = row + dr, col + dc
+    distance = 1
+    while 0 <= r < 8 and 0 <= c < 8:
+        piece = board[r][c]
+        if piece != ".":
+            if piece in sliders:
+                stack.append((r, c))
+            elif distance == 1 and (piece in "Kk" or (dc and (
+                    (piece == "P" and dr == 1) or (piece == "p" and dr == -1)))):
+                # A pawn or king only attacks from the neighbouring square;
+                # a slider behind a pawn still x-rays through it
+                stack.append((r, c))
+                if piece in "Kk":
+                    break
+            else:
+                break
+        r += dr
+        c += dc
+        distance += 1
+    return stack
+
+
+def attacker_stacks(board, row, col):
+    """
+    Every attacker of (row, col), both colours, as stacks of (row, col):
+    one per knight / king / pawn, and one per ray with the pieces behind
+    the front attacker that join in once it has moved off.
+    """
+    stacks = []
+    for dr, dc in KNIGHT_STEPS:
+        r, c = row + dr, col + dc
+        if 0 <= r < 8 and 0 <= c < 8 and board[r][c] in "Nn":
+            stacks.append([(r, c)])
+    for dirs, sliders in ((ROOK_DIRS, "RrQq"), (BISHOP_DIRS, "BbQq")):
+        for dr, dc in dirs:
+            stack = _ray(board, row, col, dr, dc, sliders)
+            if stack:
+                stacks.append(stack)
+    return stacks
+
+
+def attackers_to(board, row, col, xray=False):
+    """
+    Squares of the pieces (both colours) attacking (row, col); with
+    xray=True also the ones lined up behind another attacker.
+    """
+    squares = []
+    for stack in attacker_stacks(board, row, col):
+        squares.extend(stack if xray else stack[:1])
+    return squares
+
+
+# -----------------------------
+# EXCHANGE
+# -----------------------------
+def _exchange(board, stacks, white_to_capture, on_square, first_gain):
+    """Swap list over the attacker stacks; returns the first capturer's net gain."""
+    gains = [first_gain]
+    white = white_to_capture
+    while True:
+        # Cheapest front attacker of the side to capture
+        best, best_value = None, None
+        for stack in stacks:
+            if stack:
+                r, c = stack[0]
+                piece = board[r][c]
+                if piece.isupper() == white:
+                    value = SEE_VALUES[piece]
+                    if best is None or value < best_value:
+                        best, best_value = stack, value
+        if best is None:
+            break
+        gains.append(on_square - gains[-1])
+        best.pop(0)
+        on_square = best_value
+        white = not white
+
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def see(game, move):
+    """Material (centipawns) the side making `move` wins in the exchange it starts."""
+    sr, sc, tr, tc = move
+    board = game.board
+    piece = board[sr][sc]
+    target = board[tr][tc]
+    if target == ".":
+        # En passant wins a pawn; any other quiet move starts with nothing
+        captured = SEE_VALUES["p"] if piece in "Pp" and sc != tc else 0
+    else:
+        captured = SEE_VALUES[target]
+
+    # The mover is the front of its stack (a pawn push isn't in any)
+    stacks = attacker_stacks(board, tr, tc)
+    for stack in stacks:
+        if stack[0] == (sr, sc):
+            stack.pop(0)
+            break
+    return _exchange(board, stacks, not piece.isupper(), SEE_VALUES[piece], captured)
+
+
+def hanging_value(board, row, col):
+    """
+    What the opponent of the piece on (row, col) wins by capturing it with
+    its cheapest attacker (0 if the piece is safe).
+    """
+    piece = board[row][col]
+    if piece == ".":
+        return 0
+    stacks = attacker_stacks(board, row, col)
+    gain = _exchange(board, stacks, piece.islower(), SEE_VALUES[piece], 0)
+    return max(0, -gain)
+
+
+# -----------------------------
+# BENCHMARK
+# -----------------------------
+def benchmark(fens=BENCH_FENS, seconds=1.0):
+    """(SEE calls/s, attackers_to calls/s) over the captures of fens."""
+    jobs = []
+    for fen in fens:
+        game = Position(fen)
+        for color in ("white", "black"):
+            for move in generate_moves(game, color):
+                if game.board[move[2]][move[3]] != ".":
+                    jobs.append((game, move))
+
+    def rate(func):
+        calls = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            for game, move in jobs:
+                func(game, move)
+            calls += len(jobs)
+        return calls / (time.perf_counter() - started)
+
+    see_rate = rate(see)
+    attack_rate = rate(lambda game, move: attackers_to(game.board, move[2], move[3], xray=True))
+    return see_rate, attack_rate, len(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static exchange evaluation micro-benchmark")
+    parser.add_argument("--fen", action="append", help="position(s) to use (default: built-in set)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    args = parser.parse_args()
+
+    see_rate, attack_rate, captures = benchmark(args.fen or BENCH_FENS, args.seconds)
+    print(f"{captures} captures")
+    print(f"see:          {see_rate:10.0f} calls/s")
+    print(f"attackers_to: {attack_rate:10.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
 # sound.py
- 
-import pygame
+# ===============================
+# SOUND ENGINE
+# ===============================
+# Sounds are decoded once into pygame.mixer.Sound objects (all at startup in
+# a background thread, or lazily on first use) and played on a small pool of
+# mixer channels, so overlapping effects no longer cut each other off.
+# Without pygame, without an audio device or with CHESS_NO_AUDIO=1 set, the
+# engine falls back to a silent backend and play_sound() is a no-op.
+
 import os
+import threading
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
 
-pygame.mixer.init()
-pygame.mixer.music.set_volume(0.6)
+NUM_CHANNELS = 8
+VOLUME = 0.6
 
 # Map sound names to files
 SOUNDS = {
@@ -12,6 +25,7 @@ SOUNDS = {
     "castle": "sounds/castle.mp3",
     "game_end": "sounds/game-end.mp3",
     "game_start": "sounds/game-start.mp3",
+    "game_draw": "sounds/game-draw.mp3",
     "illegal": "sounds/illegal.mp3",
     "check": "sounds/move-check.mp3",
     "move_self": "sounds/move-self.mp3",
@@ -20,20 +34,151 @@ SOUNDS = {
     "promote": "sounds/promote.mp3",
 }
 
+# When every channel is busy, a sound may only replace one of lower
+# or equal priority (so a stream of moves never drowns out "game over").
+PRIORITIES = {
+    "game_end": 3,
+    "game_start": 3,
+    "game_draw": 3,
+    "check": 2,
+    "promote": 2,
+    "castle": 2,
+    "capture": 2,
+    "illegal": 1,
+    "move_self": 1,
+    "move_opponent": 1,
+    "premove": 0,
+}
+
+_enabled = False
+_sounds = {}
+_lock = threading.Lock()
+_channels = []
+_channel_priority = []
+
+
+# -----------------------------
+# BACKEND SETUP
+# -----------------------------
+def init_audio():
+    """
+    Initialise the mixer and the channel pool.
+    Returns False (silent backend) when audio is unavailable.
+    """
+    global _enabled, _channels, _channel_priority
+
+    if pygame is None or os.environ.get("CHESS_NO_AUDIO"):
+        _enabled = False
+        return False
+
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(f"[Sound] Audio disabled: {e}")
+        _enabled = False
+        return False
+
+    pygame.mixer.set_num_channels(NUM_CHANNELS)
+    _channels = [pygame.mixer.Channel(i) for i in range(NUM_CHANNELS)]
+    _channel_priority = [0] * NUM_CHANNELS
+    _enabled = True
+    return True
+
+
+def disable_audio():
+    """Switch to the silent backend (headless runs, tests)."""
+    global _enabled
+    _enabled = False
+
+
+def audio_enabled():
+    return _enabled
+
+
+# -----------------------------
+# LOADING
+# -----------------------------
+def _load(sound_type):
+    """Decode one sound (once) and cache it. Returns None if unavailable."""
+    with _lock:
+        if sound_type in _sounds:
+            return _sounds[sound_type]
+
+        file = SOUNDS.get(sound_type)
+        sound = None
+        if file and os.path.exists(file):
+            try:
+                sound = pygame.mixer.Sound(file)
+                sound.set_volume(VOLUME)
+            except pygame.error as e:
+                print(f"[Sound] Cannot decode {file}: {e}")
+        elif file:
+            print(f"[Sound] Missing file: {file}")
+
+        _sounds[sound_type] = sound
+        return sound
+
+
+def preload_sounds(background=True):
+    """
+    Decode every sound up front so the first move doesn't stall the UI.
+    Runs in a daemon thread by default; play_sound() still loads lazily
+    anything the thread hasn't reached yet.
+    """
+    if not _enabled:
+        return None
+
+    def load_all():
+        for sound_type in SOUNDS:
+            _load(sound_type)
+
+    if not background:
+        load_all()
+        return None
+
+    thread = threading.Thread(target=load_all, name="sound-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+# -----------------------------
+# PLAYBACK
+# -----------------------------
+def _pick_channel(priority):
+    """Free channel first, else steal the lowest-priority busy one."""
+    for i, channel in enumerate(_channels):
+        if not channel.get_busy():
+            return i
+
+    victim = min(range(len(_channels)), key=lambda i: _channel_priority[i])
+    if _channel_priority[victim] > priority:
+        return None
+    return victim
+
+
 def play_sound(sound_type):
     """
     Plays a chess sound based on the sound_type string.
     Example:
-        play_sound("piece_move")
+        play_sound("move_self")
         play_sound("check")
     """
-    file = SOUNDS.get(sound_type)
-    if not file:
-        return  # invalid sound key
+    if not _enabled or sound_type not in SOUNDS:
+        return  # silent backend or invalid sound key
+
+    sound = _sounds.get(sound_type)
+    if sound is None:
+        sound = _load(sound_type)
+        if sound is None:
+            return
 
-    if not os.path.exists(file):
-        print(f"[Sound] Missing file: {file}")
+    priority = PRIORITIES.get(sound_type, 0)
+    index = _pick_channel(priority)
+    if index is None:
         return
 
-    pygame.mixer.music.load(file)
-    pygame.mixer.music.play()
\ No newline at end of file
+    _channel_priority[index] = priority
+    _channels[index].play(sound)
+
+
+init_audio()
@@ -1,9 +1,12 @@
 # start_game_dialog.py
 
+import os
 import tkinter as tk
+from tkinter import messagebox
 from sound import play_sound
 from ui import create_ui
-from draw import draw_board, draw_pieces, highlight_square, show_legal_moves, redraw
+from draw import draw_board, draw_pieces, highlight_square, show_legal_moves
+from frames import request_redraw
 from ai import computer_move
 from helper import (
     is_white,
@@ -14,7 +17,9 @@ from helper import (
     make_move
 )
 from game import Game
-from clock import start_clock, stop_clock, switch_clock
+from clock import start_clock, stop_clock, switch_clock, update_labels, FISCHER, BRONSTEIN
+from journal import interrupted_journals, read_journal, resume_game, start_journal
+from main_helpers import rebuild_move_log
 
 def start_game_dialog(game):
     popup = tk.Toplevel(game.root)
@@ -74,6 +79,19 @@ def start_game_dialog(game):
         tk.Radiobutton(pvp_frame, text=f"{t} minutes",
                        variable=p2_time, value=t).pack(anchor="w")
 
+    # Increment added after every move
+    tk.Label(pvp_frame, text="Increment").pack(anchor="w", pady=2)
+    increment_var = tk.IntVar(value=0)
+    for t in (0, 2, 5):
+        tk.Radiobutton(pvp_frame, text=f"{t} seconds",
+                       variable=increment_var, value=t).pack(anchor="w")
+
+    increment_mode_var = tk.StringVar(value=FISCHER)
+    tk.Radiobutton(pvp_frame, text="Fischer",
+                   variable=increment_mode_var, value=FISCHER).pack(anchor="w")
+    tk.Radiobutton(pvp_frame, text="Bronstein",
+                   variable=increment_mode_var, value=BRONSTEIN).pack(anchor="w")
+
     # ------------- Toggle visibility based on mode -------------
     def toggle_frames(*args):
         pvc_frame.pack_forget()
@@ -118,6 +136,9 @@ def start_game_dialog(game):
 
             game.white_time = p1_time.get() * 60
             game.black_time = p2_time.get() * 60
+            game.initial_times = (game.white_time, game.black_time)
+            game.increment = increment_var.get()
+            game.increment_mode = increment_mode_var.get() if game.increment else None
             game.clock_running = False
 
             # Update clock labels with different times
@@ -130,9 +151,47 @@ def start_game_dialog(game):
 
             popup.destroy()
 
-        
-        redraw(game, 8, 80, 40, game.pieces)
+        start_journal(game)
+        request_redraw(game)
         play_sound("game_start")
 
     tk.Button(popup, text="Start Game",
               command=start).pack(anchor="center", pady=10)
+
+
+def offer_resume(game):
+    """
+    If a game was interrupted (crash or window closed mid-game), ask whether
+    to continue it from its journal. Returns True if it was resumed.
+    """
+    paths = interrupted_journals()
+    if not paths:
+        return False
+    path = paths[0]
+    for old in paths[1:]:
+        os.remove(old)   # only the latest game is offered
+
+    settings, line, _, _ = read_journal(path)
+    mode = "Player vs Computer" if settings["mode"] == "PVC" else "Player vs Player"
+    if not messagebox.askyesno(
+            "Resume Game",
+            f"An unfinished game was found ({mode}, {len(line)} moves).\nResume it?",
+            parent=game.root) or not resume_game(game, path):
+        os.remove(path)
+        return False
+
+    rebuild_move_log(game)
+    game.turn_label.config(text=f"{game.current_turn.capitalize()}'s turn")
+
+    if game.mode == "PVC":
+        game.white_clock_label.config(text="")
+        game.black_clock_label.config(text="")
+        if game.player_color != game.current_turn:
+            game.root.after(300, lambda: computer_move(game))
+    else:
+        update_labels(game)
+        start_clock(game)
+
+    request_redraw(game)
+    play_sound("game_start")
+    return True
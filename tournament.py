@@ -0,0 +1,359 @@
+# tournament.py
+# ===============================
+# ENGINE-VS-ENGINE TOURNAMENT (SPRT)
+# ===============================
+# Plays two engine configurations against each other on all cores, from a
+# local book of openings (EPD/FEN lines, or the first plies of PGN games),
+# each opening twice with colours swapped. Games are adjudicated by the
+# rules (mate, stalemate, threefold repetition, 50-move rule, dead
+# material). Reports the Elo difference with a 95% error bar and stops as
+# soon as the SPRT for elo0 vs elo1 accepts either hypothesis.
+#
+# An engine is "module:function[:key=value,...]". The function is called as
+# function(game, color, **options) and returns a move (or a SearchResult).
+# With a time control, time_limit is set per move from that side's clock
+# (for functions that take a time_limit). Functions that take a tt get a
+# fresh transposition table per engine and game, so the two engines never
+# share search results. A search with no limit in its spec (max_depth=,
+# node_limit=) and no time control is rejected, as it would never move.
+#
+#   python tournament.py "ai:search:lmr=1" "ai:search:lmr=0" \
+#       --openings book.epd --games 400 --tc 10+0.1
+#   python tournament.py "ai:search:max_depth=3" "ai:choose_best_move" --games 100
+
+import argparse
+import importlib
+import inspect
+import math
+import multiprocessing
+import random
+import time
+
+from ai import TranspositionTable
+from fen import START_FEN, get_fen
+from position import Position
+from helper import generate_legal_moves, make_move, king_in_check, repetition_count, is_fifty_move_draw
+from pgn import read_games, replay_game
+
+_players = {}
+
+
+# -----------------------------
+# ENGINES
+# -----------------------------
+def _convert(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def load_player(spec):
+    """
+    Resolve "module:function[:k=v,...]" to (function, options, parameters),
+    cached per process. parameters is the set of keyword names the function
+    takes (None if it takes **kwargs).
+    """
+    if spec not in _players:
+        module_name, func_name, *rest = spec.split(":")
+        func = getattr(importlib.import_module(module_name), func_name)
+        options = {}
+        if rest:
+            for item in rest[0].split(","):
+                key, value = item.split("=")
+                options[key] = _convert(value)
+        params = inspect.signature(func).parameters
+        if any(p.kind == p.VAR_KEYWORD for p in params.values()):
+            names = None
+        else:
+            names = set(params)
+        _players[spec] = (func, options, names)
+    return _players[spec]
+
+
+def check_player(spec, tc):
+    """
+    Raise ValueError if spec is a search that would run without any limit:
+    no max_depth / node_limit / time_limit option and no time control.
+    """
+    func, options, params = load_player(spec)
+    if params is None or "max_depth" not in params:
+        return
+    limits = [name for name in ("max_depth", "node_limit", "time_limit") if name in params]
+    if any(name in options for name in limits) or (tc and "time_limit" in params):
+        return
+    raise ValueError(f"{spec}: no search limit (add max_depth=/node_limit= or use a time control)")
+
+
+def parse_time_control(text):
+    """"10+0.1" -> (10.0, 0.1); None means no clock."""
+    if not text:
+        return None
+    base, _, inc = text.partition("+")
+    return float(base), float(inc or 0)
+
+
+# -----------------------------
+# ADJUDICATION
+# -----------------------------
+def insufficient_material(game):
+    pieces = [p for row in game.board for p in row if p not in ".Kk"]
+    if not pieces:
+        return True
+    return len(pieces) == 1 and pieces[0].lower() in "nb"
+
+
+def adjudicate(game):
+    """Result ("1-0", "0-1", "1/2-1/2") and reason, or None if play goes on."""
+    color = game.current_turn
+    if not generate_legal_moves(game, color):
+        if king_in_check(game, color):
+            return ("0-1" if color == "white" else "1-0"), "checkmate"
+        return "1/2-1/2", "stalemate"
+    if repetition_count(game) >= 3:
+        return "1/2-1/2", "threefold repetition"
+    if is_fifty_move_draw(game):
+        return "1/2-1/2", "50-move rule"
+    if insufficient_material(game):
+        return "1/2-1/2", "insufficient material"
+    return None
+
+
+# -----------------------------
+# ONE GAME (WORKER)
+# -----------------------------
+def play_game(job):
+    """
+    Play one game. Returns (index, score for engine A, reason, plies).
+    """
+    index, opening, a_is_white, spec_a, spec_b, tc_a, tc_b, max_plies = job
+
+    game = Position(opening)
+
+    engines = {
+        "white": (spec_a, tc_a) if a_is_white else (spec_b, tc_b),
+        "black": (spec_b, tc_b) if a_is_white else (spec_a, tc_a),
+    }
+    clocks = {color: tc[0] if tc else None for color, (_, tc) in engines.items()}
+    # Each engine searches with its own table, fresh for every game
+    tables = {color: TranspositionTable() for color in engines}
+    plies = 0
+    outcome = None
+
+    while outcome is None:
+        outcome = adjudicate(game)
+        if outcome:
+            break
+        if plies >= max_plies:
+            outcome = ("1/2-1/2", "move limit")
+            break
+
+        color = game.current_turn
+        spec, tc = engines[color]
+        func, options, params = load_player(spec)
+        kwargs = dict(options)
+        if params is None or "tt" in params:
+            kwargs.setdefault("tt", tables[color])
+        if tc and (params is None or "time_limit" in params):
+            # Spend ~1/30 of the remaining time plus the increment
+            kwargs["time_limit"] = max(0.01, clocks[color] / 30 + tc[1] * 0.8)
+
+        started = time.monotonic()
+        move = func(game, color, **kwargs)
+        move = getattr(move, "move", move)
+        if tc:
+            clocks[color] -= time.monotonic() - started
+            if clocks[color] < 0:
+                outcome = ("0-1" if color == "white" else "1-0"), "time forfeit"
+                break
+            clocks[color] += tc[1]
+
+        if move is None or move not in generate_legal_moves(game, color):
+            outcome = ("0-1" if color == "white" else "1-0"), "illegal move"
+            break
+
+        make_move(game, *move)
+        if color == "black":
+            game.move_number += 1
+        game.current_turn = "black" if color == "white" else "white"
+        plies += 1
+
+    result, reason = outcome
+    white_score = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}[result]
+    return index, white_score if a_is_white else 1.0 - white_score, reason, plies
+
+
+# -----------------------------
+# STATISTICS
+# -----------------------------
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(wins, draws, losses):
+    """Elo difference of A over B with a 95% confidence interval."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, 0.0, 0.0
+    score = (wins + draws / 2) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    return elo_from_score(score), elo_from_score(score - margin), elo_from_score(score + margin)
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Log-likelihood ratio of H1 (elo1) over H0 (elo0), normal approximation."""
+    if wins + draws + losses == 0:
+        return 0.0
+    # Half a game of each outcome keeps the variance positive on lopsided starts
+    wins, draws, losses = wins + 0.5, draws + 0.5, losses + 0.5
+    n = wins + draws + losses
+    score = (wins + draws / 2) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return (s1 - s0) * (2 * score - s0 - s1) * n / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# -----------------------------
+# OPENINGS
+# -----------------------------
+def load_openings(path, plies=8):
+    """FENs from an EPD/FEN file, or positions after `plies` moves of PGN games."""
+    if not path:
+        return [START_FEN]
+
+    if path.endswith(".pgn"):
+        fens = []
+        game = Position()
+        for pgn_game in read_games(path):
+            try:
+                for ply, _ in enumerate(replay_game(pgn_game, game)):
+                    if ply >= plies:
+                        break
+            except ValueError:
+                continue
+            fens.append(get_fen(game))
+        return fens
+
+    with open(path, encoding="utf-8") as f:
+        fens = []
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 4 and not line.startswith("#"):
+                fens.append(" ".join(fields[:4]) + " 0 1")
+        return fens
+
+
+def run_match(spec_a, spec_b, openings, games, tc_a=None, tc_b=None, workers=None,
+              elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05, max_plies=400, seed=None, verbose=True):
+    """Play up to `games` games (pairs of colour-swapped openings) with an SPRT stop."""
+    check_player(spec_a, tc_a)
+    check_player(spec_b, tc_b)
+
+    rng = random.Random(seed)
+    rng.shuffle(openings)
+
+    jobs = []
+    for i in range(games):
+        opening = openings[(i // 2) % len(openings)]
+        jobs.append((i, opening, i % 2 == 0, spec_a, spec_b, tc_a, tc_b, max_plies))
+
+    wins = draws = losses = 0
+    lower, upper = sprt_bounds(alpha, beta)
+    verdict = None
+    started = time.monotonic()
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        for index, score, reason, plies in pool.imap_unordered(play_game, jobs):
+            if score == 1.0:
+                wins += 1
+            elif score == 0.0:
+                losses += 1
+            else:
+                draws += 1
+
+            llr = sprt_llr(wins, draws, losses, elo0, elo1)
+            if verbose:
+                elo, lo, hi = elo_estimate(wins, draws, losses)
+                print(f"game {index + 1:>4}: {score:<3} ({reason}, {plies} plies)  "
+                      f"+{wins} ={draws} -{losses}  Elo {elo:+.1f} [{lo:+.1f}, {hi:+.1f}]  "
+                      f"LLR {llr:.2f} ({lower:.2f}, {upper:.2f})")
+
+            if llr >= upper:
+                verdict = "H1"
+                break
+            if llr <= lower:
+                verdict = "H0"
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+
+    elo, lo, hi = elo_estimate(wins, draws, losses)
+    return {
+        "wins": wins,
+        "draws": draws,
+        "losses": losses,
+        "elo": elo,
+        "elo_low": lo,
+        "elo_high": hi,
+        "llr": sprt_llr(wins, draws, losses, elo0, elo1),
+        "verdict": verdict,
+        "seconds": time.monotonic() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine-vs-engine match with SPRT")
+    parser.add_argument("engine_a", help='engine under test, e.g. "ai:search:max_depth=3"')
+    parser.add_argument("engine_b", help="baseline engine")
+    parser.add_argument("--openings", help="EPD/FEN file or PGN book")
+    parser.add_argument("--book-plies", type=int, default=8, help="plies taken from PGN book games")
+    parser.add_argument("--games", type=int, default=1000, help="maximum number of games")
+    parser.add_argument("--tc", help='time control for both sides, "base+inc" seconds')
+    parser.add_argument("--tc-a", help="time control for engine A (overrides --tc)")
+    parser.add_argument("--tc-b", help="time control for engine B (overrides --tc)")
+    parser.add_argument("--workers", type=int, help="concurrent games (default: all cores)")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=5.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--max-plies", type=int, default=400, help="adjudicate a draw after this")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    tc_a = parse_time_control(args.tc_a or args.tc)
+    tc_b = parse_time_control(args.tc_b or args.tc)
+    try:
+        check_player(args.engine_a, tc_a)
+        check_player(args.engine_b, tc_b)
+    except ValueError as e:
+        parser.error(str(e))
+
+    stats = run_match(
+        args.engine_a, args.engine_b,
+        load_openings(args.openings, args.book_plies), args.games, tc_a, tc_b,
+        args.workers, args.elo0, args.elo1, args.alpha, args.beta, args.max_plies, args.seed,
+    )
+
+    print(f"\n+{stats['wins']} ={stats['draws']} -{stats['losses']} in {stats['seconds']:.0f} s")
+    print(f"Elo {stats['elo']:+.1f} [{stats['elo_low']:+.1f}, {stats['elo_high']:+.1f}] (95%)")
+    verdict = {"H1": f"H1 accepted (elo >= {args.elo1})",
+               "H0": f"H0 accepted (elo <= {args.elo0})"}.get(stats["verdict"], "inconclusive")
+    print(f"SPRT [{args.elo0}, {args.elo1}] LLR {stats['llr']:.2f}: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
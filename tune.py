@@ -0,0 +1,263 @@
+# tune.py
+# ===============================
+# TEXEL-STYLE EVALUATION TUNING
+# ===============================
+# Fits the evaluator's material and piece-square weights (ai.evaluate_board)
+# to game results. Every quiet position of a PGN archive becomes a row of
+# up to 32 signed piece-square feature ids plus the game's result for
+# white; the weights are fitted by minimising the logistic loss of
+# sigmoid(SCALE * eval) against that result with mini-batch gradient
+# descent (Adam), fully vectorised with NumPy.
+#
+# Extraction streams games and writes fixed-size chunks to raw files, and
+# fitting reads them back through numpy.memmap one batch at a time, so
+# memory stays bounded however many positions there are.
+#
+#   python tune.py extract archive.pgn data/positions --min-ply 8
+#   python tune.py fit data/positions --epochs 20 --out eval_weights.json
+#
+# ai.py loads eval_weights.json at startup.
+
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from ai import DEFAULT_MATERIAL, EVAL_WEIGHTS_FILE
+from position import Position
+from helper import king_in_check
+from pgn import read_games, replay_game
+
+PIECES = "PNBRQK"
+MAX_PIECES = 32
+NUM_FEATURES = len(PIECES) * 64
+PADDING = NUM_FEATURES          # feature slot with weight 0 for empty row cells
+CHUNK = 65536
+SCALE = math.log(10) / 400      # 400 centipawns = 10:1 odds
+
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+
+# -----------------------------
+# FEATURES
+# -----------------------------
+def position_features(board):
+    """
+    Signed feature ids of a position: +(type * 64 + square + 1) for a white
+    piece, -(type * 64 + mirrored square + 1) for a black one, where
+    squares run a8 = 0 ... h1 = 63. Padded with 0 to MAX_PIECES.
+    """
+    row = [0] * MAX_PIECES
+    n = 0
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece == ".":
+                continue
+            if piece.isupper():
+                row[n] = PIECES.index(piece) * 64 + r * 8 + c + 1
+            else:
+                row[n] = -(PIECES.index(piece.upper()) * 64 + (7 - r) * 8 + c + 1)
+            n += 1
+    return row
+
+
+def _paths(prefix):
+    return prefix + ".features", prefix + ".labels", prefix + ".json"
+
+
+def extract(pgn_paths, prefix, min_ply=8, every=1, max_positions=None, verbose=True):
+    """
+    Write the quiet positions of pgn_paths (not in check, the move played
+    from them is not a capture) as int16 feature rows and float32 labels.
+    Returns the number of positions.
+    """
+    features_path, labels_path, meta_path = _paths(prefix)
+    features = np.zeros((CHUNK, MAX_PIECES), dtype=np.int16)
+    labels = np.zeros(CHUNK, dtype=np.float32)
+    filled = total = games = 0
+    started = time.perf_counter()
+    game = Position()
+
+    with open(features_path, "wb") as ff, open(labels_path, "wb") as lf:
+
+        def flush():
+            nonlocal filled
+            features[:filled].tofile(ff)
+            labels[:filled].tofile(lf)
+            filled = 0
+
+        for path in pgn_paths:
+            for pgn_game in read_games(path):
+                label = RESULTS.get(pgn_game.result)
+                if label is None:
+                    continue
+
+                rows = []
+                try:
+                    for ply, (move, _) in enumerate(replay_game(pgn_game, game)):
+                        if ply < min_ply or ply % every:
+                            continue
+                        if game.board[move[2]][move[3]] != "." or king_in_check(game, game.current_turn):
+                            continue
+                        rows.append(position_features(game.board))
+                except ValueError:
+                    continue  # keep only fully valid games
+
+                games += 1
+                for row in rows:
+                    features[filled] = row
+                    labels[filled] = label
+                    filled += 1
+                    total += 1
+                    if filled == CHUNK:
+                        flush()
+
+                if max_positions and total >= max_positions:
+                    break
+                if verbose and games % 1000 == 0:
+                    print(f"{games} games, {total} positions, "
+                          f"{total / (time.perf_counter() - started):.0f} positions/s")
+            if max_positions and total >= max_positions:
+                break
+        flush()
+
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"positions": total, "games": games, "max_pieces": MAX_PIECES}, f)
+    return total
+
+
+def open_dataset(prefix):
+    """Memory-mapped (features, labels) of an extracted dataset."""
+    features_path, labels_path, meta_path = _paths(prefix)
+    with open(meta_path, encoding="utf-8") as f:
+        count = json.load(f)["positions"]
+    features = np.memmap(features_path, dtype=np.int16, mode="r", shape=(count, MAX_PIECES))
+    labels = np.memmap(labels_path, dtype=np.float32, mode="r", shape=(count,))
+    return features, labels
+
+
+# -----------------------------
+# MODEL
+# -----------------------------
+def _ids_and_signs(batch):
+    batch = batch.astype(np.int32)
+    signs = np.sign(batch).astype(np.float64)
+    ids = np.abs(batch) - 1
+    ids[batch == 0] = PADDING
+    return ids, signs
+
+
+def _weights(material, pst):
+    """Per-feature weight (material + square bonus), plus the padding slot."""
+    return np.append(np.repeat(material, 64) + pst, 0.0)
+
+
+def predict(batch, material, pst):
+    """Evaluation in centipawns (white's point of view) of feature rows."""
+    ids, signs = _ids_and_signs(batch)
+    return (_weights(material, pst)[ids] * signs).sum(axis=1)
+
+
+def logistic_loss(evals, labels, scale=SCALE):
+    p = 1.0 / (1.0 + np.exp(-scale * evals))
+    p = np.clip(p, 1e-12, 1 - 1e-12)
+    return float(-(labels * np.log(p) + (1 - labels) * np.log(1 - p)).mean())
+
+
+def fit(prefix, epochs=20, batch_size=CHUNK, lr=2.0, l2=1e-4, scale=SCALE, seed=0, verbose=True):
+    """
+    Fit material (P, N, B, R, Q; the king stays 0) and piece-square weights.
+    l2 pulls the square bonuses towards 0, so material carries the average.
+    Returns (material dict, pst dict) in centipawns.
+    """
+    features, labels = open_dataset(prefix)
+    count = len(labels)
+    if count == 0:
+        raise ValueError(f"{prefix}: no positions")
+
+    material = np.array([DEFAULT_MATERIAL[p] for p in PIECES], dtype=np.float64)
+    pst = np.zeros(NUM_FEATURES)
+    params = np.concatenate([material, pst])
+    m = np.zeros_like(params)
+    v = np.zeros_like(params)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    rng = np.random.default_rng(seed)
+    step = 0
+
+    for epoch in range(epochs):
+        started = time.perf_counter()
+        total_loss = 0.0
+        for start in rng.permutation(range(0, count, batch_size)):
+            batch = np.asarray(features[start:start + batch_size])
+            y = np.asarray(labels[start:start + batch_size], dtype=np.float64)
+            material, pst = params[:6], params[6:]
+
+            ids, signs = _ids_and_signs(batch)
+            evals = (_weights(material, pst)[ids] * signs).sum(axis=1)
+            total_loss += logistic_loss(evals, y, scale) * len(y)
+
+            # d(loss)/d(eval) = scale * (sigmoid - label), spread over the
+            # features of each row
+            err = scale * (1.0 / (1.0 + np.exp(-scale * evals)) - y) / len(y)
+            grad_feature = np.bincount(
+                ids.ravel(), weights=(signs * err[:, None]).ravel(), minlength=NUM_FEATURES + 1
+            )[:NUM_FEATURES]
+            grad = np.concatenate([grad_feature.reshape(6, 64).sum(axis=1), grad_feature + l2 * pst])
+            grad[5] = 0.0   # king material is fixed
+
+            step += 1
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            params -= lr * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + eps)
+
+        if verbose:
+            print(f"epoch {epoch + 1:>3}: loss {total_loss / count:.5f} "
+                  f"({count / (time.perf_counter() - started):.0f} positions/s)")
+
+    material, pst = params[:6], params[6:].reshape(6, 64)
+    return (
+        {p: int(round(material[i])) for i, p in enumerate(PIECES)},
+        {p: [int(round(x)) for x in pst[i]] for i, p in enumerate(PIECES)},
+    )
+
+
+def export_weights(path, material, pst):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"material": material, "pst": pst}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the evaluation weights on game results")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="PGN archive -> feature dataset")
+    p.add_argument("pgn", nargs="+", help="input PGN files")
+    p.add_argument("prefix", help="output path prefix (.features/.labels/.json)")
+    p.add_argument("--min-ply", type=int, default=8, help="skip the opening plies")
+    p.add_argument("--every", type=int, default=1, help="keep every n-th ply")
+    p.add_argument("--max-positions", type=int)
+
+    p = sub.add_parser("fit", help="fit weights to an extracted dataset")
+    p.add_argument("prefix")
+    p.add_argument("--epochs", type=int, default=20)
+    p.add_argument("--batch", type=int, default=CHUNK)
+    p.add_argument("--lr", type=float, default=2.0, help="Adam step size (centipawns)")
+    p.add_argument("--l2", type=float, default=1e-4)
+    p.add_argument("--out", default=EVAL_WEIGHTS_FILE, help="weights file the evaluator loads")
+    args = parser.parse_args()
+
+    if args.command == "extract":
+        count = extract(args.pgn, args.prefix, args.min_ply, args.every, args.max_positions)
+        print(f"{count} positions written to {args.prefix}.*")
+    else:
+        material, pst = fit(args.prefix, args.epochs, args.batch, args.lr, args.l2)
+        export_weights(args.out, material, pst)
+        print("material:", " ".join(f"{p}={v}" for p, v in material.items()))
+        print(f"weights written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
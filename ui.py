@@ -71,6 +71,31 @@ def create_ui(BOARD_SIZE, SQUARE_SIZE, MARGIN, game):
     )
     turn_label.pack(pady=(0, 20))
 
+    # -----------------------
+    # ANALYSIS (toggled with "a")
+    # -----------------------
+    analysis_title = tk.Label(
+        side_frame,
+        text="Analysis (press A)",
+        font=("Segoe UI", 13, "bold"),
+        bg="#1f1f1f",
+        fg="#cccccc"
+    )
+    analysis_title.pack(anchor="w")
+
+    analysis_text = tk.Text(
+        side_frame,
+        state="disabled",
+        height=5,
+        font=("Consolas", 10),
+        bg="#111111",
+        fg="#9fd39f",
+        wrap="none",
+        borderwidth=0,
+        relief="flat"
+    )
+    analysis_text.pack(fill="x", pady=(10, 20))
+
     # -----------------------
     # MOVE LOG TITLE
     # -----------------------
@@ -151,6 +176,7 @@ def create_ui(BOARD_SIZE, SQUARE_SIZE, MARGIN, game):
     # Attach clocks to game object
     game.black_clock_label = black_clock_label
     game.white_clock_label = white_clock_label
+    game.analysis_text = analysis_text
 
     # -----------------------
     # RETURN REFERENCES
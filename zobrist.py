@@ -0,0 +1,78 @@
+# zobrist.py
+# ===============================
+# ZOBRIST POSITION HASHING
+# ===============================
+# A 64-bit key per (piece, square), side to move, castling rights and en
+# passant file. Only state that changes the legal moves is hashed, so a
+# position reached by transposition (or read back from FEN) gets the same
+# key: castling rights rather than the king/rook "moved" flags, and an en
+# passant file only when a pawn can actually capture there. The keys come
+# from a fixed seed so hashes are stable between runs and processes (they
+# are stored in databases).
+
+import random
+
+_rng = random.Random(0x5EED_C4E5)
+
+PIECE_SQUARE_KEYS = {
+    piece: [_rng.getrandbits(64) for _ in range(64)]
+    for piece in "PNBRQKpnbrqk"
+}
+BLACK_TO_MOVE_KEY = _rng.getrandbits(64)
+CASTLING_KEYS = [_rng.getrandbits(64) for _ in range(16)]   # castling_mask
+EN_PASSANT_KEYS = [_rng.getrandbits(64) for _ in range(8)]  # by file
+
+# castling_mask bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+
+def castling_mask(game):
+    """Castling rights as 4 bits (the FEN "KQkq" field, see fen.castling_rights)."""
+    board = game.board
+    mask = 0
+    if not game.white_king_moved and board[7][4] == "K":
+        if not game.white_rook_moved["right"] and board[7][7] == "R":
+            mask |= WHITE_KINGSIDE
+        if not game.white_rook_moved["left"] and board[7][0] == "R":
+            mask |= WHITE_QUEENSIDE
+    if not game.black_king_moved and board[0][4] == "k":
+        if not game.black_rook_moved["right"] and board[0][7] == "r":
+            mask |= BLACK_KINGSIDE
+        if not game.black_rook_moved["left"] and board[0][0] == "r":
+            mask |= BLACK_QUEENSIDE
+    return mask
+
+
+def en_passant_key(board, ep):
+    """
+    EN_PASSANT_KEYS entry for en passant square ep, or 0 when no pawn can
+    capture there. The square's rank tells who captures (rank 3 from
+    White's side: a black pawn just pushed, White captures).
+    """
+    if not ep:
+        return 0
+    r, c = ep
+    pawn, row = ("P", 3) if r == 2 else ("p", 4)
+    if (c > 0 and board[row][c - 1] == pawn) or (c < 7 and board[row][c + 1] == pawn):
+        return EN_PASSANT_KEYS[c]
+    return 0
+
+
+def position_hash(game):
+    """Full hash of the position (board, side to move, castling, en passant)."""
+    h = 0
+    for r, row in enumerate(game.board):
+        for c, piece in enumerate(row):
+            if piece != ".":
+                h ^= PIECE_SQUARE_KEYS[piece][r * 8 + c]
+
+    if game.current_turn == "black":
+        h ^= BLACK_TO_MOVE_KEY
+    h ^= CASTLING_KEYS[castling_mask(game)]
+    h ^= en_passant_key(game.board, game.en_passant_target)
+    return h
+
+
+def signed64(h):
+    """Map an unsigned 64-bit hash into SQLite's signed INTEGER range."""
+    return h - (1 << 64) if h >= 1 << 63 else h